@@ -1,9 +1,12 @@
 from django.contrib import admin
+from trendbazar.admin_utils import LargeTableAdmin
 from .models import User
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(LargeTableAdmin):
     list_display = ('email', 'full_name', 'is_active', 'is_staff', 'is_superuser', 'created_at', 'updated_at')
-    search_fields = ('email', 'full_name')
+    # Prefix search over the Lower(email)/Lower(full_name) indexes
+    search_fields = prefix_search_fields = ('email', 'full_name')
+    search_help_text = "Start of the email address or full name"
     list_filter = ('is_active', 'is_staff', 'is_superuser')
     ordering = ('-created_at',)
 
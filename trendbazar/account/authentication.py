@@ -0,0 +1,116 @@
+"""
+Email/password login with a single user lookup.
+
+authenticate() followed by a second query for the "not activated" message
+costs a password hash plus two user fetches per failed attempt. Here the
+user row is fetched once, inactive accounts are answered without hashing,
+and failed attempts are throttled per IP and per email before any hashing.
+Failures still send user_login_failed, as authenticate() would; throttled
+attempts are refused before that point and send nothing.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.signals import user_login_failed
+from django.db import connection
+
+from .models import User
+from .throttle import get_login_throttle
+
+INVALID_CREDENTIALS = "Invalid email or password."
+INACTIVE_ACCOUNT = "Account is not activated. Please check your email."
+TOO_MANY_ATTEMPTS = "Too many login attempts. Please try again later."
+
+# Backend recorded in the session, as authenticate() would have done
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+def _check_password(user, password):
+    if user is None:
+        # Hash anyway so unknown emails take as long as wrong passwords
+        make_password(password)
+        return False
+    return user.check_password(password)
+
+
+def _check_password_task(user, password):
+    """_check_password() for use on a hash worker thread"""
+    try:
+        return _check_password(user, password)
+    finally:
+        # check_password() saves upgraded hashes; don't leave the thread's connection open
+        connection.close()
+
+
+def _failed_credentials(email):
+    # What authenticate() would pass along, minus the password
+    return {User.USERNAME_FIELD: email}
+
+
+def _finish(user, password_ok, ip, email):
+    throttle = get_login_throttle()
+    if user is not None and not user.is_active:
+        throttle.failed(ip, email)
+        return None, INACTIVE_ACCOUNT
+    if not password_ok:
+        throttle.failed(ip, email)
+        return None, INVALID_CREDENTIALS
+    throttle.succeeded(email)
+    user.backend = MODEL_BACKEND
+    return user, None
+
+
+def authenticate_login(request, email, password):
+    """Return (user, None) on success or (None, error message)"""
+    throttle = get_login_throttle()
+    ip = throttle.client_ip(request)
+    if not throttle.allowed(ip, email):
+        return None, TOO_MANY_ATTEMPTS
+
+    user = User.objects.filter(email=email).first()
+    password_ok = False
+    # Inactive accounts get their message without paying for a hash
+    if user is None or user.is_active:
+        password_ok = _check_password(user, password)
+    user, error = _finish(user, password_ok, ip, email)
+    if error:
+        user_login_failed.send(sender=__name__, credentials=_failed_credentials(email), request=request)
+    return user, error
+
+
+_hash_executor = None
+_hash_executor_lock = threading.Lock()
+
+
+def get_hash_executor():
+    """Threads that run password hashing off the event loop under ASGI"""
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'LOGIN_HASH_WORKERS', None) or os.cpu_count(),
+                thread_name_prefix='login-hash',
+            )
+    return _hash_executor
+
+
+async def aauthenticate_login(request, email, password):
+    """Async authenticate_login(); the hash runs in a thread pool so the event loop never stalls"""
+    throttle = get_login_throttle()
+    ip = throttle.client_ip(request)
+    if not throttle.allowed(ip, email):
+        return None, TOO_MANY_ATTEMPTS
+
+    user = await User.objects.filter(email=email).afirst()
+    password_ok = False
+    if user is None or user.is_active:
+        loop = asyncio.get_running_loop()
+        password_ok = await loop.run_in_executor(get_hash_executor(), _check_password_task, user, password)
+    user, error = _finish(user, password_ok, ip, email)
+    if error:
+        await user_login_failed.asend(sender=__name__, credentials=_failed_credentials(email), request=request)
+    return user, error
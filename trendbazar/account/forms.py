@@ -1,8 +1,7 @@
-import re
 from django import forms
 from account.models import User
 from django.core.exceptions import ValidationError
-import re
+from trendbazar.validation import PASSWORD
 
 class UserForm(forms.ModelForm):
     password = forms.CharField(widget=forms.PasswordInput(attrs={'placeholder': 'Enter password'}))
@@ -27,17 +26,10 @@ class UserForm(forms.ModelForm):
             if password != confirm_password:
                 raise forms.ValidationError("Password and Confirm Password do not match")
 
-            # Check password length
-            if len(password) < 8:
-                raise forms.ValidationError("Password must be at least 8 characters long")
-
-            # Check for at least one letter and one digit
-            if not re.search(r"[A-Za-z]", password) or not re.search(r"\d", password):
-                raise forms.ValidationError("Password must contain both letters and numbers")
-
-            # Check for at least one special character
-            if not re.search(r"[!@#$%^&*(),.?\":{}|<>]", password):
-                raise forms.ValidationError("Password must include at least one special character")
+            # Length, letters and digits, special character (see trendbazar.validation)
+            errors = PASSWORD.errors({'password': password})
+            if errors:
+                raise forms.ValidationError(errors[0])
 
         return cleaned_data
 
@@ -0,0 +1,57 @@
+"""
+Password hashers whose cost comes from settings.PASSWORD_HASHING.
+
+They keep Django's algorithm names, so existing hashes still verify. When
+the preferred algorithm or its cost changes, User.check_password() re-hashes
+the password with the new policy on the next successful login.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher,
+)
+
+
+def _policy(name, default):
+    value = getattr(settings, 'PASSWORD_HASHING', {}).get(name)
+    return default if value is None else value
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return _policy('PBKDF2_ITERATIONS', PBKDF2PasswordHasher.iterations)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Needs the optional argon2-cffi package"""
+
+    @property
+    def time_cost(self):
+        return _policy('ARGON2_TIME_COST', Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return _policy('ARGON2_MEMORY_COST', Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return _policy('ARGON2_PARALLELISM', Argon2PasswordHasher.parallelism)
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return _policy('SCRYPT_WORK_FACTOR', ScryptPasswordHasher.work_factor)
+
+    @property
+    def block_size(self):
+        return _policy('SCRYPT_BLOCK_SIZE', ScryptPasswordHasher.block_size)
+
+    @property
+    def parallelism(self):
+        return _policy('SCRYPT_PARALLELISM', ScryptPasswordHasher.parallelism)
+
+    @property
+    def maxmem(self):
+        # scrypt needs about 128 * n * r bytes; OpenSSL refuses more than 32MB unless told
+        return 2 * 128 * self.work_factor * self.block_size
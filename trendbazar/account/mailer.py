@@ -0,0 +1,214 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BACKEND': None,          # None uses settings.EMAIL_BACKEND
+    'WORKERS': 2,
+    'QUEUE_SIZE': 1000,
+    'BATCH_SIZE': 50,
+    'MAX_RETRIES': 3,
+    'RETRY_BACKOFF': 2.0,     # seconds, doubled after every failed attempt
+    'IDLE_TIMEOUT': 30,       # close the SMTP connection after this long without mail
+    'ENQUEUE_TIMEOUT': 2,     # how long a request waits for room in a full queue
+    'SHUTDOWN_TIMEOUT': 10,   # how long process exit waits for queued mail
+    'SYNC': False,            # send in the calling thread (tests, management commands)
+}
+
+
+class EmailDispatcher:
+    """
+    A fixed pool of workers draining a bounded queue of outgoing messages.
+
+    Each worker keeps one mail connection open and sends everything it can
+    pull from the queue over it, so a burst of sign-ups costs a handful of
+    SMTP/TLS handshakes instead of one per email. A failed message waits out
+    its backoff on a timer and goes back on the queue, so retries never hold
+    up a worker.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self.queue = queue.Queue(maxsize=options['QUEUE_SIZE'])
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._retrying = 0
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def get_connection(self):
+        return get_connection(backend=self.options['BACKEND'])
+
+    def send(self, message):
+        """Queue `message`; when the queue stays full, send it from the caller instead"""
+        if self.options['SYNC']:
+            self._deliver_now(message)
+            return
+        self._ensure_workers()
+        try:
+            self.queue.put((message, 0), timeout=self.options['ENQUEUE_TIMEOUT'])
+        except queue.Full:
+            logger.warning("Email queue is full; sending to %s inline", message.to)
+            self._deliver_now(message)
+
+    def send_many(self, messages):
+        for message in messages:
+            self.send(message)
+
+    async def asend(self, message):
+        """send() for async views: queues without blocking the event loop when there is room"""
+        if not self.options['SYNC']:
+            self._ensure_workers()
+            try:
+                self.queue.put_nowait((message, 0))
+                return
+            except queue.Full:
+                pass
+        # Waiting for room, or sending, happens on a thread
+        await sync_to_async(self.send, thread_sensitive=False)(message)
+
+    async def asend_many(self, messages):
+        for message in messages:
+            await self.asend(message)
+
+    def flush(self, timeout=None):
+        """Wait until every queued message, including pending retries, has been handled"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks or self._retrying:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def shutdown(self):
+        """Give queued mail a last chance at exit and report whatever is left behind"""
+        if self.flush(self.options['SHUTDOWN_TIMEOUT']):
+            return
+        # Workers and retry timers are daemon threads: anything unsent now is lost
+        self.dropped = self.queue.unfinished_tasks + self._retrying
+        logger.error("Exiting with %d emails unsent", self.dropped)
+
+    def _deliver_now(self, message):
+        connection = self.get_connection()
+        attempt = 0
+        try:
+            while not self._deliver(connection, message):
+                attempt += 1
+                if not self.options['SYNC']:
+                    # Sent inline only because the queue was full; the workers retry it
+                    self._retry_later(message, attempt)
+                    return
+                # The caller asked to wait for delivery
+                delay = self._backoff(message, attempt)
+                if delay is None:
+                    return
+                time.sleep(delay)
+        finally:
+            connection.close()
+
+    def _ensure_workers(self):
+        if self._workers:
+            return
+        with self._lock:
+            if self._workers:
+                return
+            for number in range(self.options['WORKERS']):
+                worker = threading.Thread(target=self._run, name=f'email-worker-{number}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _next_batch(self):
+        """Block for one message, then take whatever else is already waiting"""
+        batch = [self.queue.get(timeout=self.options['IDLE_TIMEOUT'])]
+        while len(batch) < self.options['BATCH_SIZE']:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        connection = None
+        while True:
+            try:
+                batch = self._next_batch()
+            except queue.Empty:
+                # Idle: drop the connection rather than let the server time it out
+                if connection is not None:
+                    connection.close()
+                    connection = None
+                continue
+
+            if connection is None:
+                connection = self.get_connection()
+            for message, attempt in batch:
+                try:
+                    if not self._deliver(connection, message):
+                        # Start the next message on a fresh connection
+                        connection = self.get_connection()
+                        self._retry_later(message, attempt + 1)
+                finally:
+                    self.queue.task_done()
+
+    def _deliver(self, connection, message):
+        """Send one message; returns False, with the connection closed, if that failed"""
+        try:
+            connection.open()
+            connection.send_messages([message])
+        except Exception:
+            logger.warning("Could not send email to %s", message.to, exc_info=True)
+            connection.close()
+            return False
+        with self._lock:
+            self.sent += 1
+        return True
+
+    def _backoff(self, message, attempt):
+        """Seconds to wait before retry number `attempt`, or None once retries are used up"""
+        if attempt > self.options['MAX_RETRIES']:
+            with self._lock:
+                self.failed += 1
+            logger.error("Giving up on email to %s after %d attempts", message.to, attempt)
+            return None
+        return self.options['RETRY_BACKOFF'] * 2 ** (attempt - 1)
+
+    def _retry_later(self, message, attempt):
+        delay = self._backoff(message, attempt)
+        if delay is None:
+            return
+        with self._lock:
+            self._retrying += 1
+        timer = threading.Timer(delay, self._requeue, (message, attempt))
+        timer.daemon = True
+        timer.start()
+
+    def _requeue(self, message, attempt):
+        try:
+            self._ensure_workers()
+            self.queue.put((message, attempt))
+        finally:
+            # Only once the message is back on the queue, so flush() never sees a gap
+            with self._lock:
+                self._retrying -= 1
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = EmailDispatcher({**DEFAULTS, **getattr(settings, 'EMAIL_DISPATCH', {})})
+            atexit.register(_dispatcher.shutdown)
+    return _dispatcher
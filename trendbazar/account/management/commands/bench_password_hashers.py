@@ -0,0 +1,73 @@
+import math
+import os
+import time
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+
+from account.hashers import (
+    TunedArgon2PasswordHasher, TunedPBKDF2PasswordHasher, TunedScryptPasswordHasher,
+)
+
+PASSWORD = 'Bench#pass1'
+
+
+def candidate(base, **params):
+    """A hasher instance with fixed cost parameters, independent of settings"""
+    # Class attributes on the subclass take precedence over the settings-backed properties
+    hasher = type(base.__name__, (base,), params)()
+    label = ', '.join(f'{name}={value}' for name, value in params.items())
+    return f'{hasher.algorithm} ({label})', hasher
+
+
+class Command(BaseCommand):
+    help = "Measure password hashes per second per core for candidate hashing policies"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=2.0, help="Time spent measuring each setting")
+        parser.add_argument('--pbkdf2-iterations', type=int, nargs='*', default=[100000, 300000, 600000, 1000000])
+        parser.add_argument('--scrypt-work-factors', type=int, nargs='*', default=[2 ** 14, 2 ** 15, 2 ** 16])
+        parser.add_argument('--argon2-time-costs', type=int, nargs='*', default=[1, 2, 3])
+        parser.add_argument('--argon2-memory-cost', type=int, default=65536, help="KiB")
+        parser.add_argument('--argon2-parallelism', type=int, default=1)
+        parser.add_argument(
+            '--target-logins', type=float,
+            help="Peak successful logins per second; prints the cores each setting would need",
+        )
+
+    def candidates(self, options):
+        yield 'current policy', get_hasher('default')
+        for iterations in options['pbkdf2_iterations']:
+            yield candidate(TunedPBKDF2PasswordHasher, iterations=iterations)
+        for work_factor in options['scrypt_work_factors']:
+            yield candidate(
+                TunedScryptPasswordHasher, work_factor=work_factor, block_size=8, parallelism=1,
+            )
+        for time_cost in options['argon2_time_costs']:
+            yield candidate(
+                TunedArgon2PasswordHasher, time_cost=time_cost,
+                memory_cost=options['argon2_memory_cost'], parallelism=options['argon2_parallelism'],
+            )
+
+    def measure(self, hasher, seconds):
+        hasher.encode(PASSWORD, hasher.salt())  # warm-up, loads the library
+        count = 0
+        started = time.perf_counter()
+        while (elapsed := time.perf_counter() - started) < seconds:
+            hasher.encode(PASSWORD, hasher.salt())
+            count += 1
+        return count / elapsed
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{os.cpu_count()} CPUs; one hashing thread per measurement\n")
+        for label, hasher in self.candidates(options):
+            try:
+                rate = self.measure(hasher, options['seconds'])
+            except ValueError as e:
+                # e.g. argon2-cffi not installed
+                self.stdout.write(f"  {label:<50} skipped: {e}")
+                continue
+            line = f"  {label:<50} {rate:9.1f} hashes/s/core  {1000 / rate:8.2f} ms/hash"
+            if options['target_logins']:
+                line += f"  {math.ceil(options['target_logins'] / rate)} cores for {options['target_logins']:g}/s"
+            self.stdout.write(line)
@@ -0,0 +1,172 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from account.mailer import get_dispatcher
+from account.models import User
+from account.utils import activation_url_for, build_activation_email
+from trendbazar.validation import IMPORTED_USER
+
+
+def read_rows(path, fmt):
+    """Yield one dict per input record without loading the whole file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # Counted as an invalid row instead of aborting the import
+                        yield None
+
+
+def load_checkpoint(path):
+    try:
+        return json.loads(Path(path).read_text())['rows_done']
+    except FileNotFoundError:
+        return 0
+
+
+def save_checkpoint(path, rows_done):
+    # Write-then-rename so a crash never leaves a half-written checkpoint
+    tmp = f"{path}.tmp"
+    Path(tmp).write_text(json.dumps({'rows_done': rows_done}))
+    os.replace(tmp, path)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import users from CSV or JSONL (email, full_name, and password or password_hash, "
+        "optionally is_active). Resumable with --checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSONL file")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--checkpoint', help="File recording progress; an interrupted import resumes from it")
+        parser.add_argument(
+            '--trust-hashes', action='store_true',
+            help="Store password_hash values as they are instead of rejecting rows that carry one",
+        )
+        parser.add_argument('--activate', action='store_true', help="Import users as active")
+        parser.add_argument('--send-activation', action='store_true', help="Queue activation emails for inactive users")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        checkpoint = options['checkpoint']
+        batch_size = options['batch_size']
+
+        rows_done = load_checkpoint(checkpoint) if checkpoint else 0
+        if rows_done:
+            self.stdout.write(f"Resuming after row {rows_done}")
+
+        rows = islice(read_rows(path, fmt), rows_done, None)
+        totals = {'created': 0, 'skipped': 0, 'invalid': 0}
+        started = time.perf_counter()
+        dispatcher = get_dispatcher() if options['send_activation'] else None
+        failed_before = dispatcher.failed if dispatcher else 0
+
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            batch_started = time.perf_counter()
+            counts = self.import_batch(batch, options)
+            if dispatcher:
+                # The emails are queued on daemon threads; checkpoint only once they are out
+                dispatcher.flush()
+            rows_done += len(batch)
+            if checkpoint:
+                save_checkpoint(checkpoint, rows_done)
+
+            for key, value in counts.items():
+                totals[key] += value
+            elapsed = time.perf_counter() - batch_started
+            self.stdout.write(
+                f"  rows {rows_done}: +{counts['created']} created, {counts['skipped']} existing, "
+                f"{counts['invalid']} invalid ({len(batch) / elapsed:.0f} rows/s)"
+            )
+
+        elapsed = time.perf_counter() - started
+        processed = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {totals['created']} users ({totals['skipped']} existing, {totals['invalid']} invalid) "
+            f"in {elapsed:.1f}s, {processed / elapsed if elapsed else 0:.0f} rows/s"
+        ))
+        if dispatcher and dispatcher.failed > failed_before:
+            self.stderr.write(f"{dispatcher.failed - failed_before} activation emails could not be sent")
+
+    def normalize(self, row):
+        return {
+            **row,
+            'email': User.objects.normalize_email((row.get('email') or '').strip()),
+            'full_name': (row.get('full_name') or '').strip(),
+        }
+
+    def build_user(self, row, options):
+        """An unsaved User for one validated row, or None if its password hash is unusable"""
+        email = row['email']
+        password_hash = row.get('password_hash')
+        if password_hash:
+            if not options['trust_hashes']:
+                raise CommandError("Input contains password_hash values; pass --trust-hashes to import them")
+            try:
+                identify_hasher(password_hash)
+            except ValueError:
+                return None
+        elif row.get('password'):
+            password_hash = make_password(row['password'])
+        else:
+            # Users without a password set one through "forgot password"
+            password_hash = make_password(None)
+
+        is_active = options['activate'] or str(row.get('is_active', '')).lower() in ('1', 'true', 'yes')
+        return User(
+            email=email,
+            full_name=row['full_name'] or email.split('@')[0],
+            password=password_hash,
+            is_active=is_active,
+        )
+
+    def import_batch(self, batch, options):
+        records = [row for row in batch if isinstance(row, dict)]
+        valid, rejected = IMPORTED_USER.split([self.normalize(row) for row in records])
+        users = {}
+        invalid = len(batch) - len(records) + len(rejected)
+        for row in valid:
+            user = self.build_user(row, options)
+            if user is None:
+                invalid += 1
+            elif user.email not in users:
+                users[user.email] = user
+
+        # One lookup for the whole batch instead of one per row
+        existing = set(User.objects.filter(email__in=list(users)).values_list('email', flat=True))
+        new_users = [user for email, user in users.items() if email not in existing]
+
+        with transaction.atomic():
+            created = User.objects.bulk_create(new_users, batch_size=1000)
+
+        if options['send_activation']:
+            get_dispatcher().send_many(
+                build_activation_email(user.email, activation_url_for(user))
+                for user in created if not user.is_active and user.pk
+            )
+
+        return {
+            'created': len(created),
+            'skipped': len(batch) - invalid - len(created),
+            'invalid': invalid,
+        }
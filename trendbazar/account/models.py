@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 
 class UserManager(BaseUserManager):
@@ -47,6 +48,17 @@ class User(AbstractUser):
 
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # UserAdmin ordering
+            models.Index(fields=['-created_at'], name='user_created_idx'),
+            # Admin is_active filter in the same order
+            models.Index(fields=['is_active', '-created_at'], name='user_active_created_idx'),
+            # Admin prefix search (trendbazar.admin_utils.LargeTableAdmin)
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+            models.Index(Lower('full_name'), name='user_full_name_lower_idx'),
+        ]
+
     def __str__(self):
         return self.full_name
     
@@ -0,0 +1,56 @@
+"""
+social_django, wired so that workers only import the OAuth stack
+(social_core strategies and backends, requests, jwt) when a social login
+actually happens. Most requests are catalog reads that never touch it.
+"""
+from importlib import import_module
+from threading import Lock
+
+from social_core.registry import REGISTRY
+from social_django.apps import PythonSocialAuthConfig
+
+
+class LazyStrategy:
+    """Stands in for the default strategy until a backend first uses it"""
+
+    def __init__(self):
+        self._strategy = None
+        self._lock = Lock()
+
+    def __getattr__(self, name):
+        if self._strategy is None:
+            with self._lock:
+                if self._strategy is None:
+                    from social_django.utils import load_strategy
+                    self._strategy = load_strategy()
+        return getattr(self._strategy, name)
+
+
+class SocialAuthConfig(PythonSocialAuthConfig):
+    """social_django's app config, minus loading the default strategy in ready()"""
+
+    def ready(self):
+        REGISTRY.default_strategy = LazyStrategy()
+
+
+def lazy_view(path, **attributes):
+    """
+    A view that imports `path` on its first call. `attributes` are set on
+    the wrapper for middleware that inspects the resolved view before it
+    runs (csrf_exempt).
+    """
+    module_name, name = path.rsplit('.', 1)
+    view = None
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = getattr(import_module(module_name), name)
+        return view(request, *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__qualname__ = name
+    wrapper.__module__ = module_name
+    for attribute, value in attributes.items():
+        setattr(wrapper, attribute, value)
+    return wrapper
@@ -0,0 +1,46 @@
+"""
+social_django.urls, with views imported on their first request instead of
+when the URLconf loads (see account.social). The routes and view attributes
+are copied from social_django COPIED_FROM; any other release gets
+social_django.urls itself, which imports the OAuth stack up front but can
+never drift. account.tests compares the copy with the installed release.
+"""
+import logging
+
+import social_django
+from django.conf import settings
+from django.urls import path
+from social_core.utils import setting_name
+
+from .social import lazy_view
+
+logger = logging.getLogger(__name__)
+
+COPIED_FROM = '7.1'
+
+extra = (getattr(settings, setting_name("TRAILING_SLASH"), True) and "/") or ""
+
+app_name = "social"
+
+# login_not_required views; complete also accepts cross-site POST callbacks
+PUBLIC = {'login_required': False}
+
+if social_django.__version__.split('.')[:2] == COPIED_FROM.split('.'):
+    urlpatterns = [
+        path(f"login/<str:backend>{extra}", lazy_view('social_django.views.auth', **PUBLIC), name="begin"),
+        path(f"complete/<str:backend>{extra}", lazy_view('social_django.views.complete', csrf_exempt=True, **PUBLIC), name="complete"),
+        path(f"idp-launch/<str:backend>{extra}", lazy_view('social_django.views.idp_launch', **PUBLIC), name="idp_launch"),
+        path(f"app-launch/<str:backend>{extra}", lazy_view('social_django.views.app_launch', **PUBLIC), name="app_launch"),
+        path(f"disconnect/<str:backend>{extra}", lazy_view('social_django.views.disconnect'), name="disconnect"),
+        path(
+            f"disconnect/<str:backend>/<int:association_id>{extra}",
+            lazy_view('social_django.views.disconnect'),
+            name="disconnect_individual",
+        ),
+    ]
+else:
+    logger.warning(
+        "account.social_urls was copied from social_django %s but %s is installed; "
+        "using social_django.urls", COPIED_FROM, social_django.__version__,
+    )
+    from social_django.urls import urlpatterns
@@ -1,3 +1,395 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.signals import user_login_failed
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from django.contrib.auth.tokens import default_token_generator
+from django.template.loader import render_to_string
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from . import authentication, social_urls
+from .authentication import INACTIVE_ACCOUNT, INVALID_CREDENTIALS, TOO_MANY_ATTEMPTS
+from .mailer import DEFAULTS as MAIL_DEFAULTS, EmailDispatcher
+from .models import User
+from .utils import build_password_reset_email, compile_email_template, render_email
+from .token_cache import CONSUMED, INVALID, UNKNOWN_USER, TokenLinkCache
+from .throttle import DEFAULTS as THROTTLE_DEFAULTS, LoginThrottle, TokenBucket
+
+
+class FlakyBackend(EmailBackend):
+    """locmem backend that fails the first `failures` sends to each address"""
+    failures = {}
+
+    def send_messages(self, messages):
+        for message in messages:
+            address = message.to[0]
+            if self.failures.get(address):
+                self.failures[address] -= 1
+                raise ConnectionError('connection reset')
+        return super().send_messages(messages)
+
+
+class ImportUsersTests(TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, lines):
+        path = self.directory / name
+        path.write_text(''.join(f'{line}\n' for line in lines))
+        return str(path)
+
+    def run_import(self, path, *args):
+        out = StringIO()
+        call_command('import_users', path, *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_imports_csv(self):
+        path = self.write('users.csv', [
+            'email,full_name,password,is_active',
+            'Ann@Example.com,Ann,secret123,true',
+            'bob@example.com,,,',
+            'not-an-email,Nobody,,',
+        ])
+        self.run_import(path)
+        ann = User.objects.get(email='Ann@example.com')
+        self.assertTrue(ann.is_active)
+        self.assertTrue(ann.check_password('secret123'))
+        bob = User.objects.get(email='bob@example.com')
+        self.assertEqual(bob.full_name, 'bob')
+        self.assertFalse(bob.has_usable_password())
+        self.assertEqual(User.objects.count(), 2)
+
+    def test_existing_users_and_duplicates_are_skipped(self):
+        User.objects.create_user(email='ann@example.com', full_name='Ann', password='pw')
+        path = self.write('users.jsonl', [
+            json.dumps({'email': 'ann@example.com'}),
+            json.dumps({'email': 'cat@example.com'}),
+            json.dumps({'email': 'cat@example.com'}),
+        ])
+        output = self.run_import(path)
+        self.assertIn('Imported 1 users (2 existing, 0 invalid)', output)
+
+    def test_malformed_jsonl_lines_count_as_invalid(self):
+        path = self.write('users.jsonl', [
+            json.dumps({'email': 'ann@example.com'}),
+            '{"email": "broken@example.com",',
+            json.dumps(['not', 'an', 'object']),
+            json.dumps({'email': 'bob@example.com'}),
+        ])
+        output = self.run_import(path)
+        self.assertIn('Imported 2 users (0 existing, 2 invalid)', output)
+
+    def test_resumes_from_checkpoint(self):
+        path = self.write('users.jsonl', [json.dumps({'email': f'user{i}@example.com'}) for i in range(5)])
+        checkpoint = self.directory / 'progress.json'
+        checkpoint.write_text(json.dumps({'rows_done': 3}))
+        self.run_import(path, '--checkpoint', str(checkpoint), '--batch-size', '1')
+        self.assertEqual(
+            sorted(User.objects.values_list('email', flat=True)),
+            ['user3@example.com', 'user4@example.com'],
+        )
+        self.assertEqual(json.loads(checkpoint.read_text()), {'rows_done': 5})
+
+    def test_activation_emails_are_sent_before_returning(self):
+        path = self.write('users.jsonl', [json.dumps({'email': f'user{i}@example.com'}) for i in range(30)])
+        self.run_import(path, '--send-activation', '--batch-size', '10')
+        self.assertEqual(len(mail.outbox), 30)
+        self.assertIn('/Authactivate/', mail.outbox[0].body)
+
+
+class EmailDispatcherTests(SimpleTestCase):
+    def setUp(self):
+        mail.outbox = []
+        FlakyBackend.failures = {}
+
+    def dispatcher(self, **options):
+        return EmailDispatcher({
+            **MAIL_DEFAULTS, 'BACKEND': f'{__name__}.FlakyBackend', 'WORKERS': 1,
+            'RETRY_BACKOFF': 0.2, **options,
+        })
+
+    def message(self, address):
+        return EmailMessage('Hello', 'Body', 'shop@example.com', [address])
+
+    def test_retry_does_not_hold_up_the_queue(self):
+        FlakyBackend.failures = {'ann@example.com': 1}
+        dispatcher = self.dispatcher()
+        with self.assertLogs('account.mailer', 'WARNING'):
+            dispatcher.send(self.message('ann@example.com'))
+            dispatcher.send(self.message('bob@example.com'))
+            self.assertTrue(dispatcher.flush(5))
+        self.assertEqual([message.to[0] for message in mail.outbox], ['bob@example.com', 'ann@example.com'])
+        self.assertEqual((dispatcher.sent, dispatcher.failed), (2, 0))
+
+    def test_workers_count_every_delivery(self):
+        dispatcher = self.dispatcher(WORKERS=4, BATCH_SIZE=5)
+        for number in range(200):
+            dispatcher.send(self.message(f'user{number}@example.com'))
+        self.assertTrue(dispatcher.flush(10))
+        self.assertEqual((len(mail.outbox), dispatcher.sent), (200, 200))
+
+    def test_gives_up_after_max_retries(self):
+        FlakyBackend.failures = {'ann@example.com': 10}
+        dispatcher = self.dispatcher(MAX_RETRIES=2, RETRY_BACKOFF=0.01)
+        with self.assertLogs('account.mailer', 'ERROR'):
+            dispatcher.send(self.message('ann@example.com'))
+            self.assertTrue(dispatcher.flush(5))
+        self.assertEqual((dispatcher.sent, dispatcher.failed), (0, 1))
+        self.assertEqual(FlakyBackend.failures['ann@example.com'], 7)
+
+    def test_sync_mode_retries_in_place(self):
+        FlakyBackend.failures = {'ann@example.com': 1}
+        dispatcher = self.dispatcher(SYNC=True, RETRY_BACKOFF=0.01)
+        with self.assertLogs('account.mailer', 'WARNING'):
+            dispatcher.send(self.message('ann@example.com'))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_unsent_mail_is_counted_at_shutdown(self):
+        FlakyBackend.failures = {'ann@example.com': 1}
+        dispatcher = self.dispatcher(RETRY_BACKOFF=60, SHUTDOWN_TIMEOUT=0.2)
+        with self.assertLogs('account.mailer', 'WARNING') as logs:
+            dispatcher.send(self.message('ann@example.com'))
+            dispatcher.shutdown()
+        self.assertEqual(dispatcher.dropped, 1)
+        self.assertIn('Exiting with 1 emails unsent', logs.output[-1])
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_refused_once_empty_and_refilled_over_time(self):
+        bucket = TokenBucket(capacity=2, refill_per_minute=60, max_keys=10)
+        with mock.patch('account.throttle.time.monotonic', return_value=100.0):
+            bucket.consume('a')
+            self.assertTrue(bucket.allowed('a'))
+            bucket.consume('a')
+            self.assertFalse(bucket.allowed('a'))
+            self.assertTrue(bucket.allowed('b'))
+        with mock.patch('account.throttle.time.monotonic', return_value=101.0):
+            self.assertTrue(bucket.allowed('a'))
+
+    def test_least_recently_used_keys_are_dropped(self):
+        bucket = TokenBucket(capacity=1, refill_per_minute=0, max_keys=2)
+        for key in 'abc':
+            bucket.consume(key)
+        self.assertEqual(list(bucket._buckets), ['b', 'c'])
+
+
+class ClientIPTests(SimpleTestCase):
+    def client_ip(self, **options):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.9', HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2, 3.3.3.3')
+        return LoginThrottle({**THROTTLE_DEFAULTS, **options}).client_ip(request)
+
+    def test_remote_addr_by_default(self):
+        self.assertEqual(self.client_ip(), '10.0.0.9')
+
+    def test_forwarded_for_counts_trusted_proxies_from_the_right(self):
+        self.assertEqual(self.client_ip(CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR'), '3.3.3.3')
+        self.assertEqual(self.client_ip(CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR', TRUSTED_PROXIES=2), '2.2.2.2')
+        self.assertEqual(self.client_ip(CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR', TRUSTED_PROXIES=5), '1.1.1.1')
+
+    def test_missing_header_falls_back_to_remote_addr(self):
+        self.assertEqual(self.client_ip(CLIENT_IP_HEADER='HTTP_X_REAL_IP'), '10.0.0.9')
+
+
+class LoginTests(TransactionTestCase):
+    # Transactional, so rows saved on the hash worker threads are visible
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='ann@example.com', full_name='Ann', password='secret123', is_active=True)
+        self.request = RequestFactory().post('/Authlogin/', REMOTE_ADDR='10.0.0.1')
+        self.throttle = LoginThrottle({**THROTTLE_DEFAULTS, 'EMAIL_CAPACITY': 2})
+        patcher = mock.patch.object(authentication, 'get_login_throttle', return_value=self.throttle)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.failures = []
+        user_login_failed.connect(self.record_failure)
+        self.addCleanup(user_login_failed.disconnect, self.record_failure)
+
+    def record_failure(self, credentials, request, **kwargs):
+        self.failures.append(credentials)
+
+    def login(self, email, password):
+        return authentication.authenticate_login(self.request, email, password)
+
+    def alogin(self, email, password):
+        return async_to_sync(authentication.aauthenticate_login)(self.request, email, password)
+
+    def test_success(self):
+        for login in (self.login, self.alogin):
+            user, error = login('ann@example.com', 'secret123')
+            self.assertEqual((user, error), (self.user, None))
+            self.assertEqual(user.backend, authentication.MODEL_BACKEND)
+
+    def test_failures_send_user_login_failed(self):
+        self.assertEqual(self.login('ann@example.com', 'wrong'), (None, INVALID_CREDENTIALS))
+        self.assertEqual(self.alogin('nobody@example.com', 'wrong'), (None, INVALID_CREDENTIALS))
+        self.assertEqual(self.failures, [{'email': 'ann@example.com'}, {'email': 'nobody@example.com'}])
+
+    def test_inactive_account_is_not_hashed(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with mock.patch.object(User, 'check_password') as check_password:
+            self.assertEqual(self.login('ann@example.com', 'secret123'), (None, INACTIVE_ACCOUNT))
+        check_password.assert_not_called()
+
+    def test_throttled_after_repeated_failures(self):
+        self.login('ann@example.com', 'wrong')
+        self.login('ANN@example.com', 'wrong')
+        with mock.patch.object(User, 'check_password') as check_password:
+            self.assertEqual(self.alogin('ann@example.com', 'secret123'), (None, TOO_MANY_ATTEMPTS))
+        check_password.assert_not_called()
+        self.assertEqual(len(self.failures), 2)
+
+    def test_success_resets_the_email_bucket(self):
+        self.login('ann@example.com', 'wrong')
+        self.login('ann@example.com', 'secret123')
+        self.login('ann@example.com', 'wrong')
+        self.assertTrue(self.throttle.allowed('10.0.0.1', 'ann@example.com'))
+
+    def test_hash_worker_closes_its_connection(self):
+        with mock.patch.object(authentication, 'connection') as connection:
+            self.alogin('ann@example.com', 'secret123')
+        connection.close.assert_called_once_with()
+
+
+class SocialURLTests(SimpleTestCase):
+    ATTRIBUTES = ('__name__', 'csrf_exempt', 'login_required')
+
+    def describe(self, patterns):
+        return [
+            (str(pattern.pattern), pattern.name, *(getattr(pattern.callback, name, None) for name in self.ATTRIBUTES))
+            for pattern in patterns
+        ]
+
+    def test_lazy_copy_matches_the_installed_social_django(self):
+        from social_django import urls
+        self.assertEqual(self.describe(social_urls.urlpatterns), self.describe(urls.urlpatterns))
+
+
+class TokenLinkCacheTests(SimpleTestCase):
+    def test_outcomes_expire(self):
+        links = TokenLinkCache(max_entries=10, timeout=60)
+        with mock.patch('account.token_cache.time.monotonic', return_value=1000.0):
+            links.remember('activate', 'MQ', 'token', CONSUMED)
+            self.assertEqual(links.get('activate', 'MQ', 'token'), CONSUMED)
+            self.assertIsNone(links.get('reset', 'MQ', 'token'))
+        with mock.patch('account.token_cache.time.monotonic', return_value=1061.0):
+            self.assertIsNone(links.get('activate', 'MQ', 'token'))
+
+    def test_least_recently_hit_links_are_dropped(self):
+        links = TokenLinkCache(max_entries=2, timeout=60)
+        links.remember('activate', 'MQ', 'a', INVALID)
+        links.remember('activate', 'MQ', 'b', INVALID)
+        links.get('activate', 'MQ', 'a')
+        links.remember('activate', 'MQ', 'c', INVALID)
+        self.assertIsNone(links.get('activate', 'MQ', 'b'))
+        self.assertEqual(links.get('activate', 'MQ', 'a'), INVALID)
+
+    def test_disabled(self):
+        links = TokenLinkCache(max_entries=2, timeout=60, enabled=False)
+        links.remember('activate', 'MQ', 'a', INVALID)
+        self.assertIsNone(links.get('activate', 'MQ', 'a'))
+
+    def test_stats(self):
+        links = TokenLinkCache(max_entries=10, timeout=60)
+        links.remember('activate', 'MQ', 'a', CONSUMED)
+        links.remember('reset', 'Mg', 'b', UNKNOWN_USER)
+        for _ in range(3):
+            links.get('activate', 'MQ', 'a')
+        stats = links.stats()
+        self.assertEqual((stats['lookups'], stats['short_circuits'], stats['max_hits_per_link']), (3, 3, 4))
+        self.assertEqual(stats['links_by_outcome'], {CONSUMED: 1, INVALID: 0, UNKNOWN_USER: 1})
+        self.assertEqual(stats['hits_per_link']['<=1'], 1)
+        self.assertEqual(stats['hits_per_link']['<=5'], 1)
+
+
+class TokenLinkViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='ann@example.com', full_name='Ann', password='secret123')
+        self.uidb64 = urlsafe_base64_encode(force_bytes(self.user.pk))
+        self.token = default_token_generator.make_token(self.user)
+        self.links = TokenLinkCache(max_entries=100, timeout=60)
+        patcher = mock.patch('account.views.get_token_link_cache', return_value=self.links)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_used_activation_link_is_answered_without_queries(self):
+        self.client.get(f'/Authactivate/{self.uidb64}/{self.token}/')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/Authactivate/{self.uidb64}/{self.token}/')
+        self.assertRedirects(response, '/Authlogin/', fetch_redirect_response=False)
+        self.assertEqual(self.links.short_circuits, 1)
+
+    def test_rejected_activation_links_are_remembered(self):
+        for uidb64, token, outcome in ((self.uidb64, 'bad-token', INVALID), ('!!', self.token, UNKNOWN_USER)):
+            self.client.get(f'/Authactivate/{uidb64}/{token}/')
+            self.assertEqual(self.links.get('activate', uidb64, token), outcome)
+
+    def test_usable_reset_link_is_not_remembered(self):
+        url = f'/Authpassword-reset-confirm/{self.uidb64}/{self.token}/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.links.remembered, 0)
+        self.client.post(url, {'new_password1': 'n3w-Passw0rd!', 'new_password2': 'n3w-Passw0rd!'})
+        self.assertEqual(self.links.get('reset', self.uidb64, self.token), CONSUMED)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertRedirects(response, '/Authforgot-password/', fetch_redirect_response=False)
+
+
+class EmailTemplateTests(SimpleTestCase):
+    def setUp(self):
+        compile_email_template.cache_clear()
+        self.addCleanup(compile_email_template.cache_clear)
+
+    def test_template_is_rendered_once(self):
+        with mock.patch('account.utils.render_to_string', wraps=render_to_string) as render:
+            render_email('activate_form.html', 'activation_url', 'https://shop.example/a/1/')
+            render_email('activate_form.html', 'activation_url', 'https://shop.example/a/2/')
+        render.assert_called_once()
+
+    def test_link_is_escaped_in_html_only(self):
+        url = 'https://shop.example/reset/?a=1&b=2'
+        html, text = render_email('password_reset_email.html', 'reset_link', url)
+        self.assertIn('a=1&amp;b=2', html)
+        self.assertNotIn(url, html)
+        self.assertIn(url, text)
+        self.assertNotIn('<', text)
+
+    def test_matches_a_direct_render(self):
+        url = 'https://shop.example/reset/MQ/token/'
+        email = build_password_reset_email('ann@example.com', url)
+        self.assertEqual(email.alternatives[0][0], render_to_string('password_reset_email.html', {'reset_link': url}))
+        self.assertEqual(email.to, ['ann@example.com'])
+
+
+class PasswordHashingPolicyTests(TestCase):
+    def iterations(self, user):
+        user.refresh_from_db()
+        algorithm, iterations, *_ = user.password.split('$')
+        self.assertEqual(algorithm, 'pbkdf2_sha256')
+        return int(iterations)
+
+    def test_hashes_follow_the_policy(self):
+        with override_settings(PASSWORD_HASHING={'PBKDF2_ITERATIONS': 1000}):
+            user = User.objects.create_user(email='ann@example.com', full_name='Ann', password='secret123')
+        self.assertEqual(self.iterations(user), 1000)
+
+    def test_successful_login_upgrades_the_hash(self):
+        with override_settings(PASSWORD_HASHING={'PBKDF2_ITERATIONS': 1000}):
+            user = User.objects.create_user(email='ann@example.com', full_name='Ann', password='secret123')
+        with override_settings(PASSWORD_HASHING={'PBKDF2_ITERATIONS': 2000}):
+            self.assertFalse(user.check_password('wrong'))
+            self.assertEqual(self.iterations(user), 1000)
+            self.assertTrue(user.check_password('secret123'))
+            self.assertEqual(self.iterations(user), 2000)
@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULTS = {
+    'BACKEND': 'locmem',           # 'locmem' (per process) or 'django' (shared, uses CACHE_ALIAS)
+    'CACHE_ALIAS': 'default',
+    'IP_CAPACITY': 20,             # failed attempts allowed in a burst from one IP
+    'IP_REFILL_PER_MINUTE': 10,
+    'EMAIL_CAPACITY': 5,           # failed attempts allowed in a burst against one account
+    'EMAIL_REFILL_PER_MINUTE': 1,
+    'MAX_KEYS': 100000,            # locmem only: least recently used buckets are dropped
+    # Where the client address comes from. Behind a reverse proxy REMOTE_ADDR is
+    # the proxy's, so every client would share one IP bucket; set this to
+    # 'HTTP_X_FORWARDED_FOR' there, and TRUSTED_PROXIES to the number of
+    # proxies that append to that header (the client is that many entries
+    # from the right; anything further left is client-supplied).
+    'CLIENT_IP_HEADER': 'REMOTE_ADDR',
+    'TRUSTED_PROXIES': 1,
+}
+
+
+class TokenBucket:
+    """
+    Per-key token buckets. Every failed login takes a token; tokens come back
+    at a steady rate, and a key with no tokens left is refused before any
+    password hashing happens.
+    """
+
+    def __init__(self, capacity, refill_per_minute, max_keys):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_minute / 60
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _level(self, tokens, updated, now):
+        return min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+
+    def allowed(self, key):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return True
+            return self._level(*bucket, time.monotonic()) >= 1
+
+    def consume(self, key):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.capacity, now))
+            self._buckets[key] = (max(0.0, self._level(tokens, updated, now) - 1), now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+class CacheTokenBucket(TokenBucket):
+    """Same buckets kept in a Django cache so all workers share them"""
+
+    def __init__(self, capacity, refill_per_minute, prefix, alias):
+        super().__init__(capacity, refill_per_minute, max_keys=None)
+        self.prefix = prefix
+        self.cache = caches[alias]
+
+    def _key(self, key):
+        return f'login-throttle:{self.prefix}:{key}'
+
+    @property
+    def timeout(self):
+        # Long enough for an empty bucket to fill up again
+        return int(self.capacity / self.refill_per_second) + 1
+
+    def allowed(self, key):
+        bucket = self.cache.get(self._key(key))
+        return bucket is None or self._level(*bucket, time.time()) >= 1
+
+    def consume(self, key):
+        now = time.time()
+        tokens, updated = self.cache.get(self._key(key), (self.capacity, now))
+        self.cache.set(self._key(key), (max(0.0, self._level(tokens, updated, now) - 1), now), self.timeout)
+
+    def reset(self, key):
+        self.cache.delete(self._key(key))
+
+
+class LoginThrottle:
+    """Throttles failed logins per client IP and per email address"""
+
+    def __init__(self, options):
+        self.ip_header = options['CLIENT_IP_HEADER']
+        self.trusted_proxies = options['TRUSTED_PROXIES']
+        if options['BACKEND'] == 'django':
+            alias = options['CACHE_ALIAS']
+            self.by_ip = CacheTokenBucket(options['IP_CAPACITY'], options['IP_REFILL_PER_MINUTE'], 'ip', alias)
+            self.by_email = CacheTokenBucket(options['EMAIL_CAPACITY'], options['EMAIL_REFILL_PER_MINUTE'], 'email', alias)
+        else:
+            self.by_ip = TokenBucket(options['IP_CAPACITY'], options['IP_REFILL_PER_MINUTE'], options['MAX_KEYS'])
+            self.by_email = TokenBucket(options['EMAIL_CAPACITY'], options['EMAIL_REFILL_PER_MINUTE'], options['MAX_KEYS'])
+
+    def client_ip(self, request):
+        addresses = [part.strip() for part in request.META.get(self.ip_header, '').split(',') if part.strip()]
+        if not addresses:
+            return request.META.get('REMOTE_ADDR', '')
+        # Too few entries means the request bypassed a proxy; take the leftmost rather than fail
+        return addresses[max(len(addresses) - self.trusted_proxies, 0)]
+
+    def allowed(self, ip, email):
+        return self.by_ip.allowed(ip) and self.by_email.allowed(email.lower())
+
+    def failed(self, ip, email):
+        self.by_ip.consume(ip)
+        self.by_email.consume(email.lower())
+
+    def succeeded(self, email):
+        self.by_email.reset(email.lower())
+
+
+_throttle = None
+_throttle_lock = threading.Lock()
+
+
+def get_login_throttle():
+    global _throttle
+    with _throttle_lock:
+        if _throttle is None:
+            _throttle = LoginThrottle({**DEFAULTS, **getattr(settings, 'LOGIN_THROTTLE', {})})
+    return _throttle
@@ -0,0 +1,131 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 10000,     # least recently hit links are dropped
+    'TIMEOUT': None,          # seconds; None uses PASSWORD_RESET_TIMEOUT, after which every token has expired
+}
+
+# What a link that was already verified once will keep answering
+CONSUMED = 'consumed'        # the account was activated / the password was reset
+INVALID = 'invalid'          # the token failed check_token
+UNKNOWN_USER = 'unknown_user'  # the uid did not decode or there is no such user
+
+# Upper bounds of the hits-per-link buckets; the last bucket is open-ended
+FANOUT_BUCKETS = (1, 2, 5, 10, 50)
+
+
+class TokenLinkCache:
+    """
+    Per-process LRU with a TTL of activation and password reset links whose
+    outcome can no longer change, so repeat hits (mail scanners, prefetchers,
+    impatient users) are answered without decoding the uid, loading the user
+    or checking the token. Links that are still usable are never memoized.
+
+    Keys are digests of the link, so tokens are not kept in memory.
+    """
+
+    def __init__(self, max_entries, timeout, enabled=True):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.enabled = enabled
+        self.lookups = 0
+        self.short_circuits = 0
+        self.remembered = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(purpose, uidb64, token):
+        return hashlib.sha1(f'{purpose}:{uidb64}:{token}'.encode()).digest()
+
+    def get(self, purpose, uidb64, token):
+        """The remembered outcome for this link, or None when it has to be verified"""
+        if not self.enabled:
+            return None
+        key = self.key(purpose, uidb64, token)
+        with self._lock:
+            self.lookups += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[key]
+                return None
+            entry[2] += 1
+            self._entries.move_to_end(key)
+            self.short_circuits += 1
+            return entry[0]
+
+    def remember(self, purpose, uidb64, token, outcome):
+        if not self.enabled:
+            return
+        key = self.key(purpose, uidb64, token)
+        with self._lock:
+            self.remembered += 1
+            # [outcome, expires at, hits on this link since it was settled]
+            self._entries[key] = [outcome, time.monotonic() + self.timeout, 1]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            hits = [entry[2] for entry in self._entries.values()]
+            outcomes = [entry[0] for entry in self._entries.values()]
+        histogram = [0] * (len(FANOUT_BUCKETS) + 1)
+        for count in hits:
+            histogram[next((i for i, bound in enumerate(FANOUT_BUCKETS) if count <= bound), -1)] += 1
+        return {
+            'lookups': self.lookups,
+            'short_circuits': self.short_circuits,
+            'remembered': self.remembered,
+            'links': len(hits),
+            'links_by_outcome': {outcome: outcomes.count(outcome) for outcome in (CONSUMED, INVALID, UNKNOWN_USER)},
+            'max_hits_per_link': max(hits, default=0),
+            'hits_per_link': {
+                **{f'<={bound}': count for bound, count in zip(FANOUT_BUCKETS, histogram)},
+                f'>{FANOUT_BUCKETS[-1]}': histogram[-1],
+            },
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self.lookups = self.short_circuits = self.remembered = 0
+            for entry in self._entries.values():
+                entry[2] = 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_token_link_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            options = {**DEFAULTS, **getattr(settings, 'TOKEN_LINK_CACHE', {})}
+            timeout = options['TIMEOUT'] or settings.PASSWORD_RESET_TIMEOUT
+            _cache = TokenLinkCache(options['MAX_ENTRIES'], timeout, options['ENABLED'])
+    return _cache
+
+
+@staff_member_required
+def token_link_stats(request):
+    """Hit fan-out of activation and reset links in this worker; ?reset=1 restarts the counts"""
+    cache = get_token_link_cache()
+    data = cache.stats()
+    if request.GET.get('reset'):
+        cache.reset_stats()
+    return JsonResponse(data)
@@ -1,4 +1,5 @@
 from django.urls import include, path
+from django.conf import settings
 from .views import *
 from django.contrib.auth.views import LogoutView
 from home.views import index 
@@ -6,7 +7,7 @@ from home.views import index
 urlpatterns = [
     path('register/', register, name='register'),
     path('activate/<uidb64>/<token>/', activate, name='activate'),
-    path('login/', login, name='login'),
+    path('login/', login_async if settings.LOGIN_ASYNC else login, name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('password-reset/', password_reset, name='password_reset'),
     path('forgot-password/', forgot_password, name='forgot_password'),
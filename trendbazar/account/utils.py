@@ -1,38 +1,72 @@
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string  
-from django.utils.html import strip_tags
+from django.utils.html import escape, strip_tags
 from django.conf import settings    
-import threading
-import os
+from django.contrib.auth.tokens import default_token_generator
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from functools import lru_cache
+from .mailer import get_dispatcher
 
-class SendMailThread(threading.Thread):
-    def __init__(self, email):
-        self.email = email
-        threading.Thread.__init__(self)
+# Stands in for the per-recipient link while a template is compiled
+URL_PLACEHOLDER = 'xEMAILURLPLACEHOLDERx'
 
-    def run(self):
-        self.email.send()
+@lru_cache(maxsize=None)
+def compile_email_template(template_name, url_variable):
+    """
+    Render `template_name` once and derive its plain-text version once.
 
-def send_activation_email(recipient_email, activation_url):
+    Returns the HTML and text split around the link, so each email is just
+    a join instead of a template render plus strip_tags.
+    """
+    html_content = render_to_string(template_name, {url_variable: URL_PLACEHOLDER})
+    text_content = strip_tags(html_content)
+    return tuple(html_content.split(URL_PLACEHOLDER)), tuple(text_content.split(URL_PLACEHOLDER))
+
+def render_email(template_name, url_variable, url):
+    """Return (html, text) for one recipient"""
+    html_parts, text_parts = compile_email_template(template_name, url_variable)
+    # The template would have autoescaped the link in the HTML part
+    return escape(url).join(html_parts), url.join(text_parts)
+
+def activation_url_for(user):
+    """Absolute activation link for `user`"""
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    token = default_token_generator.make_token(user)
+    activation_link = reverse('activate', kwargs={'uidb64': uid, 'token': token})
+    return f"{settings.SITE_URL.rstrip('/')}{activation_link}"
+
+def build_activation_email(recipient_email, activation_url):
     subject = "Activate your account on " + settings.SITE_NAME
     from_email = settings.DEFAULT_FROM_EMAIL
     to_email = [recipient_email]
 
-    html_content = render_to_string('activate_form.html', {'activation_url': activation_url})
-    text_content = strip_tags(html_content)
+    html_content, text_content = render_email('activate_form.html', 'activation_url', activation_url)
 
     email = EmailMultiAlternatives(subject, text_content, from_email, to_email)
     email.attach_alternative(html_content, "text/html")
-    SendMailThread(email).start()
+    return email
 
-def send_password_reset_email(recipient_email, reset_url):
+def send_activation_email(recipient_email, activation_url):
+    get_dispatcher().send(build_activation_email(recipient_email, activation_url))
+
+async def asend_activation_email(recipient_email, activation_url):
+    await get_dispatcher().asend(build_activation_email(recipient_email, activation_url))
+
+def build_password_reset_email(recipient_email, reset_url):
     subject = "Reset your password on " + settings.SITE_NAME
     from_email = settings.DEFAULT_FROM_EMAIL
     to_email = [recipient_email]
 
-    html_content = render_to_string('password_reset_email.html', {'reset_link': reset_url})
-    text_content = strip_tags(html_content)
+    html_content, text_content = render_email('password_reset_email.html', 'reset_link', reset_url)
 
     email = EmailMultiAlternatives(subject, text_content, from_email, to_email)
     email.attach_alternative(html_content, "text/html")
-    SendMailThread(email).start()
\ No newline at end of file
+    return email
+
+def send_password_reset_email(recipient_email, reset_url):
+    get_dispatcher().send(build_password_reset_email(recipient_email, reset_url))
+
+async def asend_password_reset_email(recipient_email, reset_url):
+    await get_dispatcher().asend(build_password_reset_email(recipient_email, reset_url))
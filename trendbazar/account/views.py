@@ -1,19 +1,21 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import redirect, render
 from django.contrib import messages
 from .forms import UserForm
-from django.conf import settings
 from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.contrib.auth.tokens import default_token_generator
 from django.urls import reverse
-from .utils import send_activation_email
+from .utils import send_activation_email, activation_url_for
 from .models import User
-from django.contrib.auth import authenticate, login as auth_login 
+from django.contrib.auth import login as auth_login, alogin as auth_alogin
+from .authentication import authenticate_login, aauthenticate_login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import PasswordChangeForm, SetPasswordForm   
 from django.contrib.auth import logout
 from .forms import passwordResetForm ,  UserForm
 from account.utils import send_password_reset_email
+from .token_cache import get_token_link_cache, CONSUMED, INVALID, UNKNOWN_USER
 
 
 
@@ -27,11 +29,7 @@ def register(request):
             user.save()
 
             # Send activation email
-            uid = urlsafe_base64_encode(force_bytes(user.pk))
-            token = default_token_generator.make_token(user)
-            activation_link = reverse('activate', kwargs={'uidb64': uid, 'token': token})
-            activation_url = f"{settings.SITE_URL.rstrip('/')}{activation_link}"
-            send_activation_email(user.email, activation_url)
+            send_activation_email(user.email, activation_url_for(user))
 
             messages.success(request, "Registration successful please check your email to activate your account.")
             return redirect('register')
@@ -42,24 +40,41 @@ def register(request):
 
     return render(request, 'register.html', {'form': form})
 
+# Also what repeat hits on an already settled link are told (account.token_cache)
+ACTIVATION_MESSAGES = {
+    CONSUMED: (messages.warning, "Account is already activated."),
+    INVALID: (messages.error, "Activation link is invalid or has expired."),
+    UNKNOWN_USER: (messages.error, "Invalid activation link."),
+}
+
+def _settled_activation(request, uidb64, token, outcome):
+    get_token_link_cache().remember('activate', uidb64, token, outcome)
+    add_message, text = ACTIVATION_MESSAGES[outcome]
+    add_message(request, text)
+    return redirect('login')
+
 def activate(request, uidb64, token):
+    # Links that were already used or rejected are answered without a user lookup
+    outcome = get_token_link_cache().get('activate', uidb64, token)
+    if outcome is not None:
+        add_message, text = ACTIVATION_MESSAGES[outcome]
+        add_message(request, text)
+        return redirect('login')
     try:
         uid = force_str(urlsafe_base64_decode(uidb64))
         user = User.objects.get(pk=uid)
         if user.is_active:
-            messages.warning(request, "Account is already activated.")
-            return redirect('login')
+            return _settled_activation(request, uidb64, token, CONSUMED)
         if default_token_generator.check_token(user, token):
             user.is_active = True
             user.save()
+            get_token_link_cache().remember('activate', uidb64, token, CONSUMED)
             messages.success(request, "Account activated successfully. You can now log in.")
             return redirect('login')
         else:
-            messages.error(request, "Activation link is invalid or has expired.")
-            return redirect('login')
+            return _settled_activation(request, uidb64, token, INVALID)
     except (TypeError, ValueError, OverflowError, User.DoesNotExist):
-        messages.error(request, "Invalid activation link.")
-        return redirect('login')
+        return _settled_activation(request, uidb64, token, UNKNOWN_USER)
 
 
 def login(request):
@@ -71,14 +86,10 @@ def login(request):
             messages.error(request, "Please provide both email and password.")
             return redirect('login')
 
-        user = authenticate(request, email=email, password=password)
+        # One user lookup; also tells inactive accounts apart and throttles failures
+        user, error = authenticate_login(request, email, password)
         if user is None:
-            # Give a specific message for inactive accounts
-            existing = User.objects.filter(email=email).first()
-            if existing and not existing.is_active:
-                messages.error(request, "Account is not activated. Please check your email.")
-            else:
-                messages.error(request, "Invalid email or password.")
+            messages.error(request, error)
             return redirect('login')
 
         auth_login(request, user)  # call Django's login
@@ -86,6 +97,27 @@ def login(request):
 
     return render(request, 'login.html')
 
+async def login_async(request):
+    """login() for ASGI workers: password hashing runs in a thread pool"""
+    if request.method == "POST":
+        email = request.POST.get('email', '').strip()
+        password = request.POST.get('password', '')
+
+        if not email or not password:
+            messages.error(request, "Please provide both email and password.")
+            return redirect('login')
+
+        user, error = await aauthenticate_login(request, email, password)
+        if user is None:
+            messages.error(request, error)
+            return redirect('login')
+
+        await auth_alogin(request, user)
+        return redirect('index')
+
+    # The header reads request.user, which is a synchronous lookup
+    return await sync_to_async(render)(request, 'login.html')
+
 @login_required
 def password_reset(request):
     if request.method == "POST":
@@ -141,6 +173,12 @@ def forgot_password(request):
 
 
 def password_reset_confirm(request, uidb64, token):
+    links = get_token_link_cache()
+    # A link that was already used or rejected cannot become valid again
+    if links.get('reset', uidb64, token) is not None:
+        messages.error(request, "The reset link is invalid or has expired.")
+        return redirect('forgot_password')
+
     try:
         uid = force_str(urlsafe_base64_decode(uidb64))
         user = User.objects.get(pk=uid)
@@ -152,6 +190,7 @@ def password_reset_confirm(request, uidb64, token):
             form = SetPasswordForm(user, request.POST)
             if form.is_valid():
                 form.save()
+                links.remember('reset', uidb64, token, CONSUMED)
                 messages.success(request, "Password has been reset. You can now log in.")
                 return redirect('login')
             else:
@@ -162,5 +201,6 @@ def password_reset_confirm(request, uidb64, token):
             form = SetPasswordForm(user)
         return render(request, 'password_reset_confirm.html', {'form': form ,'uidb64': uidb64, 'token': token})
     else:
+        links.remember('reset', uidb64, token, UNKNOWN_USER if user is None else INVALID)
         messages.error(request, "The reset link is invalid or has expired.")
         return redirect('forgot_password')
\ No newline at end of file
@@ -0,0 +1,18 @@
+from django.contrib import admin
+from .models import Cart, CartItem
+
+class CartItemInline(admin.TabularInline):
+    model = CartItem
+    raw_id_fields = ('product',)
+    extra = 0
+
+class CartAdmin(admin.ModelAdmin):
+    list_display = ('user', 'created_at', 'updated_at')
+    search_fields = ('user__email',)
+    raw_id_fields = ('user',)
+    readonly_fields = ('created_at', 'updated_at')
+    inlines = [CartItemInline]
+
+
+# Register your models here.
+admin.site.register(Cart, CartAdmin)
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class CartConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'cart'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .services import check_cache
+        check_cache()
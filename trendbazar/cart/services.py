@@ -0,0 +1,215 @@
+import secrets
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from home.models import Product
+from .models import Cart, CartItem
+
+PRODUCT_FIELDS = ('id', 'title', 'price', 'image')
+PRICES_VERSION_KEY = 'cart:prices-version'
+SESSION_KEY = '_cart_cache_id'
+MAX_QUANTITY = 99
+MAX_ITEMS_PER_REQUEST = 200
+
+
+class CartError(ValueError):
+    """Raised for a malformed cart update"""
+
+
+def _cache():
+    """The shared cache holding cart snapshots, or None when carts are read from the database"""
+    alias = getattr(settings, 'CART_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+def check_cache():
+    """Refuse a per-process cache: other workers would keep serving carts changed in this one"""
+    alias = getattr(settings, 'CART_CACHE_ALIAS', None)
+    if alias and isinstance(caches[alias], LocMemCache):
+        raise ImproperlyConfigured(
+            f"CART_CACHE_ALIAS {alias!r} is a per-process LocMemCache; "
+            "point it at a cache shared by every worker or set it to None"
+        )
+
+
+def _revision_key(user_id):
+    return f'cart:revision:{user_id}'
+
+
+def _snapshot_key(session):
+    # An id of our own: signed-cookie sessions have no stable session key
+    cache_id = session.get(SESSION_KEY)
+    if cache_id is None:
+        cache_id = session[SESSION_KEY] = secrets.token_hex(8)
+    return f'cart:session:{cache_id}'
+
+
+def _bump(key):
+    try:
+        _cache().incr(key)
+    except ValueError:
+        _cache().set(key, 1, None)
+
+
+def invalidate_prices():
+    if _cache() is not None:
+        _bump(PRICES_VERSION_KEY)
+
+
+def cart_changed(user):
+    """Make every session's snapshot of this user's cart stale"""
+    if _cache() is not None:
+        _bump(_revision_key(user.pk))
+
+
+def serialize(lines):
+    """JSON-ready cart from [(product, quantity), ...]"""
+    items = []
+    total = Decimal('0')
+    for product, quantity in lines:
+        items.append({
+            'id': product.pk,
+            'name': product.title,
+            'price': float(product.price),
+            'image': product.image.url if product.image else '',
+            'quantity': quantity,
+        })
+        total += product.price * quantity
+    return {
+        'items': items,
+        'count': sum(item['quantity'] for item in items),
+        'total': float(total),
+    }
+
+
+def load_cart(user):
+    """The user's cart from the database"""
+    items = (
+        CartItem.objects.filter(cart__user=user)
+        .select_related('product')
+        .only('quantity', 'product_id', *(f'product__{field}' for field in PRODUCT_FIELDS))
+        .order_by('id')
+    )
+    return serialize((item.product, item.quantity) for item in items)
+
+
+def get_cart(user, session=None):
+    """
+    The user's cart. With CART_CACHE_ALIAS set, each session keeps a
+    snapshot tagged with the prices version and the user's cart revision;
+    all three come back in one cache round trip, and a snapshot is only
+    used while neither version has moved.
+    """
+    cache = _cache()
+    if cache is None or session is None:
+        return load_cart(user)
+    key, revision_key = _snapshot_key(session), _revision_key(user.pk)
+    found = cache.get_many([key, PRICES_VERSION_KEY, revision_key])
+    # Read before loading, so a change made meanwhile leaves this snapshot stale
+    versions = (found.get(PRICES_VERSION_KEY, 0), found.get(revision_key, 0))
+    snapshot = found.get(key)
+    if snapshot is not None and snapshot[0] == versions:
+        return snapshot[1]
+    data = load_cart(user)
+    cache.set(key, (versions, data), getattr(settings, 'CART_CACHE_TIMEOUT', 3600))
+    return data
+
+
+def parse_changes(items):
+    """{product_id: quantity} from [{"id"|"product_id": .., "quantity": ..}, ...]"""
+    if not isinstance(items, list):
+        raise CartError("'items' must be a list")
+    if len(items) > MAX_ITEMS_PER_REQUEST:
+        raise CartError(f"At most {MAX_ITEMS_PER_REQUEST} items per request")
+    # Ids the database column can hold; anything else overflows in the query
+    min_id, max_id = connection.ops.integer_field_range(Product._meta.pk.get_internal_type())
+    changes = {}
+    for entry in items:
+        try:
+            product_id = int(entry.get('product_id', entry.get('id')))
+            quantity = int(entry.get('quantity', 1))
+        except (AttributeError, TypeError, ValueError):
+            raise CartError(f"Invalid cart item: {entry!r}")
+        if not min_id <= product_id <= max_id:
+            raise CartError(f"Invalid product id: {product_id}")
+        changes[product_id] = changes.get(product_id, 0) + quantity
+    return changes
+
+
+def _user_cart(user):
+    """The user's cart, created on first use; safe against a concurrent first sync"""
+    try:
+        return Cart.objects.get(user=user)
+    except Cart.DoesNotExist:
+        pass
+    try:
+        with transaction.atomic():
+            return Cart.objects.create(user=user)
+    except IntegrityError:
+        # Another request created it first. Fetched outside any transaction
+        # of ours, so the row it committed is visible at every isolation level.
+        return Cart.objects.get(user=user)
+
+
+def apply_changes(user, changes, mode='set'):
+    """
+    Apply many quantity changes in one go.
+
+    `mode='set'` replaces quantities (0 removes the item); `mode='add'`
+    adds to what is already in the cart. Prices for every product in the
+    cart come from a single id__in query; unknown products are ignored.
+    """
+    if mode not in ('set', 'add'):
+        raise CartError("'mode' must be 'set' or 'add'")
+
+    cart = _user_cart(user)
+    with transaction.atomic():
+        existing = {item.product_id: item for item in cart.items.order_by('id')}
+        products = Product.objects.only(*PRODUCT_FIELDS).in_bulk(set(existing) | set(changes))
+
+        to_create, to_update, to_delete = [], [], []
+        for product_id, quantity in changes.items():
+            if product_id not in products:
+                continue
+            item = existing.get(product_id)
+            if mode == 'add' and item is not None:
+                quantity += item.quantity
+            quantity = min(quantity, MAX_QUANTITY)
+
+            if quantity <= 0:
+                if item is not None:
+                    to_delete.append(item.pk)
+                    del existing[product_id]
+            elif item is None:
+                existing[product_id] = CartItem(cart=cart, product_id=product_id, quantity=quantity)
+                to_create.append(existing[product_id])
+            elif item.quantity != quantity:
+                item.quantity = quantity
+                to_update.append(item)
+
+        if to_delete:
+            CartItem.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            CartItem.objects.bulk_update(to_update, ['quantity'])
+        if to_create:
+            CartItem.objects.bulk_create(to_create)
+        if to_create or to_update or to_delete:
+            Cart.objects.filter(pk=cart.pk).update(updated_at=timezone.now())
+
+    cart_changed(user)
+    return serialize(
+        (products[product_id], item.quantity)
+        for product_id, item in existing.items() if product_id in products
+    )
+
+
+def clear_cart(user):
+    CartItem.objects.filter(cart__user=user).delete()
+    cart_changed(user)
+    return serialize([])
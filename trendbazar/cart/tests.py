@@ -0,0 +1,140 @@
+import json
+
+from django.core.exceptions import ImproperlyConfigured
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from account.models import User
+from home.models import Product
+from .models import Cart, CartItem
+from .services import CartError, apply_changes, check_cache, parse_changes
+
+SHARED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cart_test_cache'},
+}
+
+
+class CartTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='buyer@example.com', full_name='Buyer', password='pw', is_active=True)
+        cls.phone = Product.objects.create(title='Phone', description='A phone', price='10.00')
+        cls.cable = Product.objects.create(title='Cable', description='A cable', price='2.50')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def post(self, url, body):
+        return self.client.post(url, json.dumps(body), content_type='application/json')
+
+
+class ParseChangesTests(TestCase):
+    def test_sums_repeated_products(self):
+        changes = parse_changes([{'id': 1, 'quantity': 2}, {'product_id': '1'}, {'id': 2, 'quantity': 3}])
+        self.assertEqual(changes, {1: 3, 2: 3})
+
+    def test_rejects_malformed_items(self):
+        for items in ({'id': 1}, [{'id': 'x'}], ['1'], [{}] * 201, [{'id': 2 ** 64}]):
+            with self.assertRaises(CartError):
+                parse_changes(items)
+
+
+class CartApiTests(CartTestCase):
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/cart/api/').status_code, 401)
+
+    def test_batch_set_and_remove(self):
+        data = self.post('/cart/api/', {'items': [
+            {'id': self.phone.pk, 'quantity': 2},
+            {'id': self.cable.pk, 'quantity': 4},
+            {'id': 9999, 'quantity': 1},
+        ]}).json()
+        self.assertEqual(data['count'], 6)
+        self.assertEqual(data['total'], 30.0)
+
+        data = self.post('/cart/api/', {'items': [{'id': self.cable.pk, 'quantity': 0}]}).json()
+        self.assertEqual([item['id'] for item in data['items']], [self.phone.pk])
+        self.assertEqual(self.client.get('/cart/api/').json(), data)
+
+    def test_batch_prices_every_product_in_one_query(self):
+        apply_changes(self.user, {self.phone.pk: 1})
+        with self.assertNumQueries(8):
+            # cart, savepoint, items, products, update, insert, touch cart, release
+            apply_changes(self.user, {self.phone.pk: 3, self.cable.pk: 1})
+
+    def test_cart_created_concurrently_is_reused(self):
+        cart = Cart.objects.create(user=self.user)
+        # The first lookup misses: another request creates the cart before this one's insert
+        with mock.patch.object(Cart.objects, 'get', side_effect=[Cart.DoesNotExist, cart]):
+            apply_changes(self.user, {self.phone.pk: 1})
+        self.assertEqual(list(cart.items.values_list('product_id', flat=True)), [self.phone.pk])
+
+    def test_out_of_range_id_is_a_bad_request(self):
+        response = self.post('/cart/api/', {'items': [{'id': 10 ** 20, 'quantity': 1}]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_quantities_are_capped(self):
+        data = self.post('/cart/api/', {'items': [{'id': self.phone.pk, 'quantity': 500}]}).json()
+        self.assertEqual(data['count'], 99)
+
+    def test_merge_adds_to_server_cart(self):
+        self.post('/cart/api/', {'items': [{'id': self.phone.pk, 'quantity': 1}]})
+        data = self.post('/cart/api/merge/', {'items': [
+            {'id': str(self.phone.pk), 'quantity': 2},
+            {'id': str(self.cable.pk), 'quantity': 1},
+        ]}).json()
+        self.assertEqual({item['id']: item['quantity'] for item in data['items']}, {self.phone.pk: 3, self.cable.pk: 1})
+
+    def test_invalid_body(self):
+        response = self.client.post('/cart/api/', 'not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post('/cart/api/', {'mode': 'swap', 'items': []}).status_code, 400)
+
+    def test_delete_empties_cart(self):
+        self.post('/cart/api/', {'items': [{'id': self.phone.pk, 'quantity': 1}]})
+        self.assertEqual(self.client.delete('/cart/api/').json()['count'], 0)
+        self.assertFalse(CartItem.objects.exists())
+
+
+@override_settings(CACHES=SHARED_CACHES, CART_CACHE_ALIAS='shared')
+class CartCacheTests(CartTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Before setUpTestData, whose product saves already bump the prices version
+        with override_settings(CACHES=SHARED_CACHES):
+            call_command('createcachetable', verbosity=0)
+        super().setUpClass()
+
+    def test_reads_are_served_from_the_session_snapshot(self):
+        self.post('/cart/api/', {'items': [{'id': self.phone.pk, 'quantity': 1}]})
+        self.client.get('/cart/api/')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/cart/api/').json()['count'], 1)
+        self.assertFalse([query for query in queries if 'cart_cartitem' in query['sql']])
+
+    def test_change_in_another_session_is_seen(self):
+        self.post('/cart/api/', {'items': [{'id': self.phone.pk, 'quantity': 1}]})
+        self.client.get('/cart/api/')
+        other = self.client_class()
+        other.force_login(self.user)
+        other.post('/cart/api/', json.dumps({'items': [{'id': self.phone.pk, 'quantity': 4}]}),
+                   content_type='application/json')
+        self.assertEqual(self.client.get('/cart/api/').json()['count'], 4)
+
+    def test_price_change_is_seen(self):
+        self.post('/cart/api/', {'items': [{'id': self.phone.pk, 'quantity': 2}]})
+        self.client.get('/cart/api/')
+        self.phone.price = '1.00'
+        self.phone.save()
+        self.assertEqual(self.client.get('/cart/api/').json()['total'], 2.0)
+
+    def test_per_process_cache_is_refused(self):
+        with override_settings(CART_CACHE_ALIAS='default'):
+            with self.assertRaises(ImproperlyConfigured):
+                check_cache()
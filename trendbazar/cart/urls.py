@@ -0,0 +1,6 @@
+from django.urls import path
+from cart import views
+urlpatterns = [
+    path("api/", views.cart_api, name='cart_api'),
+    path("api/merge/", views.cart_merge, name='cart_merge'),
+]
@@ -0,0 +1,59 @@
+import json
+from functools import wraps
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import require_http_methods, require_POST
+
+from .services import CartError, apply_changes, clear_cart, get_cart, parse_changes
+
+
+def _json_body(request):
+    try:
+        body = json.loads(request.body or b'{}')
+    except json.JSONDecodeError:
+        raise CartError("Request body must be JSON")
+    if not isinstance(body, dict):
+        raise CartError("Request body must be a JSON object")
+    return body
+
+
+def _login_required_json(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@ensure_csrf_cookie
+@require_http_methods(['GET', 'POST', 'DELETE'])
+@_login_required_json
+def cart_api(request):
+    """
+    GET returns the cart. POST applies a batch of changes:
+    {"mode": "set" | "add", "items": [{"id": 1, "quantity": 2}, ...]}.
+    DELETE empties the cart.
+    """
+    try:
+        if request.method == 'GET':
+            return JsonResponse(get_cart(request.user, request.session))
+        if request.method == 'DELETE':
+            return JsonResponse(clear_cart(request.user))
+        body = _json_body(request)
+        changes = parse_changes(body.get('items', []))
+        return JsonResponse(apply_changes(request.user, changes, body.get('mode', 'set')))
+    except CartError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@require_POST
+@_login_required_json
+def cart_merge(request):
+    """Upload the browser's localStorage cart after login, adding to the server cart"""
+    try:
+        changes = parse_changes(_json_body(request).get('items', []))
+        return JsonResponse(apply_changes(request.user, changes, mode='add'))
+    except CartError as e:
+        return JsonResponse({'error': str(e)}, status=400)
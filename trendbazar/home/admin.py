@@ -1,17 +1,67 @@
 from django.contrib import admin
-from .models import Report, Product 
+from trendbazar.admin_utils import LargeTableAdmin
+from .models import Report, Product, REPORT_SUBJECTS
+from .search import get_search_backend
 
-class ReportAdmin(admin.ModelAdmin):
+class PriceRangeFilter(admin.SimpleListFilter):
+    """Fixed price bands queried as ranges on the price index, instead of one choice per distinct price"""
+    title = 'price'
+    parameter_name = 'price_range'
+    ranges = {
+        'under-25': (None, 25),
+        '25-100': (25, 100),
+        '100-500': (100, 500),
+        '500-plus': (500, None),
+    }
+
+    def lookups(self, request, model_admin):
+        return [(key, key.replace('-', ' ').replace('plus', 'and up')) for key in self.ranges]
+
+    def queryset(self, request, queryset):
+        if self.value() not in self.ranges:
+            return queryset
+        low, high = self.ranges[self.value()]
+        if low is not None:
+            queryset = queryset.filter(price__gte=low)
+        if high is not None:
+            queryset = queryset.filter(price__lt=high)
+        return queryset
+
+class SubjectFilter(admin.SimpleListFilter):
+    """The contact form's subjects, so listing them needs no DISTINCT over the table"""
+    title = 'subject'
+    parameter_name = 'subject'
+
+    def lookups(self, request, model_admin):
+        return REPORT_SUBJECTS
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(subject=self.value())
+        return queryset
+
+class ReportAdmin(LargeTableAdmin):
     list_display = ('name', 'email', 'phone', 'address', 'subject', 'created_at')
-    list_filter = ('subject', 'created_at')
-    search_fields = ('name', 'email', 'subject', 'address')
+    list_filter = (SubjectFilter, 'created_at')
+    # Prefix search over the Lower(email)/Lower(name) indexes
+    search_fields = prefix_search_fields = ('email', 'name')
+    search_help_text = "Start of the email address or name"
     readonly_fields = ('created_at',)
+    # Follows the created_at index, so the date filter's range needs no sort
+    ordering = ('-created_at', '-id')
 
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdmin):
     list_display = ('id', 'title', 'price', 'created_at')
     search_fields = ('title', 'description')
-    list_filter = ('price', 'created_at')
+    list_filter = (PriceRangeFilter, 'created_at')
     readonly_fields = ('created_at',)
+    ordering = ('-created_at', '-id')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Full-text index instead of LIKE over title and description
+        if not search_term.strip():
+            return queryset, False
+        return get_search_backend().filter(queryset, search_term), False
 
 
 # Register your models here.
@@ -0,0 +1,332 @@
+"""
+Helpers shared by the benchmark management commands.
+
+Benchmarks run against a throwaway test database seeded with a synthetic
+catalog, never against the development database.
+"""
+import asyncio
+import json
+import math
+import random
+import statistics
+import subprocess
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from decimal import Decimal
+from http import HTTPStatus
+from socketserver import ThreadingMixIn
+from urllib.parse import unquote
+from urllib.request import Request, urlopen
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+from .models import Product, Report
+
+WORDS = (
+    'smart phone watch wireless earbuds tablet laptop charger cable console '
+    'camera speaker keyboard mouse monitor router drone headset fitness band '
+    'portable fast ultra slim pro max mini classic premium gaming travel home '
+    'black white silver blue red steel leather glass bamboo cotton'
+).split()
+
+BENCH_PASSWORD = 'Bench#pass1'
+
+
+@contextmanager
+def bench_database(keepdb=False, test_name=None):
+    """
+    Create the test database, run the block against it and drop it afterwards.
+
+    `test_name` puts a SQLite test database in that file instead of memory,
+    which journal modes and cross-thread locking need.
+    """
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    if test_name is not None:
+        connection.settings_dict['TEST']['NAME'] = str(test_name)
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def synthetic_text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed_catalog(products, users=0, batch_size=5000, seed=42, reports=0):
+    """Insert `products` synthetic products, `users` active users and `reports` contact reports in bulk"""
+    rng = random.Random(seed)
+    for start in range(0, products, batch_size):
+        Product.objects.bulk_create([
+            Product(
+                title=synthetic_text(rng, 3).title(),
+                description=synthetic_text(rng, 25),
+                price=Decimal(rng.randint(100, 100000)) / 100,
+                image='',
+            )
+            for _ in range(start, min(start + batch_size, products))
+        ])
+
+    User = get_user_model()
+    # One hash for everybody; hashing per user would dominate seeding time
+    password = make_password(BENCH_PASSWORD)
+    for start in range(0, users, batch_size):
+        User.objects.bulk_create([
+            User(email=f'bench{i}@example.com', full_name=f'Bench User {i}', password=password, is_active=True)
+            for i in range(start, min(start + batch_size, users))
+        ])
+
+    subjects = ('general', 'order', 'shipping', 'returns', 'warranty')
+    for start in range(0, reports, batch_size):
+        Report.objects.bulk_create([
+            Report(
+                name=f'Bench Reporter {i}', email=f'reporter{i}@example.com', phone='+1 555 123 4567',
+                subject=rng.choice(subjects), message=synthetic_text(rng, 30), address='1 Bench Street',
+            )
+            for i in range(start, min(start + batch_size, reports))
+        ])
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarize(latencies_ms):
+    return {
+        'requests': len(latencies_ms),
+        'mean_ms': round(statistics.fmean(latencies_ms), 3) if latencies_ms else None,
+        'p50_ms': round(percentile(latencies_ms, 50), 3) if latencies_ms else None,
+        'p95_ms': round(percentile(latencies_ms, 95), 3) if latencies_ms else None,
+        'p99_ms': round(percentile(latencies_ms, 99), 3) if latencies_ms else None,
+    }
+
+
+def measure_calls(call, requests, memory_samples=5):
+    """
+    Latency percentiles, queries per call and peak traced memory of `call()`.
+
+    Memory is traced in a separate, shorter pass because tracemalloc slows
+    every allocation down and would distort the latencies.
+    """
+    call()  # warm-up: template loading, URL resolver, first connection
+    latencies = []
+    queries = []
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            call()
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(len(ctx.captured_queries))
+
+    tracemalloc.start()
+    peak = 0
+    for _ in range(memory_samples):
+        tracemalloc.reset_peak()
+        call()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    result = summarize(latencies)
+    result['queries_per_request'] = round(statistics.fmean(queries), 2)
+    result['peak_memory_kb'] = round(peak / 1024, 1)
+    return result
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    # The default of 5 drops connections at benchmark concurrency
+    request_queue_size = 128
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def local_server(application):
+    """Serve `application` on an ephemeral localhost port in a background thread"""
+    server = make_server('127.0.0.1', 0, application, server_class=_ThreadingWSGIServer, handler_class=_QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+        # Connections opened by handler threads
+        connections.close_all()
+
+
+async def _serve_asgi(application, reader, writer):
+    """One HTTP/1.0 request on `reader`/`writer`, answered by `application`"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        writer.close()
+        return
+    request_line, *lines = head.decode('latin-1').split('\r\n')[:-2]
+    method, target, _ = request_line.split(' ', 2)
+    path, _, query = target.partition('?')
+    headers = []
+    for line in lines:
+        name, _, value = line.partition(':')
+        headers.append((name.strip().lower().encode('latin-1'), value.strip().encode('latin-1')))
+    length = int(dict(headers).get(b'content-length', 0))
+    body = await reader.readexactly(length) if length else b''
+
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.0',
+        'method': method,
+        'scheme': 'http',
+        'path': unquote(path),
+        'raw_path': path.encode('latin-1'),
+        'query_string': query.encode('latin-1'),
+        'root_path': '',
+        'headers': headers,
+        'client': writer.get_extra_info('peername')[:2],
+        'server': writer.get_extra_info('sockname')[:2],
+    }
+    finished = asyncio.Event()
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        # Django watches for a disconnect while the view runs; only report one afterwards
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status = message['status']
+            out = [f'HTTP/1.0 {status} {HTTPStatus(status).phrase}\r\n'.encode('latin-1')]
+            out += [name + b': ' + value + b'\r\n' for name, value in message.get('headers', [])]
+            writer.write(b''.join(out) + b'\r\n')
+        elif message['type'] == 'http.response.body':
+            writer.write(message.get('body', b''))
+            if not message.get('more_body'):
+                finished.set()
+
+    try:
+        await application(scope, receive, send)
+        await writer.drain()
+    finally:
+        finished.set()
+        writer.close()
+
+
+@contextmanager
+def local_asgi_server(application):
+    """
+    Serve an ASGI `application` on an ephemeral localhost port from an event
+    loop in a background thread. Like local_server, one request per
+    connection, so both protocols are measured with the same client.
+    """
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    servers = []
+    handlers = set()
+
+    async def handle(reader, writer):
+        handlers.add(asyncio.current_task())
+        try:
+            await _serve_asgi(application, reader, writer)
+        finally:
+            handlers.discard(asyncio.current_task())
+
+    async def shutdown():
+        servers[0].close()
+        # Django finishes up (request_finished, closing the response) after the last byte is sent
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    def run():
+        asyncio.set_event_loop(loop)
+        servers.append(loop.run_until_complete(asyncio.start_server(handle, '127.0.0.1', 0, backlog=128)))
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait()
+    try:
+        yield f"http://127.0.0.1:{servers[0].sockets[0].getsockname()[1]}"
+    finally:
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+        connections.close_all()
+
+
+def http_load(url, requests, concurrency, headers=None):
+    """Fire `requests` GETs at `url` from `concurrency` threads; returns latency summary and throughput"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+
+    def worker():
+        nonlocal errors
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            started = time.perf_counter()
+            try:
+                with urlopen(Request(url, headers=headers or {}), timeout=30) as response:
+                    response.read()
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies.append(elapsed)
+            except OSError:
+                with lock:
+                    errors += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    result = summarize(latencies)
+    result['errors'] = errors
+    result['concurrency'] = concurrency
+    result['throughput_rps'] = round(len(latencies) / wall, 1) if wall else None
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, results):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, default=str)
@@ -0,0 +1,143 @@
+import logging
+import posixpath
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+
+from .models import Product
+from .search_cache import get_result_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTHS = (320, 640, 960)
+
+DERIVATIVE_RE = re.compile(r'-(\d+)w\.webp$')
+
+
+def get_widths():
+    return tuple(sorted(getattr(settings, 'PRODUCT_IMAGE_WIDTHS', DEFAULT_WIDTHS)))
+
+
+def derivative_name(name, width):
+    """products/images/ps5.jpg -> products/images/ps5-640w.webp"""
+    stem, _ = posixpath.splitext(name)
+    return f"{stem}-{width}w.webp"
+
+
+def parse_variants(variants):
+    """[(width, storage name), ...] from the value stored in Product.image_variants"""
+    result = []
+    for name in filter(None, variants.split(',')):
+        match = DERIVATIVE_RE.search(name)
+        if match:
+            result.append((int(match.group(1)), name))
+    return result
+
+
+def is_current(product):
+    """Whether the stored derivatives belong to the product's current image"""
+    # Images narrower than every width store their own name: nothing to build
+    if product.image_variants == product.image.name:
+        return True
+    variants = parse_variants(product.image_variants)
+    return bool(variants) and all(
+        name == derivative_name(product.image.name, width) for width, name in variants
+    )
+
+
+def build_srcset(variants):
+    return ', '.join(f"{default_storage.url(name)} {width}w" for width, name in parse_variants(variants))
+
+
+def render_derivatives(name, widths=None):
+    """Write WebP copies of `name` next to it; returns the stored names, smallest first"""
+    from PIL import Image
+
+    with default_storage.open(name, 'rb') as source:
+        original = Image.open(source)
+        original.load()
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+
+    stored = []
+    for width in widths or get_widths():
+        # Never upscale; the original is already the best source for wider screens
+        if width >= original.width:
+            break
+        height = round(original.height * width / original.width)
+        resized = original.resize((width, height), Image.Resampling.LANCZOS)
+
+        buffer = BytesIO()
+        resized.save(buffer, 'WEBP', quality=getattr(settings, 'PRODUCT_IMAGE_QUALITY', 80), method=4)
+
+        target = derivative_name(name, width)
+        if default_storage.exists(target):
+            default_storage.delete(target)
+        stored.append(default_storage.save(target, ContentFile(buffer.getvalue())))
+    return stored
+
+
+def delete_derivatives(names):
+    """Remove derivative files that no longer belong to any image"""
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError:
+            logger.warning("Could not delete image derivative %s", name, exc_info=True)
+
+
+def generate_derivatives(product_id):
+    """Build the derivatives of one product and record them on the row"""
+    try:
+        product = Product.objects.only('id', 'image', 'image_variants', 'title', 'description').get(pk=product_id)
+        if not product.image:
+            return
+        previous = product.image_variants
+        stored = render_derivatives(product.image.name)
+        variants = ','.join(stored) or product.image.name
+        # Skip the write if the image was replaced while we were working
+        updated = Product.objects.filter(pk=product_id, image=product.image.name).update(image_variants=variants)
+        if updated:
+            # .update() sends no signals, so drop cached card rows by hand
+            product.image_variants = variants
+            get_result_cache().product_changed(product)
+            delete_derivatives(name for _, name in parse_variants(previous) if name not in stored)
+    except Exception:
+        logger.exception("Could not build image derivatives for product %s", product_id)
+
+
+def generate_derivatives_task(product_id):
+    """generate_derivatives() for use on a worker thread"""
+    try:
+        generate_derivatives(product_id)
+    finally:
+        # Each worker thread holds its own database connection
+        connection.close()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PRODUCT_IMAGE_WORKERS', 2),
+                thread_name_prefix='product-images',
+            )
+    return _executor
+
+
+def schedule_derivatives(product_id):
+    """Queue derivative generation so the admin save request does not wait for it"""
+    if getattr(settings, 'PRODUCT_IMAGE_ASYNC', True):
+        return get_executor().submit(generate_derivatives_task, product_id)
+    generate_derivatives(product_id)
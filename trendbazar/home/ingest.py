@@ -0,0 +1,261 @@
+"""
+Batched ingestion of contact form submissions.
+
+report() used to save every submission in its own write transaction. Here a
+submission is appended to a per-process spool file and queued in memory; a
+background thread writes the queue with one bulk_create when it reaches
+BATCH_SIZE or every FLUSH_INTERVAL seconds. Spool files left behind by a
+process that died are replayed on the next start, so accepted submissions
+survive restarts (at least once: a crash between the insert and the spool
+cleanup replays that batch). Submissions matching a recent one after
+normalization are dropped.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+
+from trendbazar.validation import REPORT_RECORD
+
+from .models import Report
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 2.0,      # seconds between flushes of a partial batch
+    'SPOOL_DIR': None,          # None uses BASE_DIR / 'report_spool'
+    'FSYNC': True,              # fsync every spooled submission before accepting it
+    'DEDUP_WINDOW': 3600,       # seconds a submission's fingerprint is remembered
+    'DEDUP_MAX_KEYS': 100000,
+    'SYNC': False,              # write each submission in the calling thread (tests)
+}
+
+REPORT_FIELDS = ('name', 'email', 'phone', 'subject', 'message', 'address')
+
+_NON_WORD = re.compile(r'\W+')
+_SPOOL_NAME = re.compile(r'^reports-(\d+)(?:-\d+)?\.(spool|segment)$')
+
+
+def fingerprint(fields):
+    """Same sender, subject and message text, ignoring case, whitespace and punctuation"""
+    message = _NON_WORD.sub(' ', fields['message'].lower()).strip()
+    key = '\0'.join((fields['email'].strip().lower(), fields['subject'], message))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def read_spool(path):
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A torn last line from a crash mid-write; it was never acknowledged
+                logger.warning("Skipping unreadable line in %s", path)
+    return records
+
+
+def write_reports(records):
+    Report.objects.bulk_create([Report(**{k: r[k] for k in REPORT_FIELDS}) for r in records])
+
+
+class ReportIngestor:
+    def __init__(self, options):
+        self.options = options
+        self.spool_dir = Path(options['SPOOL_DIR'] or Path(settings.BASE_DIR) / 'report_spool')
+        self.accepted = 0
+        self.duplicates = 0
+        self.written = 0
+        self._pending = []
+        self._segments = []          # (path, records) waiting to be written
+        self._seen = OrderedDict()   # fingerprint -> time first seen
+        self._spool = None
+        # Segment numbers start from the clock so they never collide with a
+        # dead process's files when the pid is reused
+        self._sequence = time.time_ns()
+        self._thread = None
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def submit(self, fields):
+        """Accept one submission; returns False when it duplicates a recent one"""
+        record = {k: fields[k] for k in REPORT_FIELDS}
+        key = fingerprint(record)
+        with self._lock:
+            if self._is_duplicate(key):
+                self.duplicates += 1
+                return False
+            try:
+                if self.options['SYNC']:
+                    write_reports([record])
+                    self.written += 1
+                else:
+                    self._ensure_started()
+                    self._append(record)
+            except Exception:
+                # Not accepted, so a retry must not be dropped as a duplicate
+                del self._seen[key]
+                raise
+            self.accepted += 1
+            if self.options['SYNC']:
+                return True
+            if len(self._pending) >= self.options['BATCH_SIZE']:
+                self._wakeup.set()
+        return True
+
+    def _is_duplicate(self, key):
+        now = time.monotonic()
+        window = self.options['DEDUP_WINDOW']
+        while self._seen:
+            oldest, seen_at = next(iter(self._seen.items()))
+            if now - seen_at < window and len(self._seen) < self.options['DEDUP_MAX_KEYS']:
+                break
+            del self._seen[oldest]
+        if key in self._seen:
+            return True
+        self._seen[key] = now
+        return False
+
+    def _spool_path(self):
+        return self.spool_dir / f'reports-{os.getpid()}.spool'
+
+    def _segment_path(self):
+        self._sequence += 1
+        return self.spool_dir / f'reports-{os.getpid()}-{self._sequence}.segment'
+
+    def _append(self, record):
+        if self._spool is None:
+            self._spool = open(self._spool_path(), 'a', encoding='utf-8')
+        self._spool.write(json.dumps(record) + '\n')
+        self._spool.flush()
+        if self.options['FSYNC']:
+            os.fsync(self._spool.fileno())
+        self._pending.append(record)
+
+    def _rotate(self):
+        """Move the pending submissions and their spool file aside as one segment"""
+        if not self._pending:
+            return
+        self._spool.close()
+        self._spool = None
+        segment = self._segment_path()
+        os.replace(self._spool_path(), segment)
+        self._segments.append((segment, self._pending))
+        self._pending = []
+
+    def flush(self):
+        """Write everything accepted so far; returns the number of reports written"""
+        with self._flush_lock:
+            with self._lock:
+                self._rotate()
+                segments, self._segments = self._segments, []
+            written = 0
+            for index, (path, records) in enumerate(segments):
+                try:
+                    write_reports(records)
+                except Exception:
+                    logger.exception("Could not write %d reports; will retry", len(records))
+                    with self._lock:
+                        self._segments[:0] = segments[index:]
+                    break
+                path.unlink(missing_ok=True)
+                written += len(records)
+            self.written += written
+            return written
+
+    def recover(self):
+        """Queue spool files left behind by processes that are no longer running"""
+        recovered = 0
+        for path in sorted(self.spool_dir.glob('reports-*')):
+            match = _SPOOL_NAME.match(path.name)
+            if not match:
+                continue
+            pid = int(match.group(1))
+            if pid != os.getpid() and _pid_alive(pid):
+                continue
+            with self._lock:
+                segment = self._segment_path()
+            try:
+                # Claim it under our own name first: another live process may be
+                # recovering the same file, and only one rename can succeed
+                os.replace(path, segment)
+            except FileNotFoundError:
+                continue
+            records, rejected = REPORT_RECORD.split(read_spool(segment))
+            for _, record, errors in rejected:
+                logger.warning("Dropping spooled report from %s: %s", record.get('email'), ' '.join(errors))
+            with self._lock:
+                self._segments.append((segment, records))
+            recovered += len(records)
+        if recovered:
+            logger.info("Recovered %d spooled reports", recovered)
+        return recovered
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.recover()
+        self._thread = threading.Thread(target=self._run, name='report-ingest', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.options['FLUSH_INTERVAL'])
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Report flush failed")
+            finally:
+                connection.close()
+
+
+_ingestor = None
+_ingestor_lock = threading.Lock()
+
+
+def get_report_ingestor():
+    global _ingestor
+    with _ingestor_lock:
+        if _ingestor is None:
+            _ingestor = ReportIngestor({**DEFAULTS, **getattr(settings, 'REPORT_INGEST', {})})
+            atexit.register(_ingestor.flush)
+    return _ingestor
+
+
+def ingest_report(fields):
+    """Store a validated submission, batched unless REPORT_INGEST['ENABLED'] is off"""
+    ingestor = get_report_ingestor()
+    if not ingestor.options['ENABLED']:
+        write_reports([fields])
+        return True
+    return ingestor.submit(fields)
+
+
+async def aingest_report(fields):
+    """ingest_report() for async views; the spool fsync or database write runs in a thread"""
+    return await sync_to_async(ingest_report)(fields)
@@ -0,0 +1,111 @@
+import logging
+import random
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Times are in milliseconds; render_ms is None when the response is streamed
+SearchEvent = namedtuple('SearchEvent', ['query', 'result_count', 'db_ms', 'render_ms'])
+
+
+class DBTimer:
+    """Adds up the time spent inside database calls while installed"""
+
+    def __init__(self):
+        self.elapsed = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.elapsed += time.perf_counter() - started
+
+    @property
+    def ms(self):
+        return self.elapsed * 1000
+
+
+@contextmanager
+def timed_db():
+    """Time the queries made in this thread, on every alias (the replica included)"""
+    timer = DBTimer()
+    with ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(timer))
+        yield timer
+
+
+def _render_label(event):
+    return 'stream' if event.render_ms is None else f"{event.render_ms:.1f}ms"
+
+
+def log_search(event):
+    """Default hook: a DEBUG line per search, formatted only when DEBUG is enabled"""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "search q=%r results=%d db=%.1fms render=%s",
+            event.query, event.result_count, event.db_ms,
+            _render_label(event),
+        )
+
+
+class SlowSearchSampler:
+    """Keeps a sample of slow searches so the expensive ones can be inspected"""
+
+    def __init__(self, threshold_ms, sample_rate, keep):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.recent = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        total = event.db_ms + (event.render_ms or 0)
+        if total < self.threshold_ms or random.random() >= self.sample_rate:
+            return
+        with self._lock:
+            self.recent.append(event)
+        logger.warning(
+            "slow search q=%r results=%d db=%.1fms render=%s",
+            event.query, event.result_count, event.db_ms, _render_label(event),
+        )
+
+
+slow_searches = SlowSearchSampler(
+    threshold_ms=getattr(settings, 'SEARCH_SLOW_THRESHOLD_MS', 200),
+    sample_rate=getattr(settings, 'SEARCH_SLOW_SAMPLE_RATE', 0.1),
+    keep=getattr(settings, 'SEARCH_SLOW_KEEP', 100),
+)
+
+_hooks = None
+
+
+def get_search_hooks():
+    global _hooks
+    if _hooks is None:
+        paths = getattr(settings, 'SEARCH_INSTRUMENTATION_HOOKS', [
+            'home.instrumentation.log_search',
+            'home.instrumentation.slow_searches',
+        ])
+        _hooks = [import_string(path) for path in paths]
+    return _hooks
+
+
+def record_search(query, result_count, db_ms, render_ms):
+    hooks = get_search_hooks()
+    if not hooks:
+        return
+    event = SearchEvent(query, result_count, db_ms, render_ms)
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception:
+            # Instrumentation must never break a search
+            logger.exception("search instrumentation hook %r failed", hook)
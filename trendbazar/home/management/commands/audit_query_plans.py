@@ -0,0 +1,168 @@
+import re
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+
+from home.bench import BENCH_PASSWORD, bench_database, git_revision, seed_catalog, write_results
+
+# A bare "SCAN <table>" reads the whole table; "SCAN x USING INDEX" walks an index in
+# order and stops at the LIMIT, and FTS5 lookups show up as "SCAN x VIRTUAL TABLE"
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT)')
+
+
+def scenarios(client, since):
+    """(name, call) pairs covering the storefront views and the admin changelists"""
+    # The range the admin's date filters and date hierarchy produce
+    week = {
+        'created_at__gte': since.isoformat(sep=' '),
+        'created_at__lt': (since + timedelta(days=7)).isoformat(sep=' '),
+    }
+
+    def index_page_2():
+        cursor = client.get('/').context['next_cursor']
+        client.get('/', {'cursor': cursor})
+
+    return [
+        ('index', lambda: client.get('/')),
+        ('index_page_2', index_page_2),
+        ('search', lambda: client.get('/', {'q': 'wireless phone'})),
+        ('report_post', lambda: client.post('/report/', {
+            'firstName': 'Audit', 'lastName': 'Plan', 'email': 'audit@example.com', 'subject': 'general',
+            'message': 'Query plan audit submission.', 'privacy': 'on',
+        })),
+        # A separate client, so logging in does not end the staff session used below
+        ('login_post', lambda: Client().post('/Authlogin/', {'email': 'bench0@example.com', 'password': BENCH_PASSWORD})),
+        ('cart_api', lambda: client.get('/cart/api/')),
+        ('admin_products', lambda: client.get('/admin/home/product/')),
+        ('admin_products_by_price', lambda: client.get('/admin/home/product/', {'price_range': '25-100'})),
+        ('admin_products_this_week', lambda: client.get('/admin/home/product/', week)),
+        ('admin_products_search', lambda: client.get('/admin/home/product/', {'q': 'phone'})),
+        ('admin_reports', lambda: client.get('/admin/home/report/')),
+        ('admin_reports_by_subject', lambda: client.get('/admin/home/report/', {'subject': 'general'})),
+        ('admin_reports_this_week', lambda: client.get('/admin/home/report/', week)),
+        ('admin_reports_search', lambda: client.get('/admin/home/report/', {'q': 'reporter1@'})),
+        ('admin_users', lambda: client.get('/admin/account/user/')),
+        ('admin_users_active', lambda: client.get('/admin/account/user/', {'is_active__exact': '1'})),
+        ('admin_users_search', lambda: client.get('/admin/account/user/', {'q': 'bench1'})),
+    ]
+
+
+class QueryRecorder:
+    """execute_wrapper that keeps the first occurrence of every SELECT with its parameters"""
+
+    def __init__(self):
+        self.scenario = None
+        self.queries = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith('SELECT'):
+            query = self.queries.setdefault(sql, {'sql': sql, 'params': params, 'scenarios': []})
+            if self.scenario not in query['scenarios']:
+                query['scenarios'].append(self.scenario)
+        return execute(sql, params, many, context)
+
+
+def is_bounded(sql):
+    """An unfiltered scan in primary key order stops at its LIMIT, like an index walk"""
+    return ' WHERE ' not in sql and ' LIMIT ' in sql and ' ORDER BY ' in sql and ' JOIN ' not in sql
+
+
+def explain(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN QUERY PLAN on every query the storefront views and the admin issue against a "
+        "seeded database, flag full table scans and temporary sorts, and write a JSON report"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=20000)
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--reports', type=int, default=20000)
+        parser.add_argument(
+            '--allow', nargs='*', default=['django_content_type', 'django_migrations'],
+            help="Tables that may be scanned (small, fixed-size tables)",
+        )
+        parser.add_argument('--output', type=Path, help="Where to write the JSON report")
+        parser.add_argument('--fail-on-scan', action='store_true', help="Exit with an error when anything is flagged")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("EXPLAIN QUERY PLAN is SQLite syntax; run the audit against SQLite")
+
+        started_at = datetime.now(timezone.utc)
+        output = options['output'] or (
+            Path(settings.BASE_DIR) / 'bench_results' / f"query-plans-{started_at:%Y%m%dT%H%M%SZ}.json"
+        )
+        allowed = set(options['allow'])
+        recorder = QueryRecorder()
+
+        # Reports are written inline so their INSERT is part of the request being audited
+        ingest = {**getattr(settings, 'REPORT_INGEST', {}), 'SYNC': True}
+        dispatch = {**getattr(settings, 'EMAIL_DISPATCH', {}), 'SYNC': True}
+        with bench_database(), override_settings(REPORT_INGEST=ingest, EMAIL_DISPATCH=dispatch):
+            self.stdout.write(
+                f"Seeding {options['products']} products, {options['users']} users and {options['reports']} reports..."
+            )
+            seed_catalog(options['products'], options['users'], reports=options['reports'])
+            connection.cursor().execute('ANALYZE')
+
+            admin = get_user_model().objects.create_superuser('audit-admin@example.com', 'Audit Admin', BENCH_PASSWORD)
+            client = Client()
+            client.force_login(admin)
+
+            with connection.execute_wrapper(recorder):
+                for name, call in scenarios(client, started_at - timedelta(days=3)):
+                    recorder.scenario = name
+                    call()
+
+            queries = []
+            for query in recorder.queries.values():
+                plan = explain(query['sql'], query['params'])
+                scans = [
+                    m.group(1) for m in map(FULL_SCAN.match, plan)
+                    # "SCAN subquery" reads a LIMITed inner result, not a table
+                    if m and m.group(1) not in allowed and not m.group(1).startswith('subquery')
+                ]
+                if scans and is_bounded(query['sql']):
+                    scans = []
+                # Ranking full-text matches always sorts; that is not an index problem
+                full_text = any('VIRTUAL TABLE' in line for line in plan)
+                sorts = [] if full_text else [m.group(0) for m in map(TEMP_SORT.search, plan) if m]
+                queries.append({
+                    'scenarios': query['scenarios'],
+                    'sql': query['sql'],
+                    'plan': plan,
+                    'full_scans': scans,
+                    'temp_sorts': sorts,
+                })
+
+        flagged = [q for q in queries if q['full_scans'] or q['temp_sorts']]
+        write_results(output, {
+            'audit': 'query_plans',
+            'started_at': started_at.isoformat(),
+            'git_revision': git_revision(),
+            'rows': {'products': options['products'], 'users': options['users'], 'reports': options['reports']},
+            'queries': len(queries),
+            'flagged': len(flagged),
+            'results': queries,
+        })
+
+        for query in flagged:
+            problems = [f"full scan of {t}" for t in query['full_scans']] + query['temp_sorts']
+            self.stdout.write(self.style.WARNING(f"  {', '.join(query['scenarios'])}: {'; '.join(problems)}"))
+            self.stdout.write(f"    {query['sql'][:200]}")
+        summary = f"{len(queries)} distinct queries, {len(flagged)} flagged. Report written to {output}"
+        if flagged and options['fail_on_scan']:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary) if not flagged else summary)
@@ -0,0 +1,99 @@
+import importlib
+import platform
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+from django.urls import clear_url_caches
+
+from home.bench import (
+    bench_database, git_revision, http_load, local_asgi_server, local_server, seed_catalog, write_results,
+)
+
+SCENARIOS = [
+    ('index', '/', None),
+    ('index_ajax', '/', {'X-Requested-With': 'XMLHttpRequest'}),
+    ('search', '/?q=wireless+phone', None),
+    ('services', '/services/', None),
+    ('report_get', '/report/', None),
+]
+
+
+def reload_urlconf():
+    """Re-import the URLconfs, which pick sync or async views when they are imported"""
+    for name in ('home.urls', 'account.urls', settings.ROOT_URLCONF):
+        importlib.reload(importlib.import_module(name))
+    clear_url_caches()
+
+
+@contextmanager
+def serving(protocol):
+    """Base URL of a local server for `protocol`, with the views asgi.py or wsgi.py would route to"""
+    asgi = protocol == 'asgi'
+    try:
+        with override_settings(ASYNC_VIEWS=asgi, LOGIN_ASYNC=asgi):
+            reload_urlconf()
+            if asgi:
+                with local_asgi_server(get_asgi_application()) as base_url:
+                    yield base_url
+            else:
+                with local_server(get_wsgi_application()) as base_url:
+                    yield base_url
+    finally:
+        reload_urlconf()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare WSGI (sync views, threaded server) against ASGI (async views, event loop) "
+        "throughput and tail latency on the same seeded database and write the results as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000, help="Synthetic products to seed")
+        parser.add_argument('--requests', type=int, default=1000, help="Requests per scenario")
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[16, 64], help="Client threads")
+        parser.add_argument('--only', nargs='*', help="Only run the named scenarios")
+        parser.add_argument('--output', type=Path, help="Where to write the JSON results")
+
+    def handle(self, *args, **options):
+        started_at = datetime.now(timezone.utc)
+        output = options['output'] or (
+            Path(settings.BASE_DIR) / 'bench_results' / f"asgi-{started_at:%Y%m%dT%H%M%SZ}.json"
+        )
+        scenarios = [s for s in SCENARIOS if not options['only'] or s[0] in options['only']]
+        results = {
+            'benchmark': 'asgi',
+            'started_at': started_at.isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'products': options['products'],
+            'requests': options['requests'],
+            'protocols': {},
+        }
+
+        with bench_database():
+            self.stdout.write(f"Seeding {options['products']} products...")
+            seed_catalog(options['products'])
+
+            for protocol in ('wsgi', 'asgi'):
+                measured = results['protocols'][protocol] = {}
+                with serving(protocol) as base_url:
+                    for name, path, headers in scenarios:
+                        url = base_url + path
+                        http_load(url, 20, 4, headers)  # warm-up
+                        for concurrency in options['concurrency']:
+                            result = http_load(url, options['requests'], concurrency, headers)
+                            measured[f'{name}@{concurrency}'] = result
+                            self.stdout.write(
+                                f"  {protocol} {name:<12} c={concurrency:<4} {result['throughput_rps']:>8} rps "
+                                f"p50={result['p50_ms']}ms p99={result['p99_ms']}ms errors={result['errors']}"
+                            )
+
+        write_results(output, results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
@@ -0,0 +1,136 @@
+import platform
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import OperationalError, connection, connections
+
+from home.bench import bench_database, git_revision, http_load, local_server, seed_catalog, write_results
+from home.models import Report
+from trendbazar.db import sqlite_init_command
+
+
+class ReportWriters:
+    """Threads saving one Report per transaction, the way report() used to, until stopped"""
+
+    def __init__(self, count):
+        self.count = count
+        self.writes = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self._threads = [threading.Thread(target=self._run, args=(n,)) for n in range(self.count)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def _run(self, number):
+        try:
+            while not self._stop.is_set():
+                try:
+                    Report.objects.create(
+                        name=f'Writer {number}', email=f'writer{number}@example.com', subject='general',
+                        message='Concurrent write benchmark submission.',
+                    )
+                    with self._lock:
+                        self.writes += 1
+                except OperationalError:
+                    with self._lock:
+                        self.errors += 1
+        finally:
+            connection.close()
+
+    def summary(self):
+        return {
+            'writers': self.count,
+            'writes': self.writes,
+            'write_errors': self.errors,
+            'writes_per_second': round(self.writes / self.elapsed, 1) if self.elapsed else None,
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure storefront read throughput with and without concurrent Report writes, "
+        "for each SQLite journal mode, and write the results as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=5000)
+        parser.add_argument('--requests', type=int, default=400, help="Reads per measurement")
+        parser.add_argument('--concurrency', type=int, default=8, help="Reader threads")
+        parser.add_argument('--writers', type=int, default=2, help="Report writer threads")
+        parser.add_argument('--journal-modes', nargs='+', default=['delete', 'wal'])
+        parser.add_argument('--path', default='/', help="Page the readers request")
+        parser.add_argument('--output', type=Path, help="Where to write the JSON results")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("This benchmark compares SQLite journal modes")
+
+        started_at = datetime.now(timezone.utc)
+        output = options['output'] or (
+            Path(settings.BASE_DIR) / 'bench_results' / f"concurrency-{started_at:%Y%m%dT%H%M%SZ}.json"
+        )
+        results = {
+            'benchmark': 'concurrency',
+            'started_at': started_at.isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'products': options['products'],
+            'path': options['path'],
+            'modes': {},
+        }
+
+        db_settings = connections.settings['default']
+        original_options = db_settings.get('OPTIONS', {})
+        try:
+            for mode in options['journal_modes']:
+                # New connections, including the server's handler threads, pick this up
+                pragmas = {**getattr(settings, 'SQLITE_PRAGMAS', {}), 'journal_mode': mode.upper()}
+                db_settings['OPTIONS'] = {**original_options, 'init_command': sqlite_init_command(pragmas)}
+                connection.close()
+                with tempfile.TemporaryDirectory() as directory:
+                    results['modes'][mode] = self.run_mode(mode, Path(directory) / 'bench.sqlite3', options)
+        finally:
+            db_settings['OPTIONS'] = original_options
+
+        write_results(output, results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+    def run_mode(self, mode, path, options):
+        url_path = options['path']
+        with bench_database(test_name=path):
+            self.stdout.write(f"[{mode}] seeding {options['products']} products...")
+            seed_catalog(options['products'])
+            connection.close()
+
+            with local_server(get_wsgi_application()) as base_url:
+                url = base_url + url_path
+                http_load(url, options['concurrency'], options['concurrency'])  # warm-up
+                idle = http_load(url, options['requests'], options['concurrency'])
+                with ReportWriters(options['writers']) as writers:
+                    busy = http_load(url, options['requests'], options['concurrency'])
+
+        result = {'reads_idle': idle, 'reads_during_writes': busy, **writers.summary()}
+        self.stdout.write(
+            f"  idle: {idle['throughput_rps']} rps p95={idle['p95_ms']}ms errors={idle['errors']}\n"
+            f"  with {writers.count} writers: {busy['throughput_rps']} rps p95={busy['p95_ms']}ms "
+            f"errors={busy['errors']}; {result['writes_per_second']} writes/s, {writers.errors} write errors"
+        )
+        return result
@@ -0,0 +1,149 @@
+import platform
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test import Client, override_settings
+
+from home.bench import (
+    BENCH_PASSWORD, bench_database, git_revision, http_load, local_server,
+    measure_calls, seed_catalog, write_results,
+)
+from home.ingest import get_report_ingestor
+
+AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+REPORT_FORM = {
+    'firstName': 'Bench', 'lastName': 'Mark', 'email': 'bench@example.com',
+    'phone': '+1 555 123 4567', 'subject': 'general', 'address': '1 Bench Street',
+    'message': 'Benchmark submission for the report form.', 'privacy': 'on',
+}
+
+
+def client_scenarios(client, users=1):
+    """(name, call) pairs for every endpoint measured through the test client"""
+    counter = iter(range(10 ** 9))
+
+    def login_bad_password():
+        # A fresh address and a rotating seeded account each time, so the
+        # login throttle never kicks in and every attempt pays for the hash
+        n = next(counter)
+        client.post(
+            '/Authlogin/', {'email': f'bench{n % max(users, 1)}@example.com', 'password': 'wrong'},
+            REMOTE_ADDR=f'10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}',
+        )
+
+    def register():
+        n = next(counter)
+        client.post('/Authregister/', {
+            'full_name': 'Bench Register', 'email': f'register{n}@example.com',
+            'password': BENCH_PASSWORD, 'confirm_password': BENCH_PASSWORD,
+        })
+
+    second_page = {}
+
+    def index_page_2():
+        if 'cursor' not in second_page:
+            second_page['cursor'] = client.get('/').context['next_cursor'] or ''
+        client.get('/', {'cursor': second_page['cursor']})
+
+    return [
+        ('index', lambda: client.get('/')),
+        ('index_page_2', index_page_2),
+        ('search', lambda: client.get('/', {'q': 'wireless phone'})),
+        ('search_ajax', lambda: client.get('/', {'q': 'smart'}, **AJAX)),
+        ('search_ajax_miss', lambda: client.get('/', {'q': f'zz{next(counter)}'}, **AJAX)),
+        ('report_get', lambda: client.get('/report/')),
+        ('report_post', lambda: client.post('/report/', {**REPORT_FORM, 'message': f"{REPORT_FORM['message']} #{next(counter)}"})),
+        ('report_post_duplicate', lambda: client.post('/report/', REPORT_FORM)),
+        ('register_get', lambda: client.get('/Authregister/')),
+        ('register_post', register),
+        ('login_get', lambda: client.get('/Authlogin/')),
+        ('login_post', lambda: client.post('/Authlogin/', {'email': 'bench0@example.com', 'password': BENCH_PASSWORD})),
+        ('login_post_bad_password', login_bad_password),
+    ]
+
+
+HTTP_SCENARIOS = [
+    ('index', '/', None),
+    ('search', '/?q=wireless+phone', None),
+    ('search_ajax', '/?q=smart', {'X-Requested-With': 'XMLHttpRequest'}),
+    ('report_get', '/report/', None),
+    ('login_get', '/Authlogin/', None),
+]
+
+
+class Command(BaseCommand):
+    help = "Benchmark the storefront hot paths against a seeded throwaway database and write the results as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000, help="Synthetic products to seed")
+        parser.add_argument(
+            '--users', type=int, default=1000,
+            help="Synthetic users to seed; bad-password logins rotate over them, so keep it above --requests / 5",
+        )
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint")
+        parser.add_argument('--concurrency', type=int, default=8, help="Threads for the HTTP load generator")
+        parser.add_argument('--skip-http', action='store_true', help="Only measure through the test client")
+        parser.add_argument('--only', nargs='*', help="Only run the named scenarios")
+        parser.add_argument('--output', type=Path, help="Where to write the JSON results")
+        parser.add_argument('--keepdb', action='store_true', help="Reuse the seeded test database between runs")
+
+    def handle(self, *args, **options):
+        started_at = datetime.now(timezone.utc)
+        output = options['output'] or (
+            Path(settings.BASE_DIR) / 'bench_results' / f"storefront-{started_at:%Y%m%dT%H%M%SZ}.json"
+        )
+        results = {
+            'benchmark': 'storefront',
+            'started_at': started_at.isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'database': settings.DATABASES['default']['ENGINE'],
+            'products': options['products'],
+            'users': options['users'],
+            'requests_per_endpoint': options['requests'],
+            'client': {},
+            'http': {},
+        }
+        only = set(options['only'] or [])
+
+        # Mail goes to the in-memory outbox and is sent inline, so register stays self-contained
+        dispatch = {**getattr(settings, 'EMAIL_DISPATCH', {}), 'SYNC': True}
+        with bench_database(keepdb=options['keepdb']), override_settings(EMAIL_DISPATCH=dispatch):
+            self.stdout.write(f"Seeding {options['products']} products and {options['users']} users...")
+            seed_catalog(options['products'], options['users'])
+
+            client = Client()
+            for name, call in client_scenarios(client, options['users']):
+                if only and name not in only:
+                    continue
+                results['client'][name] = stats = measure_calls(call, options['requests'])
+                self.report(name, stats)
+            # Batched reports still queued belong to this database
+            get_report_ingestor().flush()
+
+            if not options['skip_http']:
+                with local_server(get_wsgi_application()) as base_url:
+                    for name, path, headers in HTTP_SCENARIOS:
+                        if only and name not in only:
+                            continue
+                        results['http'][name] = stats = http_load(
+                            base_url + path, options['requests'], options['concurrency'], headers,
+                        )
+                        self.report(f"http {name}", stats)
+
+        write_results(output, results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+    def report(self, name, stats):
+        extra = ''
+        if 'queries_per_request' in stats:
+            extra = f" queries={stats['queries_per_request']} peak={stats['peak_memory_kb']}KB"
+        if 'throughput_rps' in stats:
+            extra = f" rps={stats['throughput_rps']} errors={stats['errors']}"
+        self.stdout.write(
+            f"  {name:<28} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms{extra}"
+        )
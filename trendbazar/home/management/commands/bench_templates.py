@@ -0,0 +1,136 @@
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+
+from home.bench import WORDS, git_revision, summarize, write_results
+from home.models import Product
+from trendbazar.template_warmup import template_names
+
+UNCACHED_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def make_engine(cached):
+    """A fresh template backend like settings.TEMPLATES, with or without the cached loader"""
+    config = settings.TEMPLATES[0]
+    loaders = [('django.template.loaders.cached.Loader', UNCACHED_LOADERS)] if cached else UNCACHED_LOADERS
+    return DjangoTemplates({
+        'NAME': 'cached' if cached else 'uncached',
+        'DIRS': config['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': {**config['OPTIONS'], 'loaders': loaders},
+    })
+
+
+def grid_products(count):
+    """Unsaved products shaped like real cards: half with an image, a quarter with WebP variants"""
+    products = []
+    for i in range(count):
+        product = Product(
+            id=i + 1,
+            title=' '.join(WORDS[(i + k) % len(WORDS)] for k in range(3)).title(),
+            description=' '.join(WORDS[(i * 7 + k) % len(WORDS)] for k in range(25)),
+            price=Decimal(100 + i % 900) / 100,
+        )
+        if i % 2 == 0:
+            product.image.name = f'products/images/p{i}.jpg'
+        if i % 4 == 0:
+            product.image_variants = ','.join(f'products/images/p{i}-{w}w.webp' for w in (320, 640, 1024))
+        products.append(product)
+    return products
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the product grid render (products_partial.html) for a large page, per card, "
+        "with and without the cached loader, and write the results as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000, help="Cards in the rendered grid")
+        parser.add_argument('--page-size', type=int, default=24, help="Cards on the full index.html page")
+        parser.add_argument('--repeat', type=int, default=20, help="Renders per scenario")
+        parser.add_argument('--output', type=Path, help="Where to write the JSON results")
+
+    def handle(self, *args, **options):
+        started_at = datetime.now(timezone.utc)
+        output = options['output'] or (
+            Path(settings.BASE_DIR) / 'bench_results' / f"templates-{started_at:%Y%m%dT%H%M%SZ}.json"
+        )
+        count = options['products']
+        products = grid_products(count)
+
+        # The grid as it was before the login URL was reversed once outside the loop
+        source = (Path(settings.BASE_DIR) / 'templates' / 'products_partial.html').read_text()
+        legacy_source = source.replace("{% url 'login' as login_url %}", '').replace(
+            '{{ login_url }}', "{% url 'login' %}"
+        )
+
+        # What warm_up() costs a fresh worker
+        warm_engine = make_engine(cached=True)
+        started = time.perf_counter()
+        for name in template_names(warm_engine.engine):
+            warm_engine.get_template(name)
+        warmup_ms = (time.perf_counter() - started) * 1000
+
+        cached, uncached = make_engine(cached=True), make_engine(cached=False)
+        legacy_template = cached.from_string(legacy_source)
+        page = products[:options['page_size']]
+        # (name, template loader, products): the big grid shows the per-card
+        # cost, a normal page the share parsing base/header/footer takes
+        scenarios = [
+            ('grid_uncached', lambda: uncached.get_template('products_partial.html'), products),
+            ('grid_cached', lambda: cached.get_template('products_partial.html'), products),
+            ('grid_url_in_loop', lambda: legacy_template, products),
+            ('page_uncached', lambda: uncached.get_template('index.html'), page),
+            ('page_cached', lambda: cached.get_template('index.html'), page),
+        ]
+
+        factory = RequestFactory()
+        users = {'anonymous': AnonymousUser(), 'authenticated': get_user_model()(id=1, email='bench@example.com')}
+
+        results = {
+            'benchmark': 'templates',
+            'started_at': started_at.isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'products': count,
+            'page_size': options['page_size'],
+            'repeat': options['repeat'],
+            'warmup_ms': round(warmup_ms, 3),
+            'scenarios': {},
+        }
+        self.stdout.write(f"Warm-up compiled the templates in {warmup_ms:.1f}ms")
+
+        for user_label, user in users.items():
+            for name, load, cards in scenarios:
+                request = factory.get('/')
+                request.user = user
+                context = {'products': cards, 'query': '', 'next_cursor': 'x'}
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    load().render(context, request)
+                    timings.append((time.perf_counter() - started) * 1000)
+                result = summarize(timings)
+                result['per_card_us'] = round(statistics.fmean(timings) * 1000 / len(cards), 2)
+                results['scenarios'][f'{name}/{user_label}'] = result
+                self.stdout.write(
+                    f"  {name:<17} {user_label:<14} mean={result['mean_ms']}ms "
+                    f"p95={result['p95_ms']}ms per card={result['per_card_us']}us"
+                )
+
+        write_results(output, results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
@@ -0,0 +1,100 @@
+import platform
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from home.bench import git_revision, write_results
+from trendbazar.validation import CONTACT_FORM, PASSWORD
+
+VALID = {
+    'firstName': 'Bench', 'lastName': 'Mark', 'email': 'bench@example.com',
+    'phone': '+1 555 123 4567', 'subject': 'general', 'address': '1 Bench Street',
+    'message': 'Benchmark submission for the report form.', 'newsletter': False, 'privacy': True,
+}
+INVALID = {**VALID, 'firstName': 'B', 'email': 'not-an-email', 'phone': '12', 'message': 'short', 'privacy': False}
+
+
+def inline_contact_errors(data):
+    """The contact form checks as they were written inline in home.views, for comparison"""
+    errors = []
+    if not data['firstName'] or len(data['firstName']) < 2:
+        errors.append('First name is required and must be at least 2 characters.')
+    if not data['lastName'] or len(data['lastName']) < 2:
+        errors.append('Last name is required and must be at least 2 characters.')
+    if not data['email']:
+        errors.append('Email address is required.')
+    elif not re.match(r'^[^\s@]+@[^\s@]+\.[^\s@]+$', data['email']):
+        errors.append('Please enter a valid email address.')
+    if data['phone'] and not re.match(r'^[\d\s\-\+\(\)]{10,}$', data['phone']):
+        errors.append('Please enter a valid phone number.')
+    if not data['subject']:
+        errors.append('Please select a subject.')
+    if not data['message'] or len(data['message']) < 10:
+        errors.append('Message is required and must be at least 10 characters.')
+    elif len(data['message']) > 1000:
+        errors.append('Message cannot exceed 1000 characters.')
+    if not data['privacy']:
+        errors.append('You must agree to the Privacy Policy and Terms of Use.')
+    return errors
+
+
+def inline_password_error(password):
+    if len(password) < 8:
+        return "Password must be at least 8 characters long"
+    if not re.search(r"[A-Za-z]", password) or not re.search(r"\d", password):
+        return "Password must contain both letters and numbers"
+    if not re.search(r"[!@#$%^&*(),.?\":{}|<>]", password):
+        return "Password must include at least one special character"
+    return None
+
+
+def ns_per_call(call, iterations):
+    started = time.perf_counter_ns()
+    for _ in range(iterations):
+        call()
+    return round((time.perf_counter_ns() - started) / iterations, 1)
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark the per-submission cost of the contact form and password validation"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100000)
+        parser.add_argument('--batch', type=int, default=10000, help="Records per validate_many() call")
+        parser.add_argument('--output', help="Also write the results as JSON to this path")
+
+    def handle(self, *args, **options):
+        n = options['iterations']
+        assert inline_contact_errors(INVALID) == CONTACT_FORM.errors(INVALID)
+
+        cases = {
+            'contact_valid_inline': lambda: inline_contact_errors(VALID),
+            'contact_valid_validator': lambda: CONTACT_FORM.errors(VALID),
+            'contact_invalid_inline': lambda: inline_contact_errors(INVALID),
+            'contact_invalid_validator': lambda: CONTACT_FORM.errors(INVALID),
+            'password_inline': lambda: inline_password_error('Bench#pass1'),
+            'password_validator': lambda: PASSWORD.errors({'password': 'Bench#pass1'}),
+        }
+        results = {
+            'benchmark': 'validation',
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'iterations': n,
+            'ns_per_record': {},
+        }
+        for name, call in cases.items():
+            results['ns_per_record'][name] = ns = ns_per_call(call, n)
+            self.stdout.write(f"  {name:<28} {ns:>8} ns")
+
+        records = [VALID if i % 10 else INVALID for i in range(options['batch'])]
+        ns = ns_per_call(lambda: CONTACT_FORM.validate_many(records), max(1, n // len(records)))
+        results['ns_per_record']['contact_validate_many'] = per_record = round(ns / len(records), 1)
+        self.stdout.write(f"  {'contact_validate_many':<28} {per_record:>8} ns")
+
+        if options['output']:
+            write_results(Path(options['output']), results)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from home.ingest import get_report_ingestor
+
+
+class Command(BaseCommand):
+    help = "Write contact form submissions left in the spool by processes that are no longer running"
+
+    def handle(self, *args, **options):
+        ingestor = get_report_ingestor()
+        recovered = ingestor.recover()
+        written = ingestor.flush()
+        self.stdout.write(self.style.SUCCESS(f"Recovered {recovered} spooled reports, wrote {written}"))
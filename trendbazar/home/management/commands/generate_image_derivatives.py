@@ -0,0 +1,31 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from home.images import generate_derivatives_task, is_current
+from home.models import Product
+
+
+class Command(BaseCommand):
+    help = "Build WebP image derivatives for products uploaded before they existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Rebuild derivatives that are already up to date")
+        parser.add_argument('--workers', type=int, default=4, help="Number of images processed in parallel")
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image='').only('id', 'image', 'image_variants')
+        pending = [
+            product.pk for product in products.iterator(chunk_size=2000)
+            if options['force'] or not is_current(product)
+        ]
+        self.stdout.write(f"{len(pending)} products need derivatives")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for done, _ in enumerate(pool.map(generate_derivatives_task, pending), start=1):
+                if done % 100 == 0:
+                    self.stdout.write(f"  {done}/{len(pending)}")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(pending)} products in {elapsed:.1f}s"))
@@ -0,0 +1,136 @@
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from home.bench import git_revision, write_results
+
+# Runs in a fresh interpreter under -X importtime; phases go to stdout as JSON
+CHILD = r'''
+import importlib, json, os, time
+started = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings!r})
+import django
+django.setup()
+ready = time.perf_counter()
+importlib.import_module({module!r})
+loaded = time.perf_counter()
+routed = loaded
+if {urlconf!r}:
+    from django.urls import get_resolver
+    get_resolver().url_patterns  # what the first request does: every URLconf and view module
+    routed = time.perf_counter()
+print(json.dumps({{
+    'setup_ms': (ready - started) * 1000,
+    'module_ms': (loaded - ready) * 1000,
+    'urlconf_ms': (routed - loaded) * 1000,
+    'total_ms': (routed - started) * 1000,
+}}))
+'''
+
+IMPORT_TIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_import_times(stderr):
+    """{module: (self_us, cumulative_us, depth)} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            modules[name] = (int(own), int(cumulative), (len(indent) - 1) // 2)
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a WSGI/ASGI entry module in fresh interpreters and report worker cold start "
+        "time by phase and the import cost of each module and package"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='trendbazar.wsgi', help="Entry module a worker imports")
+        parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters to time; medians are reported")
+        parser.add_argument('--top', type=int, default=25, help="Modules and packages to list")
+        parser.add_argument('--no-urlconf', action='store_true', help="Leave the URLconf to the first request")
+        parser.add_argument('--output', type=Path, help="Where to write the JSON results")
+
+    def handle(self, *args, **options):
+        started_at = datetime.now(timezone.utc)
+        output = options['output'] or (
+            Path(settings.BASE_DIR) / 'bench_results' / f"imports-{started_at:%Y%m%dT%H%M%SZ}.json"
+        )
+        code = CHILD.format(
+            settings=os.environ.get('DJANGO_SETTINGS_MODULE', 'trendbazar.settings'),
+            module=options['module'],
+            urlconf=not options['no_urlconf'],
+        )
+
+        phases = defaultdict(list)
+        own_times = defaultdict(list)
+        cumulative_times = defaultdict(list)
+        depths = {}
+        for _ in range(options['runs']):
+            child = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', code],
+                cwd=settings.BASE_DIR, capture_output=True, text=True,
+            )
+            if child.returncode:
+                raise CommandError(f"Importing {options['module']} failed:\n{child.stderr[-2000:]}")
+            for phase, ms in json.loads(child.stdout.strip().splitlines()[-1]).items():
+                phases[phase].append(ms)
+            for name, (own, cumulative, depth) in parse_import_times(child.stderr).items():
+                own_times[name].append(own)
+                cumulative_times[name].append(cumulative)
+                depths[name] = depth
+
+        median_ms = lambda samples: round(statistics.median(samples) / 1000, 3)  # noqa: E731
+        modules = {
+            name: {
+                'self_ms': median_ms(own_times[name]),
+                'cumulative_ms': median_ms(cumulative_times[name]),
+                'depth': depths[name],
+            }
+            for name in own_times
+        }
+        packages = defaultdict(float)
+        for name, timing in modules.items():
+            packages[name.split('.')[0]] += timing['self_ms']
+
+        results = {
+            'benchmark': 'imports',
+            'started_at': started_at.isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'module': options['module'],
+            'runs': options['runs'],
+            'phases_ms': {phase: round(statistics.median(samples), 3) for phase, samples in phases.items()},
+            'modules_imported': len(modules),
+            'packages_ms': dict(sorted(((p, round(ms, 3)) for p, ms in packages.items()), key=lambda i: -i[1])),
+            'modules': dict(sorted(modules.items(), key=lambda i: -i[1]['cumulative_ms'])),
+        }
+
+        self.stdout.write(f"Cold start of {options['module']} (median of {options['runs']} runs, {len(modules)} modules):")
+        for phase, ms in results['phases_ms'].items():
+            self.stdout.write(f"  {phase:<12} {ms:>9.1f}ms")
+        self.stdout.write("Packages by own import time:")
+        for package, ms in list(results['packages_ms'].items())[:options['top']]:
+            self.stdout.write(f"  {package:<32} {ms:>9.1f}ms")
+        self.stdout.write("Modules by cumulative import time:")
+        for name, timing in list(results['modules'].items())[:options['top']]:
+            self.stdout.write(
+                f"  {'  ' * timing['depth']}{name:<{48 - 2 * timing['depth']}} "
+                f"{timing['cumulative_ms']:>9.1f}ms (self {timing['self_ms']:.1f}ms)"
+            )
+
+        write_results(output, results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
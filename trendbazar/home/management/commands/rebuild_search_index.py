@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.search import get_search_backend
+from home.search_cache import get_result_cache
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index from the product table"
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        started = time.perf_counter()
+        count = backend.rebuild()
+        get_result_cache().clear()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} products with {type(backend).__name__} in {elapsed:.2f}s"
+        ))
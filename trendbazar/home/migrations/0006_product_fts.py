@@ -0,0 +1,62 @@
+from django.db import migrations
+
+# FTS5 external-content index over home_product, kept in sync by triggers.
+# Only created on SQLite; other databases use the LIKE fallback in home.search.
+CREATE_FTS = [
+    """
+    CREATE VIRTUAL TABLE home_product_fts USING fts5(
+        title, description,
+        content='home_product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER home_product_fts_ai AFTER INSERT ON home_product BEGIN
+        INSERT INTO home_product_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER home_product_fts_ad AFTER DELETE ON home_product BEGIN
+        INSERT INTO home_product_fts(home_product_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER home_product_fts_au AFTER UPDATE OF title, description ON home_product BEGIN
+        INSERT INTO home_product_fts(home_product_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO home_product_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    # Index the rows that already exist
+    "INSERT INTO home_product_fts(home_product_fts) VALUES ('rebuild')",
+]
+
+DROP_FTS = [
+    "DROP TRIGGER IF EXISTS home_product_fts_au",
+    "DROP TRIGGER IF EXISTS home_product_fts_ad",
+    "DROP TRIGGER IF EXISTS home_product_fts_ai",
+    "DROP TABLE IF EXISTS home_product_fts",
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0005_alter_help_submit'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_FTS), run_on_sqlite(DROP_FTS)),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:51
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# SQLite applies AddField by rebuilding home_product, and the rebuild drops
+# the triggers that keep home_product_fts in sync; recreate them afterwards.
+fts = import_module('home.migrations.0006_product_fts')
+
+FTS_TRIGGERS = fts.DROP_FTS[:3] + fts.CREATE_FTS[1:]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0006_product_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_variants',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(fts.run_on_sqlite(FTS_TRIGGERS), migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:07
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0008_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='report_email_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='report_name_lower_idx'),
+        ),
+    ]
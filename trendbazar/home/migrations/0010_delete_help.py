@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:51
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Drops home_help and its rows. The Help model was removed from
+    home/models.py without a migration; the help page is a static template.
+    """
+
+    dependencies = [
+        ('home', '0009_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='help',
+        ),
+    ]
@@ -1,4 +1,20 @@
 from django.db import models
+from django.db.models.functions import Lower
+
+# The subjects offered by the form in templates/report.html
+REPORT_SUBJECTS = [
+    ('bug-report', 'Bug Report'),
+    ('general', 'General Inquiry'),
+    ('order', 'Order Support'),
+    ('shipping', 'Shipping & Delivery'),
+    ('returns', 'Returns & Refunds'),
+    ('technical', 'Technical Support'),
+    ('billing', 'Billing Questions'),
+    ('partnership', 'Business Partnership'),
+    ('complaint', 'Complaint'),
+    ('suggestion', 'Suggestion'),
+    ('other', 'Other'),
+]
 
 class Report(models.Model):
     """Model to store report details"""
@@ -16,6 +32,15 @@ class Report(models.Model):
     class Meta:
         verbose_name = "Report"
         verbose_name_plural = "Reports"
+        indexes = [
+            # Admin date filter and default sort
+            models.Index(fields=['-created_at'], name='report_created_idx'),
+            # Admin subject filter, which also lists the distinct subjects
+            models.Index(fields=['subject', '-created_at'], name='report_subject_created_idx'),
+            # Admin prefix search (trendbazar.admin_utils.LargeTableAdmin)
+            models.Index(Lower('email'), name='report_email_lower_idx'),
+            models.Index(Lower('name'), name='report_name_lower_idx'),
+        ]
 
 class Product(models.Model):
     """Model to store product details"""
@@ -24,13 +49,27 @@ class Product(models.Model):
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Comma-separated storage names of the WebP derivatives, or the image's own
+    # name when it is too small to need any (see home.images)
+    image_variants = models.TextField(blank=True, editable=False)
 
     def __str__(self):
         return self.title
 
+    @property
+    def image_srcset(self):
+        from .images import build_srcset
+        return build_srcset(self.image_variants)
+
     class Meta:
         verbose_name = "Product"
         verbose_name_plural = "Products"
+        indexes = [
+            # Catalog keyset pagination (home.pagination.KEYSET_ORDERING)
+            models.Index(fields=['-created_at', '-id'], name='product_created_id_idx'),
+            # Admin price filter
+            models.Index(fields=['price'], name='product_price_idx'),
+        ]
 
 
 # Create your models here.
@@ -0,0 +1,172 @@
+"""
+Cached rendering of the static content pages (services, help, about, ...).
+
+The only thing that differs between visitors is the header: logged in or
+not, and the logout form's CSRF token. Each page is rendered once per
+variant and kept in process memory with the token replaced by a marker that
+is filled in per request. Responses carry an ETag and Last-Modified so a
+browser revalidating its copy gets a 304 with no body.
+
+Entries are keyed by a deploy version (PAGE_CACHE['VERSION'], or a hash of
+the template files when unset), so a deploy that changes a template never
+serves the old page.
+"""
+import hashlib
+import inspect
+import re
+import threading
+import time
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+DEFAULTS = {
+    'ENABLED': True,
+    'VERSION': None,    # None hashes the template files once per process
+}
+
+CSRF_MARKER = '\0csrf-token\0'
+_CSRF_INPUT = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'PAGE_CACHE', {})}
+
+
+def template_version():
+    """Hash of every template file's path, size and mtime"""
+    digest = hashlib.sha1()
+    for engine in settings.TEMPLATES:
+        for directory in engine.get('DIRS', []):
+            for path in sorted(Path(directory).rglob('*.html')):
+                stat = path.stat()
+                digest.update(f'{path}:{stat.st_size}:{stat.st_mtime_ns}'.encode())
+    return digest.hexdigest()[:12]
+
+
+class CachedPage:
+    __slots__ = ('content', 'content_type', 'etag', 'last_modified', 'has_csrf')
+
+    def __init__(self, response, version, variant):
+        content = response.content.decode(response.charset)
+        self.content, replaced = _CSRF_INPUT.subn(rf'\g<1>{CSRF_MARKER}\g<2>', content)
+        self.has_csrf = bool(replaced)
+        self.content_type = response['Content-Type']
+        digest = hashlib.sha1(self.content.encode()).hexdigest()[:16]
+        self.etag = f'{version}-{variant}-{digest}'
+        self.last_modified = int(time.time())
+
+
+class PageCache:
+    def __init__(self, options):
+        self.version = options['VERSION'] or template_version()
+        self.hits = 0
+        self.misses = 0
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        page = self._pages.get(key)
+        if page is not None:
+            self.hits += 1
+        return page
+
+    def set(self, key, page):
+        with self._lock:
+            self.misses += 1
+            self._pages[key] = page
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache(get_options())
+    return _cache
+
+
+def _cacheable(request):
+    return request.method in ('GET', 'HEAD') and get_options()['ENABLED']
+
+
+def _page_key(request, view):
+    variant = 'user' if request.user.is_authenticated else 'anon'
+    return (view.__module__, view.__name__, variant)
+
+
+def _respond(request, page):
+    """The response for `page`: a 304 when the browser's copy is current"""
+    etag = page.etag
+    if page.has_csrf:
+        # The masked token in the page stays valid for as long as the CSRF secret does
+        token = get_token(request)
+        secret = request.META.get('CSRF_COOKIE', '')
+        etag += '-' + hashlib.sha1(secret.encode()).hexdigest()[:8]
+    etag = f'"{etag}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=page.last_modified)
+    if response is None:
+        content = page.content.replace(CSRF_MARKER, token) if page.has_csrf else page.content
+        response = HttpResponse(content, content_type=page.content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(page.last_modified)
+    # Browsers and proxies must revalidate, and keep logged-in pages to themselves
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True)
+    patch_cache_control(response, max_age=0, must_revalidate=True)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def cached_page(view):
+    """Serve `view` (a GET-only page with no per-user content besides the header) from PageCache"""
+
+    if inspect.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            # request.user would load the session synchronously on first use
+            request.user = await request.auser()
+            if not _cacheable(request):
+                return await view(request, *args, **kwargs)
+            cache = get_page_cache()
+            key = _page_key(request, view)
+            page = cache.get(key)
+            if page is None:
+                response = await view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                page = CachedPage(response, cache.version, key[-1])
+                cache.set(key, page)
+            return _respond(request, page)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not _cacheable(request):
+            return view(request, *args, **kwargs)
+        cache = get_page_cache()
+        key = _page_key(request, view)
+        page = cache.get(key)
+        if page is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            page = CachedPage(response, cache.version, key[-1])
+            cache.set(key, page)
+        return _respond(request, page)
+
+    return wrapper
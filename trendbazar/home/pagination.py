@@ -0,0 +1,99 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+
+# Newest products first; `id` breaks ties between rows created in the same instant
+KEYSET_ORDERING = ('-created_at', '-id')
+
+
+class InvalidCursor(ValueError):
+    """Raised when a ?cursor= token cannot be decoded"""
+
+
+def encode_cursor(product):
+    """Build an opaque cursor pointing just after the given product"""
+    raw = f"{product.created_at.isoformat()}|{product.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (created_at, id) from a cursor produced by encode_cursor"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, pk = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor(token) from e
+
+
+def encode_offset_cursor(offset):
+    """Cursor for ranked search results, which have no stable sort column"""
+    return base64.urlsafe_b64encode(f"@{offset}".encode()).decode().rstrip('=')
+
+
+def decode_offset_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        offset = int(raw[1:]) if raw.startswith('@') else -1
+        if offset < 0:
+            raise ValueError(raw)
+        return offset
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor(token) from e
+
+
+def _ranked_ids(ids, cursor, page_size):
+    offset = decode_offset_cursor(cursor) if cursor else 0
+    page_ids = ids[offset:offset + page_size]
+    next_cursor = None
+    if offset + page_size < len(ids):
+        next_cursor = encode_offset_cursor(offset + page_size)
+    return page_ids, next_cursor
+
+
+def ranked_page(queryset, ids, cursor=None, page_size=24, known=None):
+    """
+    Return (products, next_cursor) for one page of already-ranked product ids.
+
+    Only the ids of the current page are loaded, and they keep the order
+    the search backend returned them in. `known` is an optional id -> Product
+    map (e.g. from the search result cache) that saves the query entirely.
+    """
+    page_ids, next_cursor = _ranked_ids(ids, cursor, page_size)
+    by_id = known if known is not None else queryset.in_bulk(page_ids)
+    return [by_id[pk] for pk in page_ids if pk in by_id], next_cursor
+
+
+def _keyset_queryset(queryset, cursor, page_size):
+    queryset = queryset.order_by(*KEYSET_ORDERING)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+    # Fetch one extra row to find out whether there is a next page
+    return queryset[:page_size + 1]
+
+
+def _keyset_result(products, page_size):
+    next_cursor = None
+    if len(products) > page_size:
+        products = products[:page_size]
+        next_cursor = encode_cursor(products[-1])
+    return products, next_cursor
+
+
+def keyset_page(queryset, cursor=None, page_size=24):
+    """
+    Return (products, next_cursor) for one page of `queryset`.
+
+    Rows are seeked with a (created_at, id) comparison instead of OFFSET, so
+    every page costs the same no matter how deep the user has scrolled.
+    """
+    products = list(_keyset_queryset(queryset, cursor, page_size))
+    return _keyset_result(products, page_size)
+
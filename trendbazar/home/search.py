@@ -0,0 +1,171 @@
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connection, connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Product
+
+# Runs of letters and digits: like FTS5's unicode61 tokenizer, underscores and
+# other punctuation separate words
+WORD_RE = re.compile(r'[^\W_]+')
+
+FTS_TABLE = 'home_product_fts'
+
+
+def tokenize(query):
+    """Split a raw search string into lowercase words"""
+    return WORD_RE.findall(query.lower())
+
+
+def fold(text):
+    """Lowercase and strip accents, the way the FTS5 unicode61 tokenizer does"""
+    # NFD, not NFKD: unicode61 keeps compatibility characters such as '²' as they are
+    decomposed = unicodedata.normalize('NFD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+class SearchBackend:
+    """
+    Interface every product search backend implements.
+
+    `search()` returns product ids, best match first, so callers can page and
+    cache them without caring which database produced them.
+    """
+
+    def search(self, query, limit):
+        raise NotImplementedError
+
+    def filter(self, queryset, query):
+        """`queryset` narrowed to every product matching `query`, unranked and without a limit"""
+        raise NotImplementedError
+
+    def words(self, query):
+        """Normalized words of `query`; equal word lists give equal results"""
+        return tokenize(query)
+
+    def rebuild(self):
+        """Re-index every product; returns the number of indexed rows"""
+        raise NotImplementedError
+
+    def matches(self, words, title, description):
+        """Whether a product with this text is in the results for `words`"""
+        raise NotImplementedError
+
+    def narrows(self, parent_words, words):
+        """Whether every result for `words` is also a result for `parent_words`"""
+        raise NotImplementedError
+
+
+class LikeSearchBackend(SearchBackend):
+    """Portable fallback: case-insensitive substring match on title and description"""
+
+    def condition(self, query):
+        condition = Q()
+        for word in tokenize(query):
+            condition &= Q(title__icontains=word) | Q(description__icontains=word)
+        return condition
+
+    def search(self, query, limit):
+        condition = self.condition(query)
+        if not condition:
+            return []
+        return list(
+            Product.objects.filter(condition)
+            .order_by('-created_at', '-id')
+            .values_list('id', flat=True)[:limit]
+        )
+
+    def filter(self, queryset, query):
+        condition = self.condition(query)
+        return queryset.filter(condition) if condition else queryset.none()
+
+    def rebuild(self):
+        # Nothing is stored outside the product table
+        return Product.objects.count()
+
+    def matches(self, words, title, description):
+        title, description = title.lower(), description.lower()
+        return all(word in title or word in description for word in words)
+
+    def narrows(self, parent_words, words):
+        return all(any(parent in word for word in words) for parent in parent_words)
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """
+    FTS5 index over Product.title and Product.description.
+
+    The virtual table and the triggers that keep it in sync with home_product
+    are created by migration 0006_product_fts.
+    """
+
+    # bm25() column weights: a hit in the title counts more than one in the description
+    TITLE_WEIGHT = 10.0
+    DESCRIPTION_WEIGHT = 1.0
+
+    def match_expression(self, query):
+        # Every word must match; each one is treated as a prefix so partial typing finds results
+        return ' AND '.join(f'"{word}"*' for word in tokenize(query))
+
+    def search(self, query, limit):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        # Same database the product rows will be read from (the replica inside read_only views)
+        with connections[router.db_for_read(Product)].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, %s, %s) LIMIT %s",
+                [expression, self.TITLE_WEIGHT, self.DESCRIPTION_WEIGHT, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def filter(self, queryset, query):
+        expression = self.match_expression(query)
+        if not expression:
+            return queryset.none()
+        # A subquery, so the caller's own ordering and paging apply to every match
+        return queryset.filter(pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expression]))
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
+            cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+            return cursor.fetchone()[0]
+
+    def words(self, query):
+        return tokenize(fold(query))
+
+    def matches(self, words, title, description):
+        indexed = tokenize(fold(f"{title} {description}"))
+        return all(any(token.startswith(word) for token in indexed) for word in words)
+
+    def narrows(self, parent_words, words):
+        return all(any(word.startswith(parent) for word in words) for parent in parent_words)
+
+
+_backend = None
+
+
+def get_search_backend():
+    """Return the configured backend, picking one from the database vendor by default"""
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'PRODUCT_SEARCH_BACKEND', None)
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == 'sqlite':
+            _backend = SQLiteFTSBackend()
+        else:
+            _backend = LikeSearchBackend()
+    return _backend
+
+
+def search_products(query):
+    """Ranked ids of the products matching `query`"""
+    limit = getattr(settings, 'PRODUCT_SEARCH_MAX_RESULTS', 1000)
+    return get_search_backend().search(query, limit)
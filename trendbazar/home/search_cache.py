@@ -0,0 +1,222 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Product
+from .search import get_search_backend
+
+# `products` maps id -> Product for small result sets so pages can be
+# rendered without loading rows; it is None when only the ids are kept.
+SearchResult = namedtuple('SearchResult', ['ids', 'products'])
+
+DEFAULTS = {
+    'BACKEND': 'locmem',      # 'locmem' (per process) or 'django' (shared, uses CACHE_ALIAS)
+    'CACHE_ALIAS': 'default',
+    'MAX_ENTRIES': 1024,
+    'TIMEOUT': 300,
+    'MAX_ROWS': 200,
+}
+
+# Columns the product cards need (and `created_at` for the keyset cursor)
+CARD_FIELDS = ('id', 'image', 'image_variants', 'title', 'description', 'price', 'created_at')
+
+
+class SearchResultCache:
+    """
+    Cache of ranked search results keyed on the normalized query.
+
+    While a user types, "phon" is answered from the cached result for "pho"
+    by filtering its rows in-process, as long as that result was complete
+    (not cut off by the result limit) and small enough to keep rows for.
+    Refined results keep the ranking of the shorter query.
+    """
+
+    def __init__(self, max_entries, timeout, max_rows):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self.hits = 0
+        self.refined = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'refined': self.refined,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+        }
+
+    # Storage, implemented by subclasses
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, words, result):
+        raise NotImplementedError
+
+    def product_changed(self, product, deleted=False):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, query, backend, limit):
+        words = backend.words(query)
+        key = ' '.join(words)
+        result = self.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+
+        result = self.refine(words, backend, limit)
+        if result is not None:
+            self.refined += 1
+        else:
+            self.misses += 1
+            ids = backend.search(query, limit)
+            products = None
+            if len(ids) <= self.max_rows:
+                products = Product.objects.only(*CARD_FIELDS).in_bulk(ids)
+            result = SearchResult(ids, products)
+        self.set(key, words, result)
+        return result
+
+    def refine(self, words, backend, limit):
+        """Answer `words` from the cached result of a shorter query typed just before it"""
+        for parent_words in self.shorter_queries(words):
+            parent = self.get(' '.join(parent_words))
+            if parent is None:
+                continue
+            complete = parent.products is not None and len(parent.ids) < limit
+            if not complete or not backend.narrows(parent_words, words):
+                return None
+            products = {
+                pk: product for pk, product in parent.products.items()
+                if backend.matches(words, product.title, product.description)
+            }
+            ids = [pk for pk in parent.ids if pk in products]
+            return SearchResult(ids, products)
+        return None
+
+    @staticmethod
+    def shorter_queries(words):
+        """'pho ca' -> 'pho c', 'pho', 'ph', 'p': the queries a user typed on the way"""
+        words = list(words)
+        while words:
+            last = words.pop()[:-1]
+            if last:
+                words.append(last)
+            if words:
+                yield list(words)
+
+    @staticmethod
+    def affected_by(product, words, ids, backend, deleted):
+        if product.pk in ids:
+            return True
+        return not deleted and backend.matches(words, product.title, product.description)
+
+
+class LocMemSearchResultCache(SearchResultCache):
+    """Per-process LRU with a TTL; invalidates only the entries a product change affects"""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, words, result = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def set(self, key, words, result):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, words, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def product_changed(self, product, deleted=False):
+        backend = get_search_backend()
+        with self._lock:
+            stale = [
+                key for key, (_, words, result) in self._entries.items()
+                if self.affected_by(product, words, result.ids, backend, deleted)
+            ]
+            for key in stale:
+                del self._entries[key]
+        self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DjangoSearchResultCache(SearchResultCache):
+    """
+    Shared cache through a Django cache alias, so every worker sees invalidations.
+
+    Entries cannot be enumerated, so any product change moves every key to a
+    new generation instead.
+    """
+
+    GENERATION_KEY = 'product-search:generation'
+
+    def __init__(self, alias, *args):
+        super().__init__(*args)
+        self.cache = caches[alias]
+
+    def _key(self, key):
+        generation = self.cache.get_or_set(self.GENERATION_KEY, 0, None)
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return f'product-search:{generation}:{digest}'
+
+    def get(self, key):
+        return self.cache.get(self._key(key))
+
+    def set(self, key, words, result):
+        self.cache.set(self._key(key), result, self.timeout)
+
+    def product_changed(self, product, deleted=False):
+        self.clear()
+        self.invalidations += 1
+
+    def clear(self):
+        try:
+            self.cache.incr(self.GENERATION_KEY)
+        except ValueError:
+            self.cache.set(self.GENERATION_KEY, 1, None)
+
+
+_result_cache = None
+
+
+def get_result_cache():
+    global _result_cache
+    if _result_cache is None:
+        options = {**DEFAULTS, **getattr(settings, 'PRODUCT_SEARCH_CACHE', {})}
+        args = (options['MAX_ENTRIES'], options['TIMEOUT'], options['MAX_ROWS'])
+        if options['BACKEND'] == 'django':
+            _result_cache = DjangoSearchResultCache(options['CACHE_ALIAS'], *args)
+        else:
+            _result_cache = LocMemSearchResultCache(*args)
+    return _result_cache
+
+
+def cached_search(query):
+    """Ranked SearchResult for `query`, served from the result cache when possible"""
+    limit = getattr(settings, 'PRODUCT_SEARCH_MAX_RESULTS', 1000)
+    return get_result_cache().search(query, get_search_backend(), limit)
+
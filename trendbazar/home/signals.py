@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Product
+from .images import is_current, schedule_derivatives
+from .search_cache import get_result_cache
+
+
+@receiver(post_save, sender=Product)
+def invalidate_search_on_save(sender, instance, **kwargs):
+    get_result_cache().product_changed(instance)
+
+
+@receiver(post_delete, sender=Product)
+def invalidate_search_on_delete(sender, instance, **kwargs):
+    get_result_cache().product_changed(instance, deleted=True)
+
+
+@receiver(post_save, sender=Product)
+def build_image_derivatives(sender, instance, **kwargs):
+    if instance.image and not is_current(instance):
+        # Wait for the commit so the worker sees the new row
+        transaction.on_commit(lambda: schedule_derivatives(instance.pk))
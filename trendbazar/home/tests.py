@@ -1,3 +1,594 @@
-from django.test import TestCase
+import json
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth.signals import user_login_failed
+from django.contrib.messages import get_messages
+from django.contrib.messages.storage import default_storage as message_storage
+from django.contrib.sessions.backends.base import SessionBase
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import AsyncRequestFactory, Client, SimpleTestCase, TestCase, override_settings
+from django.db.models import Q
+from django.utils import timezone
+
+from account.models import User
+from account.throttle import DEFAULTS as THROTTLE_DEFAULTS, LoginThrottle
+from trendbazar.admin_utils import prefix_matches
+from .management.commands.audit_query_plans import FULL_SCAN, TEMP_SORT, explain, is_bounded
+from .images import build_srcset, is_current
+from .ingest import DEFAULTS as INGEST_DEFAULTS, ReportIngestor, fingerprint
+from .instrumentation import SearchEvent, SlowSearchSampler, record_search, timed_db
+from .models import Product, Report
+from .page_cache import get_page_cache
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page, ranked_page
+from .search import LikeSearchBackend, SQLiteFTSBackend, fold, search_products, tokenize
+from .management.commands.bench_storefront import client_scenarios
+from .bench import http_load, local_server, measure_calls, percentile, seed_catalog, summarize, write_results
+from .search_cache import LocMemSearchResultCache, SearchResultCache, get_result_cache
+from .views import index_async, report_async, services_async
+
+REPORT = {
+    'name': 'Ann Bee', 'email': 'ann@example.com', 'phone': '+1 555 123 4567',
+    'subject': 'general', 'message': 'Hello there, this is a message.', 'address': '1 Street',
+}
+
+
+def dead_pid():
+    """The pid of a process that has already exited"""
+    child = subprocess.Popen([sys.executable, '-c', ''])
+    child.wait()
+    return child.pid
+
+
+class ReportIngestTests(TestCase):
+    def setUp(self):
+        self.spool_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.spool_dir)
+
+    def ingestor(self, **options):
+        # Batches are flushed by the test, never by the background thread
+        return ReportIngestor({
+            **INGEST_DEFAULTS, 'SPOOL_DIR': self.spool_dir, 'BATCH_SIZE': 10 ** 6,
+            'FLUSH_INTERVAL': 3600, 'FSYNC': False, **options,
+        })
+
+    def write_spool(self, pid, lines):
+        path = self.spool_dir / f'reports-{pid}.spool'
+        path.write_text(''.join(f'{line}\n' for line in lines))
+        return path
+
+    def test_submissions_are_written_in_one_batch(self):
+        ingestor = self.ingestor()
+        for i in range(3):
+            self.assertTrue(ingestor.submit({**REPORT, 'message': f'Message number {i} for the batch.'}))
+        self.assertEqual(Report.objects.count(), 0)
+        with self.assertNumQueries(1):
+            self.assertEqual(ingestor.flush(), 3)
+        self.assertEqual(Report.objects.count(), 3)
+        self.assertEqual(list(self.spool_dir.iterdir()), [])
+
+    def test_duplicates_are_dropped(self):
+        ingestor = self.ingestor()
+        self.assertTrue(ingestor.submit(REPORT))
+        self.assertFalse(ingestor.submit({**REPORT, 'email': ' ANN@example.com', 'message': 'hello there this is a message'}))
+        self.assertEqual(fingerprint(REPORT), fingerprint({**REPORT, 'message': 'Hello  there. This is a message!'}))
+        self.assertEqual(ingestor.flush(), 1)
+
+    def test_sync_mode_writes_immediately(self):
+        self.ingestor(SYNC=True).submit(REPORT)
+        self.assertEqual(Report.objects.get().email, REPORT['email'])
+
+    def test_recovers_spool_of_dead_process(self):
+        self.write_spool(dead_pid(), [
+            json.dumps(REPORT),
+            json.dumps({**REPORT, 'name': ''}),
+            '{"name": "torn',
+        ])
+        ingestor = self.ingestor()
+        with self.assertLogs('home.ingest', 'WARNING') as logs:
+            self.assertEqual(ingestor.recover(), 1)
+        self.assertEqual(len(logs.records), 2)  # the torn line and the invalid record
+        self.assertEqual(ingestor.flush(), 1)
+        self.assertEqual(Report.objects.get().name, REPORT['name'])
+        self.assertEqual(list(self.spool_dir.iterdir()), [])
+
+    def test_spool_of_live_process_is_left_alone(self):
+        path = self.write_spool(1, [json.dumps(REPORT)])
+        self.assertEqual(self.ingestor().recover(), 0)
+        self.assertTrue(path.exists())
+
+    def test_spool_claimed_by_another_process_is_skipped(self):
+        self.write_spool(dead_pid(), [json.dumps(REPORT)])
+        with mock.patch('home.ingest.os.replace', side_effect=FileNotFoundError):
+            self.assertEqual(self.ingestor().recover(), 0)
+
+    def test_failed_batch_is_retried(self):
+        ingestor = self.ingestor()
+        ingestor.submit(REPORT)
+        with mock.patch('home.ingest.write_reports', side_effect=RuntimeError('database is locked')):
+            with self.assertLogs('home.ingest', 'ERROR'):
+                self.assertEqual(ingestor.flush(), 0)
+        self.assertEqual(ingestor.flush(), 1)
+        self.assertEqual(Report.objects.count(), 1)
+
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.bulk_create(
+            Product(title=f'Product {i}', description='Item', price='1.00') for i in range(7)
+        )
+        # Several rows share a timestamp, so the id has to break the tie
+        now = timezone.now()
+        for i, product in enumerate(Product.objects.order_by('id')):
+            product.created_at = now - timedelta(minutes=i // 3)
+            product.save(update_fields=['created_at'])
+        cls.expected = list(Product.objects.order_by('-created_at', '-id'))
+
+    def test_pages_cover_every_product_once_in_order(self):
+        seen, cursor = [], None
+        while True:
+            with self.assertNumQueries(1):
+                products, cursor = keyset_page(Product.objects.all(), cursor, page_size=3)
+            seen.extend(products)
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected)
+
+    def test_cursor_round_trip(self):
+        product = self.expected[2]
+        self.assertEqual(decode_cursor(encode_cursor(product)), (product.created_at, product.pk))
+
+    def test_bad_cursors(self):
+        for token in ('!!!', 'bm90LWEtY3Vyc29y', encode_cursor(self.expected[0])[:-4]):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(token)
+        self.assertEqual(self.client.get('/', {'cursor': '!!!'}).status_code, 400)
+
+    def test_catalog_pages(self):
+        with self.settings(PRODUCTS_PAGE_SIZE=4):
+            response = self.client.get('/')
+            self.assertEqual(list(response.context['products']), self.expected[:4])
+            response = self.client.get('/', {'cursor': response.context['next_cursor']},
+                                       headers={'X-Requested-With': 'XMLHttpRequest'})
+        self.assertTemplateUsed(response, 'products_partial.html')
+        self.assertTemplateNotUsed(response, 'index.html')
+        self.assertEqual(list(response.context['products']), self.expected[4:])
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_streamed_catalog_matches_the_rendered_one(self):
+        rendered = self.client.get('/').content
+        with self.settings(PRODUCTS_STREAMING=True, PRODUCTS_STREAM_CHUNK_SIZE=2):
+            response = self.client.get('/')
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content).count(b'Product '), rendered.count(b'Product '))
+
+    def test_streamed_catalog_varies_on_cookie_and_sets_the_csrf_cookie(self):
+        with self.settings(PRODUCTS_STREAMING=True):
+            response = self.client.get('/')
+        b''.join(response.streaming_content)
+        self.assertIn('Cookie', response['Vary'])
+        self.assertIn('csrftoken', response.cookies)
+
+
+def png(width, height=10):
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), 'red').save(buffer, 'PNG')
+    return ContentFile(buffer.getvalue())
+
+
+@override_settings(PRODUCT_IMAGE_ASYNC=False, PRODUCT_IMAGE_WIDTHS=(320, 640))
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def save(self, product, name, width):
+        with self.captureOnCommitCallbacks(execute=True):
+            product.image.save(name, png(width))
+        product.refresh_from_db()
+        return product
+
+    def create(self, name, width):
+        product = Product(title='Phone', description='A phone', price='10.00')
+        return self.save(product, name, width)
+
+    def test_derivatives_are_built_below_the_source_width(self):
+        product = self.create('wide.png', 800)
+        self.assertEqual(product.image_variants, 'products/images/wide-320w.webp,products/images/wide-640w.webp')
+        self.assertTrue(is_current(product))
+        self.assertIn('wide-640w.webp 640w', build_srcset(product.image_variants))
+
+    def test_narrow_image_counts_as_current(self):
+        product = self.create('narrow.png', 100)
+        self.assertEqual(product.image_variants, product.image.name)
+        self.assertTrue(is_current(product))
+        self.assertEqual(build_srcset(product.image_variants), '')
+
+    def test_old_derivatives_are_deleted_when_the_image_changes(self):
+        product = self.create('first.png', 800)
+        old = product.image_variants.split(',')
+        product = self.save(product, 'second.png', 400)
+        self.assertEqual(product.image_variants, 'products/images/second-320w.webp')
+        self.assertFalse(any(default_storage.exists(name) for name in old))
+        self.assertTrue(default_storage.exists(product.image_variants))
+
+
+class ProductSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.case = Product.objects.create(title='Leather case', description='Fits the phone', price='5.00')
+        cls.phone = Product.objects.create(title='Phone', description='A smart phone', price='100.00')
+        cls.cafe = Product.objects.create(title='Café table', description='Round', price='50.00')
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(search_products('phone'), [self.phone.pk, self.case.pk])
+
+    def test_words_are_prefixes_and_all_required(self):
+        self.assertEqual(search_products('pho fit'), [self.case.pk])
+        self.assertEqual(search_products('leath'), [self.case.pk])
+        self.assertEqual(search_products('"*)'), [])
+
+    def test_accents_are_folded(self):
+        self.assertEqual(search_products('cafe'), [self.cafe.pk])
+        self.assertEqual(search_products('CAFÉ'), [self.cafe.pk])
+
+    def test_index_follows_product_changes(self):
+        self.phone.title, self.phone.description = 'Tablet', 'A small tablet'
+        self.phone.save()
+        self.assertEqual(search_products('tablet'), [self.phone.pk])
+        self.assertEqual(search_products('phone'), [self.case.pk])
+        self.case.delete()
+        self.assertEqual(search_products('leather'), [])
+
+    def test_rebuild_search_index(self):
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 3 products', out.getvalue())
+        self.assertEqual(search_products('phone'), [self.phone.pk, self.case.pk])
+
+    def test_ranked_pages(self):
+        ids = [5, 3, 9, 1, 7]
+        known = {pk: pk for pk in ids}
+        first, cursor = ranked_page(Product.objects.all(), ids, None, 2, known=known)
+        second, cursor = ranked_page(Product.objects.all(), ids, cursor, 2, known=known)
+        last, cursor = ranked_page(Product.objects.all(), ids, cursor, 2, known=known)
+        self.assertEqual((first, second, last, cursor), ([5, 3], [9, 1], [7], None))
+        with self.assertRaises(InvalidCursor):
+            ranked_page(Product.objects.all(), ids, encode_cursor(self.phone), 2)
+
+    def test_catalog_search(self):
+        get_result_cache().clear()
+        with self.settings(PRODUCTS_PAGE_SIZE=1):
+            response = self.client.get('/', {'q': 'phone'})
+            self.assertEqual(list(response.context['products']), [self.phone])
+            response = self.client.get('/', {'q': 'phone', 'cursor': response.context['next_cursor']})
+            self.assertEqual(list(response.context['products']), [self.case])
+            self.assertIsNone(response.context['next_cursor'])
+
+    def test_filter_agrees_with_search(self):
+        for backend in (SQLiteFTSBackend(), LikeSearchBackend()):
+            for query in ('phone', 'pho fit', 'nothing', '!!'):
+                self.assertEqual(
+                    set(backend.filter(Product.objects.all(), query).values_list('pk', flat=True)),
+                    set(backend.search(query, 100)), (backend, query),
+                )
+
+    def test_admin_search_is_not_capped(self):
+        admin_user = User.objects.create_superuser(email='admin@example.com', full_name='Admin', password='pw')
+        self.client.force_login(admin_user)
+        with self.settings(PRODUCT_SEARCH_MAX_RESULTS=1):
+            response = self.client.get('/admin/home/product/', {'q': 'phone'})
+        self.assertEqual({product.pk for product in response.context['cl'].result_list}, {self.phone.pk, self.case.pk})
+
+
+class SearchResultCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cable = Product.objects.create(title='usb_c lead', description='Braided', price='5.00')
+        cls.charger = Product.objects.create(title='USB charger', description='Fast charging', price='15.00')
+        cls.phone = Product.objects.create(title='Phone', description='Charges over usb-c', price='100.00')
+
+    def setUp(self):
+        self.backend = SQLiteFTSBackend()
+        self.cache = LocMemSearchResultCache(100, 300, 200)
+
+    def search(self, query):
+        return self.cache.search(query, self.backend, 1000)
+
+    def test_words_split_like_the_fts_index(self):
+        self.assertEqual(tokenize(fold("USB_C-Kabel, Café's x²")), ['usb', 'c', 'kabel', 'cafe', 's', 'x²'])
+
+    def test_longer_query_is_refined_without_the_database(self):
+        self.search('usb')
+        for query in ('usb c', 'usb ch'):
+            with self.assertNumQueries(0):
+                refined = self.search(query)
+            # Refined results keep the ranking of the shorter query
+            self.assertEqual(set(refined.ids), set(self.backend.search(query, 1000)), query)
+        self.assertEqual((self.cache.misses, self.cache.refined), (1, 2))
+
+    def test_repeated_query_is_a_hit(self):
+        self.search('phone')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search('Phone!').ids, [self.phone.pk])
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_truncated_results_are_not_refined(self):
+        self.cache.search('usb', self.backend, 3)
+        self.cache.search('usb ch', self.backend, 3)
+        self.assertEqual((self.cache.misses, self.cache.refined), (2, 0))
+
+    def test_shorter_queries(self):
+        self.assertEqual(list(SearchResultCache.shorter_queries(['pho', 'ca'])), [['pho', 'c'], ['pho'], ['ph'], ['p']])
+
+    def test_changed_product_drops_only_affected_entries(self):
+        self.search('phone')
+        self.search('braided')
+        self.phone.title = 'Phone case'
+        self.cache.product_changed(self.phone)
+        self.assertIsNone(self.cache.get('phone'))
+        self.assertIsNotNone(self.cache.get('braided'))
+
+    def test_new_product_drops_entries_it_would_appear_in(self):
+        self.search('lead')
+        self.cache.product_changed(Product(pk=999, title='HDMI lead', description='', price='1.00'))
+        self.assertIsNone(self.cache.get('lead'))
+
+
+class SearchInstrumentationTests(TestCase):
+    def setUp(self):
+        self.events = []
+        patcher = mock.patch('home.instrumentation._hooks', [self.events.append])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_catalog_search_records_one_event(self):
+        get_result_cache().clear()
+        Product.objects.create(title='Phone', description='A phone', price='1.00')
+        self.client.get('/', {'q': 'phone'})
+        [event] = self.events
+        self.assertEqual((event.query, event.result_count), ('phone', 1))
+        self.assertIsNotNone(event.render_ms)
+
+    def test_browsing_records_nothing(self):
+        self.client.get('/')
+        self.assertEqual(self.events, [])
+
+    def test_failing_hook_does_not_break_the_search(self):
+        def broken(event):
+            raise RuntimeError('boom')
+
+        with mock.patch('home.instrumentation._hooks', [broken, self.events.append]):
+            with self.assertLogs('home.instrumentation', 'ERROR'):
+                record_search('phone', 1, 1.0, 2.0)
+        self.assertEqual(len(self.events), 1)
+
+    def test_timed_db_counts_queries_only_inside(self):
+        with timed_db() as timer:
+            list(Product.objects.all())
+        elapsed = timer.elapsed
+        self.assertGreater(elapsed, 0)
+        list(Product.objects.all())
+        self.assertEqual(timer.elapsed, elapsed)
+
+    def test_only_slow_searches_are_sampled(self):
+        sampler = SlowSearchSampler(threshold_ms=100, sample_rate=1.0, keep=2)
+        sampler(SearchEvent('fast', 1, 10.0, 10.0))
+        with self.assertLogs('home.instrumentation', 'WARNING'):
+            for query in ('a', 'b', 'c'):
+                sampler(SearchEvent(query, 1, 90.0, None if query == 'c' else 20.0))
+        # A streamed search has no render time, so only its DB time counts
+        self.assertEqual([event.query for event in sampler.recent], ['a', 'b'])
+
+
+class ContentPageCacheTests(TestCase):
+    def setUp(self):
+        get_page_cache().clear()
+        self.addCleanup(get_page_cache().clear)
+
+    def cache_fills(self, *requests):
+        """How many pages were rendered into the cache while running `requests`"""
+        misses = get_page_cache().misses
+        for request in requests:
+            request()
+        return get_page_cache().misses - misses
+
+    def test_page_is_rendered_once_and_revalidated(self):
+        first = self.client.get('/about/')
+        self.assertEqual(self.cache_fills(lambda: self.client.get('/about/')), 0)
+        second = self.client.get('/about/')
+        self.assertEqual((first.content, first['ETag']), (second.content, second['ETag']))
+        self.assertIn('must-revalidate', first['Cache-Control'])
+
+        response = self.client.get('/about/', headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_logged_in_visitors_get_their_own_private_copy(self):
+        anonymous = self.client.get('/help/')
+        user = User.objects.create_user(email='ann@example.com', full_name='Ann', password='pw', is_active=True)
+        self.client.force_login(user)
+        response = self.client.get('/help/')
+        self.assertNotEqual(response['ETag'], anonymous['ETag'])
+        self.assertIn('private', response['Cache-Control'])
+
+        # The logout form's CSRF token is filled in per visitor
+        other = self.client_class()
+        other.force_login(user)
+        other_response = other.get('/help/')
+        token = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+        self.assertNotEqual(token.search(response.content)[1], token.search(other_response.content)[1])
+        self.assertNotEqual(response['ETag'], other_response['ETag'])
+
+    def test_posts_and_disabled_cache_bypass_it(self):
+        self.assertEqual(self.cache_fills(lambda: self.client.post('/warranty/')), 0)
+        with self.settings(PAGE_CACHE={'ENABLED': False}):
+            self.assertEqual(self.cache_fills(lambda: self.client.get('/warranty/')), 0)
+        self.assertEqual(self.cache_fills(lambda: self.client.head('/warranty/'), lambda: self.client.get('/warranty/')), 1)
+
+
+class QueryPlanTests(TestCase):
+    """The indexes from 0008_indexes and account 0002_indexes serve the hot queries"""
+
+    def assertIndexed(self, queryset):
+        """No full scan and no temporary sort"""
+        sql, params = queryset.query.sql_with_params()
+        plan = explain(sql, params)
+        # "SCAN subquery..." reads a LIMITed inner result, as in the audit
+        scans = [line for line in plan if FULL_SCAN.match(line) and not line.startswith('SCAN subquery')]
+        problems = scans + [line for line in plan if TEMP_SORT.search(line)]
+        self.assertEqual(problems, [], plan)
+
+    def test_catalog_pages(self):
+        now = timezone.now()
+        products = Product.objects.order_by('-created_at', '-id')
+        self.assertIndexed(products[:25])
+        self.assertIndexed(products.filter(Q(created_at__lt=now) | Q(created_at=now, id__lt=10))[:25])
+        self.assertIndexed(Product.objects.filter(price__gte=25, price__lt=100))
+
+    def test_report_changelists(self):
+        reports = Report.objects.order_by('-created_at', '-id')
+        self.assertIndexed(reports[:100])
+        self.assertIndexed(reports.filter(subject='general')[:100])
+        # The admin's prefix search: bounded index walks, read back in primary key order
+        matches = prefix_matches(Report, 'default', ('email', 'name'), 'ann', 100)
+        self.assertIndexed(Report.objects.filter(pk__in=matches).order_by('-pk')[:100])
+
+    def test_user_changelists(self):
+        users = User.objects.order_by('-created_at')
+        self.assertIndexed(users[:100])
+        self.assertIndexed(users.filter(is_active=True)[:100])
+        matches = prefix_matches(User, 'default', ('email', 'full_name'), 'ann', 100)
+        self.assertIndexed(User.objects.filter(pk__in=matches).order_by('-pk')[:100])
+
+    def test_bounded_primary_key_walks_are_not_flagged(self):
+        self.assertTrue(is_bounded('SELECT * FROM t ORDER BY id LIMIT 10'))
+        self.assertFalse(is_bounded('SELECT * FROM t WHERE a = 1 ORDER BY id LIMIT 10'))
+
+
+class AsyncViewTests(TestCase):
+    """The ASGI twins (settings.ASYNC_VIEWS), called the way the async handler does"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.phone = Product.objects.create(title='Phone', description='A phone', price='1.00')
+
+    def call(self, view, method='get', path='/', data=None, **headers):
+        request = getattr(AsyncRequestFactory(), method)(path, data, headers=headers)
+        request.session = SessionBase()
+
+        async def auser():
+            return AnonymousUser()
+
+        request.auser = auser
+        request._messages = message_storage(request)
+        return async_to_sync(view)(request), request
+
+    def test_catalog_search_times_its_queries(self):
+        get_result_cache().clear()
+        events = []
+        with mock.patch('home.instrumentation._hooks', [events.append]):
+            response, _ = self.call(index_async, data={'q': 'phone'})
+        self.assertContains(response, 'Phone')
+        self.assertGreater(events[0].db_ms, 0)
+        self.assertEqual(self.call(index_async, data={'cursor': '!!!'})[0].status_code, 400)
+
+    def test_content_page_is_cached(self):
+        get_page_cache().clear()
+        first, _ = self.call(services_async)
+        self.assertEqual(first.status_code, 200)
+        response, _ = self.call(services_async, **{'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_report_is_queued(self):
+        data = {
+            'firstName': 'Ann', 'lastName': 'Bee', 'email': 'ann@example.com', 'subject': 'general',
+            'message': 'Hello there, this is a message.', 'privacy': 'on',
+        }
+        with mock.patch('home.views.aingest_report', new_callable=mock.AsyncMock) as aingest:
+            response, request = self.call(report_async, 'post', '/report/', data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(aingest.await_args.args[0]['name'], 'Ann Bee')
+
+        with mock.patch('home.views.aingest_report', new_callable=mock.AsyncMock) as aingest:
+            response, request = self.call(report_async, 'post', '/report/', {**data, 'email': 'nope'})
+        aingest.assert_not_awaited()
+        self.assertEqual([str(message) for message in get_messages(request)], ['Please enter a valid email address.'])
+
+
+class BenchHelperTests(TestCase):
+    def test_seed_catalog(self):
+        seed_catalog(7, users=3, reports=2, batch_size=4)
+        self.assertEqual(Product.objects.count(), 7)
+        self.assertEqual(User.objects.filter(email__startswith='bench').count(), 3)
+        self.assertEqual(Report.objects.count(), 2)
+
+    def test_bad_password_logins_are_not_throttled(self):
+        seed_catalog(0, users=3)
+        failures = []
+
+        def record_failure(**kwargs):
+            failures.append(kwargs['credentials'])
+
+        user_login_failed.connect(record_failure)
+        self.addCleanup(user_login_failed.disconnect, record_failure)
+        throttle = LoginThrottle(THROTTLE_DEFAULTS)
+        login = dict(client_scenarios(Client(), users=3))['login_post_bad_password']
+        with mock.patch('account.authentication.get_login_throttle', return_value=throttle), \
+                mock.patch('account.authentication._check_password', return_value=False):
+            for _ in range(12):
+                login()
+        # Throttled attempts are refused before user_login_failed is sent
+        self.assertEqual(len(failures), 12)
+
+    def test_percentiles(self):
+        samples = list(range(1, 101))
+        self.assertEqual([percentile(samples, pct) for pct in (50, 95, 99, 100)], [50, 95, 99, 100])
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(summarize([])['p99_ms'], None)
+
+    def test_measure_calls_counts_queries(self):
+        result = measure_calls(lambda: list(Product.objects.all()), 4, memory_samples=1)
+        self.assertEqual(result['requests'], 4)
+        self.assertEqual(result['queries_per_request'], 1)
+        self.assertGreater(result['peak_memory_kb'], 0)
+
+    def test_results_are_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, 'nested', 'run.json')
+            write_results(path, {'at': timezone.now()})
+            self.assertIn('at', json.loads(path.read_text()))
+
+
+class BenchLoadTests(SimpleTestCase):
+    def test_http_load(self):
+        def application(environ, start_response):
+            status = '200 OK' if environ['PATH_INFO'] == '/' else '404 Not Found'
+            start_response(status, [('Content-Type', 'text/plain')])
+            return [b'ok']
+
+        with local_server(application) as base_url:
+            result = http_load(base_url + '/', 20, 4)
+            missing = http_load(base_url + '/missing', 3, 2)
+        self.assertEqual((result['requests'], result['errors'], result['concurrency']), (20, 0, 4))
+        self.assertGreater(result['throughput_rps'], 0)
+        # HTTPError is an OSError: failed requests count as errors, not latencies
+        self.assertEqual((missing['requests'], missing['errors']), (0, 3))
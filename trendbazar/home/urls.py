@@ -1,14 +1,20 @@
 from django.urls import path
+from django.conf import settings
 from home import views
+
+# Under ASGI (settings.ASYNC_VIEWS) the async twins serve the same URLs
+def _view(name):
+    return getattr(views, f'{name}_async' if settings.ASYNC_VIEWS else name)
+
 urlpatterns = [
-    path("", views.index, name='index'),
-    path("services/", views.services, name='services'),
-    path("help/", views.help, name='help'), 
-    path("contact-us/", views.contact_us, name='contact_us'),
-    path("about/", views.about, name='about'), 
-    path("terms-of-use/", views.terms_of_use, name='terms_of_use'),
-    path("privacy-policy/", views.privacy, name='privacy'),
-    path("return/", views.return_policy, name='return'),
-    path("report/", views.report, name='report'),
-    path("warranty/", views.warranty, name='warranty'),
-]
\ No newline at end of file
+    path("", _view('index'), name='index'),
+    path("services/", _view('services'), name='services'),
+    path("help/", _view('help'), name='help'), 
+    path("contact-us/", _view('contact_us'), name='contact_us'),
+    path("about/", _view('about'), name='about'), 
+    path("terms-of-use/", _view('terms_of_use'), name='terms_of_use'),
+    path("privacy-policy/", _view('privacy'), name='privacy'),
+    path("return/", _view('return_policy'), name='return'),
+    path("report/", _view('report'), name='report'),
+    path("warranty/", _view('warranty'), name='warranty'),
+]
@@ -1,146 +1,221 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.http import HttpResponse
-from django.db.models import Q
-from .models import Report, Product
-import re
-import logging
-
-# Configure logging
-logger = logging.getLogger(__name__)
-
-def index(request):
+from django.conf import settings
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from .models import Product
+from .pagination import keyset_page, ranked_page, InvalidCursor
+from .search_cache import cached_search, CARD_FIELDS
+from .instrumentation import record_search, timed_db
+from .ingest import ingest_report, aingest_report
+from .page_cache import cached_page
+from trendbazar.db import read_only
+from trendbazar.validation import CONTACT_FORM, REPORT_RECORD
+import time
+
+PRODUCTS_STREAM_MARKER = '<!--products-stream-->'
+
+def _stream_products(request, template_name, context):
+    """Yield the page in pieces: everything before the grid, the cards in chunks, then the rest"""
+    head, tail = '', ''
+    if template_name != 'products_partial.html':
+        page = render_to_string(template_name, {**context, 'stream_marker': PRODUCTS_STREAM_MARKER}, request)
+        head, _, tail = page.partition(PRODUCTS_STREAM_MARKER)
+
+    chunk_size = getattr(settings, 'PRODUCTS_STREAM_CHUNK_SIZE', 12)
+    products = context['products']
+    yield head
+    for start in range(0, max(len(products), 1), chunk_size):
+        is_last = start + chunk_size >= len(products)
+        yield render_to_string('products_partial.html', {
+            **context,
+            'products': products[start:start + chunk_size],
+            # The "load more" link belongs after the final chunk only
+            'next_cursor': context['next_cursor'] if is_last else None,
+        }, request)
+    yield tail
+
+def _catalog_page(request):
+    """
+    (context, search result or None, DB ms) for the page of products the
+    request asks for; raises InvalidCursor.
+    """
     query = request.GET.get('q', '').strip()  # Strip leading/trailing spaces
+    products = Product.objects.only(*CARD_FIELDS)
 
-    if query:
-        # Log the raw query
-        logger.info(f"Raw search query: '{query}'")
-
-        # Search by product title (case insensitive)
-        products = Product.objects.filter(title__icontains=query)
-        
-        # Log the query and results
-        logger.info(f"Query: '{query}'")
-        logger.info(f"Products found: {[product.title for product in products]}")
-    else:
-        # Show all products if no search query
-        products = Product.objects.all()
-        logger.info("No search query provided. Showing all products.")
+    page_size = getattr(settings, 'PRODUCTS_PAGE_SIZE', 24)
+    cursor = request.GET.get('cursor')
+
+    result = None
+    with timed_db() as db_timer:
+        if query:
+            # Ranked full-text search over title and description
+            result = cached_search(query)
+            products, next_cursor = ranked_page(products, result.ids, cursor, page_size, known=result.products)
+        else:
+            products, next_cursor = keyset_page(products, cursor, page_size)
 
     context = {
         'products': products,
         'query': query,
+        'next_cursor': next_cursor,
     }
+    return context, result, db_timer.ms
+
+def _render_catalog(request, context, result, db_ms, stream):
+    query = context['query']
 
     # If it's an AJAX request, return just the products grid
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return render(request, 'products_partial.html', context)
-
-    return render(request, 'index.html', context)
-
-def services(request):
-    return render(request, 'services.html')
+        template_name = 'products_partial.html'
+    else:
+        template_name = 'index.html'
+
+    if getattr(settings, 'PRODUCTS_STREAMING', False):
+        if query:
+            record_search(query, len(result.ids), db_ms, None)
+        # The page renders after the middleware has returned, so the session
+        # (Vary: Cookie) and the CSRF cookie have to be touched before then
+        request.user.is_authenticated
+        get_token(request)
+        return StreamingHttpResponse(stream(request, template_name, context))
+
+    started = time.perf_counter()
+    response = render(request, template_name, context)
+    if query:
+        record_search(query, len(result.ids), db_ms, (time.perf_counter() - started) * 1000)
+    return response
 
-def help(request):
-    return render(request, 'help.html')
+@read_only
+def index(request):
+    try:
+        context, result, db_ms = _catalog_page(request)
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
+    return _render_catalog(request, context, result, db_ms, _stream_products)
+
+async def _astream_products(request, template_name, context):
+    # An async iterator, so ASGI does not drain a sync generator in a thread
+    for chunk in _stream_products(request, template_name, context):
+        yield chunk
+
+@read_only
+async def index_async(request):
+    """index() for ASGI workers"""
+    try:
+        # Every query in one trip to the request's sync thread. Connections
+        # belong to the thread that uses them, so timed_db() has to run there.
+        context, result, db_ms = await sync_to_async(_catalog_page)(request)
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
+
+    # The header reads request.user, which would load the session synchronously
+    request.user = await request.auser()
+    return _render_catalog(request, context, result, db_ms, _astream_products)
+
+def _content_page(name, template_name):
+    """A cached view rendering `template_name`, and its async twin for ASGI (settings.ASYNC_VIEWS)"""
+    def view(request):
+        return render(request, template_name)
+
+    async def async_view(request):
+        return render(request, template_name)
+
+    for function in (view, async_view):
+        function.__name__ = function.__qualname__ = name
+    return cached_page(view), cached_page(async_view)
+
+services, services_async = _content_page('services', 'services.html')
+help, help_async = _content_page('help', 'help.html')
+about, about_async = _content_page('about', 'about_us.html')
+terms_of_use, terms_of_use_async = _content_page('terms_of_use', 'terms.html')
+privacy, privacy_async = _content_page('privacy', 'privacy.html')
+return_policy, return_policy_async = _content_page('return_policy', 'return.html')
+warranty, warranty_async = _content_page('warranty', 'warranty.html')
+contact_us, contact_us_async = _content_page('contact_us', 'contact_us.html')
 
-def about(request):
-    return render(request, 'about_us.html')
+def validate_form_data(data):
+    """Validate form data and return list of errors"""
+    # The record is checked against the same rules spool recovery applies,
+    # so nothing accepted here is dropped after a crash
+    return CONTACT_FORM.errors(data) or REPORT_RECORD.errors(_report_fields(data))
+
+def _report_form_data(request):
+    return {
+        'firstName': request.POST.get('firstName', '').strip(),
+        'lastName': request.POST.get('lastName', '').strip(),
+        'email': request.POST.get('email', '').strip(),
+        'phone': request.POST.get('phone', '').strip(),
+        'subject': request.POST.get('subject', ''),
+        'address': request.POST.get('address', '').strip(),
+        'message': request.POST.get('message', '').strip(),
+        'newsletter': 'newsletter' in request.POST,
+        'privacy': 'privacy' in request.POST,
+    }
 
-def terms_of_use(request):
-    return render(request, 'terms.html')
+def _report_fields(form_data):
+    return {
+        'name': f"{form_data['firstName']} {form_data['lastName']}",
+        'email': form_data['email'],
+        'phone': form_data['phone'],
+        'subject': form_data['subject'],
+        'message': form_data['message'],
+        'address': form_data['address'],
+    }
 
-def privacy(request):
-    return render(request, 'privacy.html')
+REPORT_SUCCESS = 'Thank you! Your message has been sent successfully. We will get back to you within 24 hours.'
 
-def return_policy(request):
-    return render(request, 'return.html')
+def _report_response(request, form_data, errors, error=None):
+    """The response to a POSTed report once it was validated and, when valid, queued"""
+    if errors:
+        # If there are validation errors, show them
+        for message in errors:
+            messages.error(request, message)
 
-def warranty(request):
-    return render(request, 'warranty.html')
+        # Return form with submitted data to preserve user input
+        return render(request, 'report.html', {'form_data': form_data})
 
-def contact_us(request):
-    return render(request, 'contact_us.html')
+    if error is not None:
+        messages.error(request, f'Sorry, there was an error saving your message: {str(error)}')
+        return render(request, 'report.html', {})
 
-def validate_form_data(data):
-    """Validate form data and return list of errors"""
-    errors = []
-    
-    # Validate required fields
-    if not data['firstName'] or len(data['firstName']) < 2:
-        errors.append('First name is required and must be at least 2 characters.')
-    
-    if not data['lastName'] or len(data['lastName']) < 2:
-        errors.append('Last name is required and must be at least 2 characters.')
-    
-    if not data['email']:
-        errors.append('Email address is required.')
-    elif not re.match(r'^[^\s@]+@[^\s@]+\.[^\s@]+$', data['email']):
-        errors.append('Please enter a valid email address.')
-    
-    if data['phone'] and not re.match(r'^[\d\s\-\+\(\)]{10,}$', data['phone']):
-        errors.append('Please enter a valid phone number.')
-    
-    if not data['subject']:
-        errors.append('Please select a subject.')
-    
-    if not data['message'] or len(data['message']) < 10:
-        errors.append('Message is required and must be at least 10 characters.')
-    elif len(data['message']) > 1000:
-        errors.append('Message cannot exceed 1000 characters.')
-    
-    if not data['privacy']:
-        errors.append('You must agree to the Privacy Policy and Terms of Use.')
-    
-    return errors
+    # Show success message
+    messages.success(request, REPORT_SUCCESS)
+    return redirect('report')  # Redirect to prevent resubmission
 
 def report(request):
     """Handle report/contact form GET and POST requests"""
-    
-    if request.method == 'POST':
-        # Get form data from POST request
-        form_data = {
-            'firstName': request.POST.get('firstName', '').strip(),
-            'lastName': request.POST.get('lastName', '').strip(),
-            'email': request.POST.get('email', '').strip(),
-            'phone': request.POST.get('phone', '').strip(),
-            'subject': request.POST.get('subject', ''),
-            'address': request.POST.get('address', '').strip(),
-            'message': request.POST.get('message', '').strip(),
-            'newsletter': 'newsletter' in request.POST,
-            'privacy': 'privacy' in request.POST,
-        }
-        
-        # Validate form data FIRST
-        errors = validate_form_data(form_data)
-        
-        if not errors:
-            try:
-                # Save to database (only once and after validation)
-                full_name = f"{form_data['firstName']} {form_data['lastName']}"
-                report_instance = Report(
-                    name=full_name,
-                    email=form_data['email'],
-                    phone=form_data['phone'],
-                    subject=form_data['subject'],
-                    message=form_data['message'],
-                    address=form_data['address']
-                )
-                report_instance.save()
-                
-                # Show success message
-                messages.success(request, 'Thank you! Your message has been sent successfully. We will get back to you within 24 hours.')
-                return redirect('report')  # Redirect to prevent resubmission
-                
-            except Exception as e:
-                messages.error(request, f'Sorry, there was an error saving your message: {str(e)}')
-        else:
-            # If there are validation errors, show them
-            for error in errors:
-                messages.error(request, error)
-            
-            # Return form with submitted data to preserve user input
-            return render(request, 'report.html', {'form_data': form_data})
-    
-    # GET request - show empty form
-    return render(request, 'report.html', {})
\ No newline at end of file
+    if request.method != 'POST':
+        # GET request - show empty form
+        return render(request, 'report.html', {})
+
+    # Validate form data FIRST
+    form_data = _report_form_data(request)
+    errors = validate_form_data(form_data)
+    error = None
+    if not errors:
+        try:
+            # Queue for a batched write (only once and after validation)
+            ingest_report(_report_fields(form_data))
+        except Exception as e:
+            error = e
+    return _report_response(request, form_data, errors, error)
+
+async def report_async(request):
+    """report() for ASGI workers"""
+    # The header reads request.user, which would load the session synchronously
+    request.user = await request.auser()
+    if request.method != 'POST':
+        return render(request, 'report.html', {})
+
+    form_data = _report_form_data(request)
+    errors = validate_form_data(form_data)
+    error = None
+    if not errors:
+        try:
+            await aingest_report(_report_fields(form_data))
+        except Exception as e:
+            error = e
+    return _report_response(request, form_data, errors, error)
@@ -1,4 +1,5 @@
 // Shopping Cart JavaScript with Local Storage
+// Logged-in users get a server-side cart (cart app); changes are sent in batches.
 class ShoppingCart {
     constructor() {
         this.cart = this.loadCartFromStorage();
@@ -9,9 +10,94 @@ class ShoppingCart {
         this.cartItems = document.getElementById('cartItems');
         this.cartTotal = document.getElementById('cartTotal');
         this.clearCartBtn = document.getElementById('clearCart');
+
+        this.apiUrl = this.cartModal.dataset.cartApi;
+        this.mergeUrl = this.cartModal.dataset.cartMerge;
+        this.pendingChanges = {};
+        this.syncTimeout = null;
         
         this.initializeEventListeners();
         this.updateCartDisplay();
+
+        if (this.apiUrl) {
+            this.loadServerCart();
+        }
+    }
+
+    // Read a cookie value (used for the CSRF token)
+    getCookie(name) {
+        const match = document.cookie.match(new RegExp('(?:^|; )' + name + '=([^;]*)'));
+        return match ? decodeURIComponent(match[1]) : null;
+    }
+
+    // Call the cart API and adopt the cart it returns; failures are logged and rethrown
+    requestServerCart(url, method, body) {
+        const options = {
+            method: method,
+            headers: {'X-CSRFToken': this.getCookie('csrftoken') || ''},
+        };
+        if (body) {
+            options.headers['Content-Type'] = 'application/json';
+            options.body = JSON.stringify(body);
+        }
+        return fetch(url, options)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                this.cart = data.items.map(item => ({...item, id: String(item.id)}));
+                this.updateCartDisplay();
+            })
+            .catch(error => {
+                console.error('Cart sync error:', error);
+                throw error;
+            });
+    }
+
+    // Send a batch of changes; a failed sync is only logged
+    syncServerCart(url, method, body) {
+        return this.requestServerCart(url, method, body).catch(() => {});
+    }
+
+    // Load the server cart; a cart saved in localStorage before login is merged in one call
+    loadServerCart() {
+        const localCart = this.loadCartFromStorage();
+        if (localCart.length === 0) {
+            return this.syncServerCart(this.apiUrl, 'GET');
+        }
+        // GET first so the CSRF cookie exists for the merge POST. The local
+        // cart is only dropped once the server has accepted it.
+        return this.requestServerCart(this.apiUrl, 'GET')
+            .then(() => this.requestServerCart(this.mergeUrl, 'POST', {
+                items: localCart.map(item => ({id: item.id, quantity: item.quantity})),
+            }))
+            .then(() => localStorage.removeItem('trendBazarCart'))
+            .catch(() => {});
+    }
+
+    // Remember the new quantity of a product and send all pending changes together
+    queueServerChange(productId, quantity) {
+        this.pendingChanges[productId] = quantity;
+        clearTimeout(this.syncTimeout);
+        this.syncTimeout = setTimeout(() => {
+            const items = Object.entries(this.pendingChanges)
+                .map(([id, qty]) => ({id: id, quantity: qty}));
+            this.pendingChanges = {};
+            this.syncServerCart(this.apiUrl, 'POST', {mode: 'set', items: items});
+        }, 300);
+    }
+
+    // Persist the cart after a change to `productId`
+    persistChange(productId) {
+        if (!this.apiUrl) {
+            this.saveCartToStorage();
+            return;
+        }
+        const item = this.cart.find(item => item.id === productId);
+        this.queueServerChange(productId, item ? item.quantity : 0);
     }
 
     // Initialize all event listeners
@@ -77,7 +163,7 @@ class ShoppingCart {
             this.showNotification(`${productName} added to cart!`, 'success');
         }
 
-        this.saveCartToStorage();
+        this.persistChange(productId);
         this.updateCartDisplay();
         this.animateCartButton();
     }
@@ -85,7 +171,7 @@ class ShoppingCart {
     // Remove item from cart
     removeFromCart(productId) {
         this.cart = this.cart.filter(item => item.id !== productId);
-        this.saveCartToStorage();
+        this.persistChange(productId);
         this.updateCartDisplay();
         this.showNotification('Item removed from cart!', 'info');
     }
@@ -98,7 +184,7 @@ class ShoppingCart {
                 this.removeFromCart(productId);
             } else {
                 item.quantity = newQuantity;
-                this.saveCartToStorage();
+                this.persistChange(productId);
                 this.updateCartDisplay();
             }
         }
@@ -113,7 +199,13 @@ class ShoppingCart {
         
         if (confirm('Are you sure you want to clear your cart?')) {
             this.cart = [];
-            this.saveCartToStorage();
+            if (this.apiUrl) {
+                this.pendingChanges = {};
+                clearTimeout(this.syncTimeout);
+                this.syncServerCart(this.apiUrl, 'DELETE');
+            } else {
+                this.saveCartToStorage();
+            }
             this.updateCartDisplay();
             this.showNotification('Cart cleared!', 'info');
         }
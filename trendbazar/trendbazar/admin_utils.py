@@ -0,0 +1,130 @@
+"""
+Admin changelists that stay fast on tables with millions of rows.
+
+The stock changelist runs COUNT(*) twice per page view and searches with
+LIKE '%term%' over every search field, all of which read the whole table.
+"""
+import string
+import sys
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.main import SEARCH_VAR
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+from django.utils.functional import cached_property
+
+
+def estimate_rows(queryset):
+    """Approximate row count of the queryset's table without reading it"""
+    model = queryset.model
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+    # Auto-increment keys: the largest one is an index lookup, and only overestimates after deletes
+    return queryset.model._default_manager.using(queryset.db).aggregate(last=Max('pk'))['last'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Estimates the count of an unfiltered changelist, and stops counting a
+    filtered one at ADMIN_COUNT_LIMIT rows. Pages past the limit are not
+    offered; narrow the filter to reach them.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            return estimate_rows(queryset)
+        limit = getattr(settings, 'ADMIN_COUNT_LIMIT', 10000)
+        # Ordering does not change the count, and dropping it avoids a sort in the subquery
+        return queryset.order_by()[:limit].count()
+
+
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def fold_case(value, vendor):
+    """Lowercase `value` the way the database's LOWER() does; SQLite's only folds ASCII"""
+    if vendor == 'sqlite':
+        return value.translate(ASCII_LOWER)
+    return value.lower()
+
+
+def prefix_successor(prefix):
+    """The smallest string after every string starting with `prefix`, in code point order; None if unbounded"""
+    while prefix:
+        code = ord(prefix[-1]) + 1
+        if 0xD800 <= code <= 0xDFFF:
+            # Surrogates cannot be stored as text
+            code = 0xE000
+        if code <= sys.maxunicode:
+            return prefix[:-1] + chr(code)
+        prefix = prefix[:-1]
+    return None
+
+
+def prefix_range(field, prefix):
+    """Case-insensitive startswith as a range over the `<field>_lower` alias, so a Lower() index can serve it"""
+    condition = Q(**{f'{field}_lower__gte': prefix})
+    upper = prefix_successor(prefix)
+    if upper is not None:
+        condition &= Q(**{f'{field}_lower__lt': upper})
+    return condition
+
+
+def prefix_matches(model, using, fields, prefix, limit):
+    """
+    Primary keys of rows where any of `fields` starts with `prefix` (already
+    case-folded), as a subquery: a walk of each Lower(field) index that stops
+    after `limit` rows, so a broad prefix costs at most len(fields) * limit.
+    """
+    parts, params = [], []
+    for i, field in enumerate(fields):
+        alias = f'{field}_lower'
+        matches = (
+            model._default_manager.using(using)
+            .alias(**{alias: Lower(field)})
+            .filter(prefix_range(field, prefix))
+            .order_by(alias)
+            .values('pk')[:limit]
+        )
+        sql, field_params = matches.query.sql_with_params()
+        parts.append(f'SELECT * FROM ({sql}) AS subquery_prefix_{i}')
+        params.extend(field_params)
+    return RawSQL(' UNION '.join(parts), params)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin for big tables: estimated counts, no second unfiltered count,
+    and search by prefix over `prefix_search_fields`, each of which needs an
+    index on Lower(field). Searches match at most ADMIN_COUNT_LIMIT rows per
+    field and list them newest first by primary key.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    prefix_search_fields = ()
+
+    def get_ordering(self, request):
+        # The primary key order reads the matched keys back without sorting the rows
+        if self.prefix_search_fields and request.GET.get(SEARCH_VAR, '').strip():
+            return ('-pk',)
+        return super().get_ordering(request)
+
+    def get_search_results(self, request, queryset, search_term):
+        prefix = search_term.strip()
+        if not prefix or not self.prefix_search_fields:
+            return super().get_search_results(request, queryset, search_term)
+        prefix = fold_case(prefix, connections[queryset.db].vendor)
+        limit = getattr(settings, 'ADMIN_COUNT_LIMIT', 10000)
+        matches = prefix_matches(queryset.model, queryset.db, self.prefix_search_fields, prefix, limit)
+        return queryset.filter(pk__in=matches), False
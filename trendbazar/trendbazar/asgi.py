@@ -12,5 +12,14 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'trendbazar.settings')
+# Under ASGI, login hashes passwords in a thread pool instead of blocking the event loop
+os.environ.setdefault('TRENDBAZAR_ASYNC_LOGIN', '1')
+# ...and the home app's views run natively on the event loop
+os.environ.setdefault('TRENDBAZAR_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
+
+# Parse every template now rather than on the first requests (see TEMPLATE_WARMUP)
+from trendbazar.template_warmup import warm_up  # noqa: E402
+
+warm_up()
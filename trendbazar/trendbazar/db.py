@@ -0,0 +1,68 @@
+"""
+Database tuning: SQLite pragmas applied on connect, and an optional read
+replica that read-only views query instead of the primary.
+"""
+import inspect
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+REPLICA = 'replica'
+
+_read_only = ContextVar('read_only_view', default=False)
+
+
+def sqlite_init_command(pragmas):
+    """OPTIONS['init_command'] running one PRAGMA per entry on every new connection"""
+    return ';'.join(f'PRAGMA {name}={value}' for name, value in pragmas.items())
+
+
+def read_only(view):
+    """Let the queries `view` makes for REPLICA_APPS models go to the replica, when one is configured"""
+    if inspect.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            token = _read_only.set(True)
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _read_only.reset(token)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return wrapper
+
+
+class ReadReplicaRouter:
+    """
+    Reads inside read_only views go to the replica; everything else, writes
+    included, uses the primary. Only REPLICA_APPS are routed, so sessions and
+    users, which must see a login immediately, never read a lagging copy.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            _read_only.get()
+            and REPLICA in settings.DATABASES
+            and model._meta.app_label in getattr(settings, 'REPLICA_APPS', ('home',))
+        ):
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The replica is a copy of the primary, kept up to date outside Django
+        return db != REPLICA
@@ -0,0 +1,233 @@
+"""
+Per-request profiling: query counts, duplicate queries, DB time, template
+render time and total time, aggregated per URL name.
+
+Only a sampled share of requests is profiled (PROFILING['SAMPLE_RATE']),
+so the middleware can stay enabled in production.
+"""
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import JsonResponse
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template as DjangoTemplate, reraise
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 0.01,
+    'SERVER_TIMING': True,
+    'TOP_DUPLICATES': 10,
+}
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_current = ContextVar('profiling_request', default=None)
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'PROFILING', {})}
+
+
+class RequestProfile:
+    """Measurements for one sampled request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.signatures = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook; `sql` still has its placeholders,
+        # so the same statement with other parameters shares a signature
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.signatures[sql] += 1
+
+    def duplicates(self):
+        return {sql: count for sql, count in self.signatures.items() if count > 1}
+
+
+class ProfileStats:
+    """Thread-safe in-memory aggregate of the sampled requests, per URL name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._views = defaultdict(lambda: {
+                'requests': 0,
+                'total_ms': 0.0,
+                'db_ms': 0.0,
+                'template_ms': 0.0,
+                'queries': 0,
+                'max_queries': 0,
+                'histogram': [0] * (len(BUCKETS_MS) + 1),
+                'duplicates': Counter(),
+            })
+
+    def add(self, name, profile, total):
+        total_ms = total * 1000
+        with self._lock:
+            view = self._views[name]
+            view['requests'] += 1
+            view['total_ms'] += total_ms
+            view['db_ms'] += profile.db_time * 1000
+            view['template_ms'] += profile.template_time * 1000
+            view['queries'] += profile.queries
+            view['max_queries'] = max(view['max_queries'], profile.queries)
+            view['histogram'][bisect_left(BUCKETS_MS, total_ms)] += 1
+            view['duplicates'].update(profile.duplicates())
+
+    def snapshot(self, top_duplicates):
+        with self._lock:
+            result = {}
+            for name, view in self._views.items():
+                requests = view['requests']
+                result[name] = {
+                    'requests': requests,
+                    'mean_total_ms': round(view['total_ms'] / requests, 3),
+                    'mean_db_ms': round(view['db_ms'] / requests, 3),
+                    'mean_template_ms': round(view['template_ms'] / requests, 3),
+                    'mean_queries': round(view['queries'] / requests, 2),
+                    'max_queries': view['max_queries'],
+                    'histogram_ms': {
+                        **{f'<={bound}': count for bound, count in zip(BUCKETS_MS, view['histogram'])},
+                        f'>{BUCKETS_MS[-1]}': view['histogram'][-1],
+                    },
+                    'duplicate_queries': [
+                        {'sql': sql, 'count': count}
+                        for sql, count in view['duplicates'].most_common(top_duplicates)
+                    ],
+                }
+            return result
+
+
+stats = ProfileStats()
+
+class TimedTemplate(DjangoTemplate):
+    """Adds its render time to the request being profiled, if any"""
+
+    def render(self, context=None, request=None):
+        profile = _current.get()
+        if profile is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            profile.template_time += time.perf_counter() - started
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """
+    The DjangoTemplates backend with timed templates (TEMPLATES BACKEND).
+    Timing at the backend wrapper counts each top-level template once, as
+    render() and render_to_string() go through it but {% include %} does not.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class ProfilingMiddleware:
+    # Both, so async views under ASGI are not pushed back onto a thread
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.options = get_options()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            with self.wrap_connections(profile):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        # Connections belong to a thread, and the ORM runs on the request's
+        # sync thread (sync_to_async), so the wrappers go on that thread's
+        wrappers = await sync_to_async(self.wrap_connections)(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrappers.close)()
+            _current.reset(token)
+        return self.finish(request, response, profile, time.perf_counter() - started)
+
+    def sampled(self):
+        return self.options['ENABLED'] and random.random() < self.options['SAMPLE_RATE']
+
+    def wrap_connections(self, profile):
+        stack = ExitStack()
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(profile))
+        return stack
+
+    def finish(self, request, response, profile, total):
+        match = request.resolver_match
+        name = (match.view_name if match else None) or 'unresolved'
+        stats.add(name, profile, total)
+
+        if self.options['SERVER_TIMING']:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={profile.db_time * 1000:.2f};desc="{profile.queries} queries"',
+                f'tpl;dur={profile.template_time * 1000:.2f}',
+                f'total;dur={total * 1000:.2f}',
+            ])
+        return response
+
+
+@staff_member_required
+def profiling_stats(request):
+    """Aggregated profile of the sampled requests; ?reset=1 starts over"""
+    options = get_options()
+    data = {
+        'sample_rate': options['SAMPLE_RATE'],
+        'views': stats.snapshot(options['TOP_DUPLICATES']),
+    }
+    if request.GET.get('reset'):
+        stats.reset()
+    return JsonResponse(data)
@@ -0,0 +1,42 @@
+"""
+Session engines that only write when the session data actually changed.
+
+Django saves a session whenever it is marked modified, which includes
+setting a key to the value it already holds or popping a key that is not
+there. These stores compare the data against what was loaded and skip the
+write (a cookie re-sign, a cache set or a django_session UPDATE) when it is
+the same. Point SESSION_ENGINE at trendbazar.sessions.signed_cookies,
+.cache or .db.
+"""
+
+
+class WriteOnChangeMixin:
+    _loaded = None
+
+    def _snapshot(self, data):
+        return self.serializer().dumps(data)
+
+    def _remember(self, data):
+        self._loaded = self._snapshot(data)
+        return data
+
+    def _unchanged(self):
+        return self._loaded is not None and self._snapshot(self._get_session(no_load=True)) == self._loaded
+
+    def load(self):
+        return self._remember(super().load())
+
+    async def aload(self):
+        return self._remember(await super().aload())
+
+    def save(self, must_create=False):
+        if not must_create and self.session_key and self._unchanged():
+            return
+        super().save(must_create=must_create)
+        self._remember(self._get_session(no_load=True))
+
+    async def asave(self, must_create=False):
+        if not must_create and self.session_key and self._unchanged():
+            return
+        await super().asave(must_create=must_create)
+        self._remember(self._get_session(no_load=True))
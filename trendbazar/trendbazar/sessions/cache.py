@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import cache
+
+from . import WriteOnChangeMixin
+
+
+class SessionStore(WriteOnChangeMixin, cache.SessionStore):
+    pass
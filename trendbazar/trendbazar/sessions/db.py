@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import db
+
+from . import WriteOnChangeMixin
+
+
+class SessionStore(WriteOnChangeMixin, db.SessionStore):
+    pass
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.contrib.sessions.backends import signed_cookies
+from django.core.exceptions import ImproperlyConfigured
+
+from . import WriteOnChangeMixin
+
+# Nothing is stored server-side, so the session is only as safe as the signing key
+if settings.SECRET_KEY.startswith('django-insecure-'):
+    raise ImproperlyConfigured(
+        "Signed-cookie sessions need a private SECRET_KEY; set DJANGO_SECRET_KEY "
+        "or use SESSION_BACKEND=db"
+    )
+
+
+class SessionStore(WriteOnChangeMixin, signed_cookies.SessionStore):
+    pass
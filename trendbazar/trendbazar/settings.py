@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 
+from trendbazar.db import sqlite_init_command
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -21,12 +23,16 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # SECURITY WARNING: keep the secret key used in production secret!
 import os
-from dotenv import load_dotenv
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-load_dotenv(BASE_DIR / '.env')
+# Deployments set the environment directly; skip importing dotenv when there is no .env
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / '.env')
 
-SECRET_KEY = 'django-insecure-o%+ic-l4sw&-h3f!vz4pw_wh$*4f&0s4ecropz@y(0%egm4tl4'
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY', 'django-insecure-o%+ic-l4sw&-h3f!vz4pw_wh$*4f&0s4ecropz@y(0%egm4tl4'
+)
 
 # DEBUG = os.environ.get('DJANGO_DEBUG', 'True') == 'True'
 #if not SECRET_KEY:
@@ -48,11 +54,13 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'home',
     'account',
-    'social_django',
+    'cart',
+    'account.social.SocialAuthConfig',  # social_django, loading its OAuth stack on first use
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'trendbazar.profiling.ProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -100,20 +108,49 @@ LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/login/'
 
+# Sessions: 'db' is the django_session table; 'cache' uses SESSION_CACHE_ALIAS,
+# which must be a cache shared by every worker; 'cookie' keeps the (small)
+# session in a signed, compressed cookie and needs no storage, but a copied
+# cookie stays valid after logout and it requires DJANGO_SECRET_KEY to be set.
+# Switching backends logs every user out. All three only write when the
+# session data changed (trendbazar.sessions).
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'db')
+SESSION_ENGINE = {
+    'cookie': 'trendbazar.sessions.signed_cookies',
+    'cache': 'trendbazar.sessions.cache',
+    'db': 'trendbazar.sessions.db',
+}[SESSION_BACKEND]
+SESSION_CACHE_ALIAS = 'default'
+# Flash messages ride in their own signed cookie instead of the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates with render timing for ProfilingMiddleware
+        'BACKEND': 'trendbazar.profiling.ProfiledDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [BASE_DIR / "templates",],
-        'APP_DIRS': True,
+        'APP_DIRS': False,  # app directories are searched by the loaders below
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Parse each template once per process; runserver's autoreloader
+            # still clears this cache when a template file changes
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
+# Compile templates when wsgi.py/asgi.py load (trendbazar.template_warmup):
+# True for all of them, False to skip, or a list of name prefixes
+TEMPLATE_WARMUP = True
 
 WSGI_APPLICATION = 'trendbazar.wsgi.application'
 
@@ -121,13 +158,46 @@ WSGI_APPLICATION = 'trendbazar.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite tuning (trendbazar.db). WAL lets readers carry on while a write is in
+# progress; synchronous=NORMAL is durable in WAL mode except on power loss.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -32 * 1024,  # negative: KiB per connection
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep connections open between requests instead of reopening the file each time
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': sqlite_init_command(SQLITE_PRAGMAS),
+            # Take the write lock up front so concurrent writers queue instead of failing
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
+# Optional read replica, e.g. a copy kept current by litestream; read_only views use it
+if os.environ.get('DATABASE_REPLICA'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['DATABASE_REPLICA'],
+        'OPTIONS': {
+            **DATABASES['default']['OPTIONS'],
+            'init_command': sqlite_init_command({**SQLITE_PRAGMAS, 'query_only': 'ON'}),
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['trendbazar.db.ReadReplicaRouter']
+REPLICA_APPS = ('home',)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -147,6 +217,33 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing policy (account.hashers). Pick the cost with
+# `manage.py bench_password_hashers`; None keeps Django's default.
+# Old hashes are upgraded to this policy on the next successful login.
+PASSWORD_HASHING = {
+    'ALGORITHM': os.environ.get('PASSWORD_HASH_ALGORITHM', 'pbkdf2_sha256'),  # or 'argon2', 'scrypt'
+    'PBKDF2_ITERATIONS': None,
+    'ARGON2_TIME_COST': None,
+    'ARGON2_MEMORY_COST': None,   # KiB
+    'ARGON2_PARALLELISM': None,
+    'SCRYPT_WORK_FACTOR': None,
+    'SCRYPT_BLOCK_SIZE': None,
+    'SCRYPT_PARALLELISM': None,
+}
+
+_TUNED_HASHERS = {
+    'pbkdf2_sha256': 'account.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'account.hashers.TunedArgon2PasswordHasher',
+    'scrypt': 'account.hashers.TunedScryptPasswordHasher',
+}
+
+# The first hasher creates new hashes; the others only verify existing ones
+PASSWORD_HASHERS = [_TUNED_HASHERS[PASSWORD_HASHING['ALGORITHM']]] + [
+    path for algorithm, path in _TUNED_HASHERS.items() if algorithm != PASSWORD_HASHING['ALGORITHM']
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
@@ -178,6 +275,21 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# collectstatic writes content-hashed names plus .gz/.br copies (trendbazar.staticfiles).
+# Run it on deploy; without its manifest, pages link the unhashed names.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'trendbazar.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+
+# In-process static/media server in front of the WSGI app (trendbazar.static_server)
+STATIC_SERVER = {
+    'ENABLED': None,  # None: on when DEBUG is off
+    'STATIC_MAX_AGE': 60,
+    'MEDIA_MAX_AGE': 3600,
+    'IMMUTABLE_MAX_AGE': 365 * 24 * 3600,
+}
+
 
 AUTH_USER_MODEL = 'account.User'
 SITE_URL = 'http://127.0.0.1:8000/'
@@ -187,7 +299,27 @@ LOGOUT_REDIRECT_URL = 'login'
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = '/'
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Login throttling (account.throttle); use 'django' to share buckets between workers
+LOGIN_THROTTLE = {
+    'BACKEND': 'locmem',
+    'CACHE_ALIAS': 'default',
+    'IP_CAPACITY': 20,
+    'IP_REFILL_PER_MINUTE': 10,
+    'EMAIL_CAPACITY': 5,
+    'EMAIL_REFILL_PER_MINUTE': 1,
+    # Behind a reverse proxy: 'HTTP_X_FORWARDED_FOR', with TRUSTED_PROXIES proxies appending to it
+    'CLIENT_IP_HEADER': 'REMOTE_ADDR',
+    'TRUSTED_PROXIES': 1,
+}
+# Serve login with the async view (set by asgi.py); hashing then runs on LOGIN_HASH_WORKERS threads
+LOGIN_ASYNC = os.environ.get('TRENDBAZAR_ASYNC_LOGIN') == '1'
+LOGIN_HASH_WORKERS = None  # defaults to the CPU count
+# Serve the catalog, content pages and report form with their async views (set by asgi.py)
+ASYNC_VIEWS = os.environ.get('TRENDBAZAR_ASYNC_VIEWS') == '1'
+
+# Set EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend (or .locmem.) to work offline
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
@@ -196,3 +328,92 @@ EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_PASSWORD")
 DEFAULT_FROM_EMAIL = os.environ.get("EMAIL_NAME")  # Added fallback 
 PASSWORD_RESET_TIMEOUT = 3600  # 1 hour
 
+# Settled activation / password reset links answered from memory (account.token_cache);
+# entries live for PASSWORD_RESET_TIMEOUT. Hit fan-out at /internal/token-links/ for staff
+TOKEN_LINK_CACHE = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 10000,
+}
+
+# Outgoing email worker pool (account.mailer)
+EMAIL_DISPATCH = {
+    'WORKERS': 2,
+    'QUEUE_SIZE': 1000,
+    'BATCH_SIZE': 50,
+    'MAX_RETRIES': 3,
+    'RETRY_BACKOFF': 2.0,
+    'IDLE_TIMEOUT': 30,
+    'ENQUEUE_TIMEOUT': 2,
+    'SHUTDOWN_TIMEOUT': 10,
+    'SYNC': False,
+}
+
+
+# Product catalog (home.views.index)
+PRODUCTS_PAGE_SIZE = 24
+PRODUCTS_STREAMING = False  # render the catalog with StreamingHttpResponse
+PRODUCTS_STREAM_CHUNK_SIZE = 12
+
+# Static content pages (home.page_cache): rendered once per login state and served with ETags.
+# VERSION keys the cache to a deploy; None hashes the template files.
+PAGE_CACHE = {
+    'ENABLED': True,
+    'VERSION': os.environ.get('DEPLOY_VERSION'),
+}
+
+# Product search (home.search). None picks FTS5 on SQLite and a LIKE fallback elsewhere.
+PRODUCT_SEARCH_BACKEND = None
+PRODUCT_SEARCH_MAX_RESULTS = 1000
+
+# Search result cache (home.search_cache). 'locmem' is per process; use 'django'
+# with a shared CACHES alias when several workers must see admin edits at once.
+PRODUCT_SEARCH_CACHE = {
+    'BACKEND': 'locmem',
+    'CACHE_ALIAS': 'default',
+    'MAX_ENTRIES': 1024,
+    'TIMEOUT': 300,
+    'MAX_ROWS': 200,
+}
+
+# Search instrumentation (home.instrumentation). Each hook is called with a SearchEvent.
+SEARCH_INSTRUMENTATION_HOOKS = [
+    'home.instrumentation.log_search',
+    'home.instrumentation.slow_searches',
+]
+SEARCH_SLOW_THRESHOLD_MS = 200
+SEARCH_SLOW_SAMPLE_RATE = 0.1
+SEARCH_SLOW_KEEP = 100
+
+# Responsive product images (home.images): WebP derivatives built by a background pool
+PRODUCT_IMAGE_WIDTHS = (320, 640, 960)
+PRODUCT_IMAGE_QUALITY = 80
+PRODUCT_IMAGE_WORKERS = 2
+PRODUCT_IMAGE_ASYNC = True
+
+# Contact form ingestion (home.ingest): submissions are spooled to disk and bulk-written
+REPORT_INGEST = {
+    'ENABLED': True,
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 2.0,
+    'SPOOL_DIR': BASE_DIR / 'report_spool',
+    'FSYNC': True,
+    'DEDUP_WINDOW': 3600,
+    'DEDUP_MAX_KEYS': 100000,
+    'SYNC': False,
+}
+
+# Server-side cart (cart.services). Set CART_CACHE_ALIAS to a cache every worker shares
+# (Redis, Memcached, database) to keep per-session cart snapshots; LocMem is refused.
+CART_CACHE_ALIAS = None
+CART_CACHE_TIMEOUT = 3600
+
+# Admin changelists (trendbazar.admin_utils): filtered lists stop counting at this many rows
+ADMIN_COUNT_LIMIT = 10000
+
+# Request profiling (trendbazar.profiling); results at /internal/profiling/ for staff
+PROFILING = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 1.0 if DEBUG else 0.01,
+    'SERVER_TIMING': True,
+    'TOP_DUPLICATES': 10,
+}
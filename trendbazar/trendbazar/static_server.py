@@ -0,0 +1,212 @@
+"""
+WSGI wrapper that answers /static/ and /media/ requests before Django sees
+them.
+
+Files go out through wsgi.file_wrapper, which gunicorn and uWSGI turn into
+sendfile(). The precompressed .br/.gz copies written by
+trendbazar.staticfiles are picked by Accept-Encoding, single byte ranges
+are honoured, and If-None-Match / If-Modified-Since get a 304. Hashed names
+are cached for a year as immutable.
+"""
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+
+DEFAULTS = {
+    'ENABLED': None,            # None: on when DEBUG is off
+    'STATIC_MAX_AGE': 60,       # unhashed static names
+    'MEDIA_MAX_AGE': 3600,
+    'IMMUTABLE_MAX_AGE': 365 * 24 * 3600,
+}
+
+# The 12 hex digits ManifestStaticFilesStorage adds before the extension
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+BLOCK_SIZE = 64 * 1024
+
+
+def get_options():
+    options = {**DEFAULTS, **getattr(settings, 'STATIC_SERVER', {})}
+    if options['ENABLED'] is None:
+        options['ENABLED'] = not settings.DEBUG
+    return options
+
+
+def parse_accept_encoding(header):
+    """{coding: q-value} from an Accept-Encoding header; a malformed q-value counts as 0"""
+    weights = {}
+    for part in header.split(','):
+        coding, *params = [piece.strip() for piece in part.split(';')]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.lower()] = q
+    return weights
+
+
+def negotiate_encoding(header, available):
+    """The acceptable coding from `available` with the highest q-value, ties going to the earlier one"""
+    weights = parse_accept_encoding(header)
+    best, best_q = None, 0
+    for name in available:
+        q = weights.get(name, weights.get('*', 0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(BLOCK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+class Mount:
+    def __init__(self, prefix, root, max_age, immutable_max_age):
+        self.prefix = prefix
+        self.root = os.path.realpath(root)
+        self.max_age = max_age
+        self.immutable_max_age = immutable_max_age
+
+    def resolve(self, path_info):
+        """Absolute path of the file for `path_info`, or None if it is missing or outside the root"""
+        relative = path_info[len(self.prefix):]
+        path = os.path.realpath(os.path.join(self.root, relative))
+        if not path.startswith(self.root + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+    def cache_control(self, path):
+        if HASHED_NAME.search(path):
+            return f'public, max-age={self.immutable_max_age}, immutable'
+        return f'public, max-age={self.max_age}'
+
+
+class StaticFilesApplication:
+    def __init__(self, application, options=None):
+        options = options or get_options()
+        self.application = application
+        self.mounts = []
+        for url, root, max_age in (
+            (settings.STATIC_URL, settings.STATIC_ROOT, options['STATIC_MAX_AGE']),
+            (settings.MEDIA_URL, settings.MEDIA_ROOT, options['MEDIA_MAX_AGE']),
+        ):
+            if url and root and url.startswith('/'):
+                self.mounts.append(Mount(url, root, max_age, options['IMMUTABLE_MAX_AGE']))
+
+    def __call__(self, environ, start_response):
+        path_info = environ.get('PATH_INFO', '')
+        for mount in self.mounts:
+            if path_info.startswith(mount.prefix):
+                return self.serve(mount, environ, start_response)
+        return self.application(environ, start_response)
+
+    def serve(self, mount, environ, start_response):
+        if environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            start_response('405 Method Not Allowed', [('Allow', 'GET, HEAD'), ('Content-Length', '0')])
+            return []
+        path = mount.resolve(environ['PATH_INFO'])
+        if path is None:
+            start_response('404 Not Found', [('Content-Type', 'text/plain'), ('Content-Length', '9')])
+            return [b'Not Found']
+
+        content_type, _ = mimetypes.guess_type(path)
+        headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Cache-Control', mount.cache_control(path)),
+            ('Accept-Ranges', 'bytes'),
+        ]
+
+        # Ranges address the identity bytes, so they are never served compressed
+        range_header = environ.get('HTTP_RANGE')
+        available = {name: path + suffix for name, suffix in ENCODINGS if os.path.isfile(path + suffix)}
+        encoding = None
+        if not range_header:
+            encoding = negotiate_encoding(environ.get('HTTP_ACCEPT_ENCODING', ''), available)
+        if available:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if encoding:
+            path = available[encoding]
+            headers.append(('Content-Encoding', encoding))
+
+        stat = os.stat(path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+        headers += [('ETag', etag), ('Last-Modified', formatdate(stat.st_mtime, usegmt=True))]
+
+        if self.not_modified(environ, etag, stat.st_mtime):
+            start_response('304 Not Modified', headers)
+            return []
+
+        size = stat.st_size
+        byte_range = self.parse_range(range_header, environ.get('HTTP_IF_RANGE'), etag, size)
+        if byte_range == 'unsatisfiable':
+            start_response('416 Range Not Satisfiable', [('Content-Range', f'bytes */{size}'), ('Content-Length', '0')])
+            return []
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            headers += [('Content-Range', f'bytes {start}-{end}/{size}'), ('Content-Length', str(length))]
+            start_response('206 Partial Content', headers)
+            return [] if environ['REQUEST_METHOD'] == 'HEAD' else read_range(path, start, length)
+
+        headers.append(('Content-Length', str(size)))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(open(path, 'rb'), BLOCK_SIZE)
+
+    def not_modified(self, environ, etag, mtime):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]
+        if_modified_since = environ.get('HTTP_IF_MODIFIED_SINCE')
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def parse_range(self, header, if_range, etag, size):
+        """(start, end) for a single satisfiable range, 'unsatisfiable', or None to send everything"""
+        if not header or (if_range and if_range != etag):
+            return None
+        match = RANGE.match(header.strip())
+        if not match or match.groups() == ('', ''):
+            # Several ranges or a malformed header: answering with the whole file is allowed
+            return None
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+        if start >= size or start > end:
+            return 'unsatisfiable'
+        return start, end
+
+
+def wrap_application(application):
+    """Put the static file server in front of `application` when STATIC_SERVER is enabled"""
+    options = get_options()
+    if not options['ENABLED']:
+        return application
+    return StaticFilesApplication(application, options)
@@ -0,0 +1,74 @@
+"""
+Static asset storage that writes content-hashed names (style.3f2a9c1d0e4b.css)
+plus gzip and, when the brotli package is installed, brotli variants next to
+every compressible file at collectstatic time. trendbazar.static_server
+serves the variants without compressing anything per request.
+
+Until collectstatic has written the manifest (a fresh checkout, the test
+runner, which forces DEBUG off) pages link the files under their own names
+instead of failing on every {% static %} tag.
+"""
+import gzip
+import logging
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # optional; gzip alone is still written
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.html', '.txt', '.json', '.xml', '.ico')
+logger = logging.getLogger(__name__)
+
+# Below this size the compressed copy rarely pays for the extra file
+MIN_SIZE = 512
+
+
+def compress_file(path):
+    """Write path.gz and path.br when they come out smaller; returns the names written"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < MIN_SIZE:
+        return []
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    manifest_missing = False
+
+    def read_manifest(self):
+        content = super().read_manifest()
+        self.manifest_missing = content is None
+        return content
+
+    def stored_name(self, name):
+        if self.manifest_missing:
+            if not getattr(self, '_warned', False):
+                self._warned = True
+                logger.warning("No %s in %s; run collectstatic. Serving unhashed names.",
+                               self.manifest_name, self.location)
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        self.manifest_missing = False
+        # Both the hashed names and the originals, which third-party code may still reference
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE) and self.exists(name):
+                for written in compress_file(self.path(name)):
+                    yield name, os.path.relpath(written, self.location), True
@@ -0,0 +1,63 @@
+"""
+Compile every template once at process start.
+
+With the cached loader a template is read and parsed on first use and then
+kept for the life of the process; warming fills that cache before the first
+request, so no visitor pays for parsing base.html, header.html and friends.
+"""
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(engine):
+    """Every .html name a django.template.Engine's loaders can find, project templates first"""
+    names = []
+    seen = set()
+    for loader in engine.template_loaders:
+        # The cached loader wraps the filesystem and app directories loaders
+        for inner in getattr(loader, 'loaders', [loader]):
+            for directory in inner.get_dirs():
+                for path in sorted(Path(directory).rglob('*.html')):
+                    name = path.relative_to(directory).as_posix()
+                    if name not in seen:
+                        seen.add(name)
+                        names.append(name)
+    return names
+
+
+def warm_templates(prefixes=None):
+    """
+    Load (and so compile and cache) every template whose name starts with one
+    of `prefixes`, or all of them; returns (compiled, seconds)
+    """
+    started = time.perf_counter()
+    compiled = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for name in template_names(engine.engine):
+            if prefixes is not None and not name.startswith(tuple(prefixes)):
+                continue
+            try:
+                engine.get_template(name)
+                compiled += 1
+            except (TemplateDoesNotExist, TemplateSyntaxError):
+                # Fragments meant for {% include %} in another app's context, or plain broken
+                logger.warning("Could not precompile template %s", name, exc_info=True)
+    elapsed = time.perf_counter() - started
+    logger.info("Precompiled %d templates in %.0fms", compiled, elapsed * 1000)
+    return compiled, elapsed
+
+
+def warm_up():
+    """Called from wsgi.py/asgi.py; TEMPLATE_WARMUP is True, False, or a list of name prefixes"""
+    option = getattr(settings, 'TEMPLATE_WARMUP', True)
+    if option:
+        warm_templates(None if option is True else option)
@@ -0,0 +1,443 @@
+import gzip
+import importlib
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.template import engines
+from django.template.backends.django import Template as DjangoTemplate
+from django.templatetags.static import static
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from account.models import User
+from home.models import Product, Report
+from home.views import _report_fields, validate_form_data
+from . import profiling
+from .admin_utils import EstimatedCountPaginator, fold_case, prefix_successor
+from .db import REPLICA, ReadReplicaRouter, read_only, sqlite_init_command
+from .template_warmup import template_names, warm_templates, warm_up
+from .static_server import DEFAULTS as STATIC_SERVER_DEFAULTS, StaticFilesApplication, negotiate_encoding
+from .sessions import cache as cache_sessions, db as db_sessions
+from .validation import CONTACT_FORM, PASSWORD, REPORT_RECORD, Validator, max_length, min_length, required
+
+CONTACT = {
+    'firstName': 'Ann', 'lastName': 'Bee', 'email': 'ann@example.com', 'phone': '+1 555 123 4567',
+    'subject': 'general', 'address': '1 Street', 'message': 'Hello there, this is a message.',
+    'newsletter': False, 'privacy': True,
+}
+
+
+class ValidatorTests(SimpleTestCase):
+    def test_first_failing_check_per_field_in_table_order(self):
+        validator = Validator({
+            'a': [required('a required'), min_length(3, 'a short')],
+            'b': [max_length(2, 'b long')],
+        })
+        self.assertEqual(validator.errors({'a': '', 'b': 'xyz'}), ['a required', 'b long'])
+        self.assertEqual(validator.errors({'a': 'xy', 'b': 'x'}), ['a short'])
+        self.assertTrue(validator.is_valid({'a': 'xyz', 'b': ''}))
+
+    def test_optional_fields_are_skipped_while_empty(self):
+        validator = Validator({'a': [min_length(3, 'a short')]}, optional={'a'})
+        self.assertEqual(validator.errors({}), [])
+        self.assertEqual(validator.errors({'a': 'x'}), ['a short'])
+
+    def test_split_keeps_order_and_indexes(self):
+        validator = Validator({'a': [required('a required')]})
+        valid, rejected = validator.split([{'a': 1}, {'a': ''}, {'a': 2}])
+        self.assertEqual(valid, [{'a': 1}, {'a': 2}])
+        self.assertEqual(rejected, [(1, {'a': ''}, ['a required'])])
+
+
+class ContactFormTests(SimpleTestCase):
+    def test_valid_submission(self):
+        self.assertEqual(validate_form_data(CONTACT), [])
+
+    def test_messages(self):
+        data = {**CONTACT, 'firstName': 'A', 'email': 'nope', 'phone': '12', 'message': 'short', 'privacy': False}
+        self.assertEqual(CONTACT_FORM.errors(data), [
+            'First name is required and must be at least 2 characters.',
+            'Please enter a valid email address.',
+            'Please enter a valid phone number.',
+            'Message is required and must be at least 10 characters.',
+            'You must agree to the Privacy Policy and Terms of Use.',
+        ])
+
+    def test_accepted_submissions_survive_spool_recovery(self):
+        for changes in ({'phone': '+1 (555) 123-4567'}, {'firstName': 'A' * 60, 'lastName': 'B' * 60},
+                        {'address': 'x' * 300}):
+            data = {**CONTACT, **changes}
+            errors = validate_form_data(data)
+            self.assertTrue(errors, changes)
+            self.assertEqual(errors, REPORT_RECORD.errors(_report_fields(data)))
+        self.assertTrue(REPORT_RECORD.is_valid(_report_fields(CONTACT)))
+
+
+class PasswordTests(SimpleTestCase):
+    def test_rules(self):
+        cases = {
+            'Ab1!': ['Password must be at least 8 characters long'],
+            'abcdefgh!': ['Password must contain both letters and numbers'],
+            'abcdefg1': ['Password must include at least one special character'],
+            'abcdef1!': [],
+        }
+        for password, errors in cases.items():
+            self.assertEqual(PASSWORD.errors({'password': password}), errors, password)
+
+
+class WriteOnChangeSessionTests(TestCase):
+    def saved_session(self, store_class):
+        session = store_class()
+        session['cart'] = [1, 2]
+        session.save()
+        return store_class(session.session_key)
+
+    def test_db_session_unchanged_data_is_not_written(self):
+        session = self.saved_session(db_sessions.SessionStore)
+        session['cart'] = [1, 2]
+        self.assertTrue(session.modified)
+        with self.assertNumQueries(0):  # loaded by the assignment above
+            session.save()
+
+    def test_db_session_changed_data_is_written(self):
+        session = self.saved_session(db_sessions.SessionStore)
+        session['cart'] = [3]
+        session.save()
+        self.assertEqual(db_sessions.SessionStore(session.session_key)['cart'], [3])
+
+    def test_cache_session_unchanged_data_is_not_written(self):
+        session = self.saved_session(cache_sessions.SessionStore)
+        session.pop('missing', None)
+        session['cart'] = [1, 2]
+        with mock.patch.object(session._cache, 'set') as cache_set:
+            session.save()
+        cache_set.assert_not_called()
+
+    def test_new_session_is_always_saved(self):
+        session = db_sessions.SessionStore()
+        session.save()
+        self.assertTrue(db_sessions.SessionStore().exists(session.session_key))
+
+
+
+class CookieMessageTests(TestCase):
+    def test_flash_message_rides_in_its_own_cookie(self):
+        response = self.client.post('/Authlogin/', {'email': 'flash@example.com', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(CookieStorage.cookie_name, response.cookies)
+        # An anonymous visitor with a message still has no session
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+        response = self.client.get('/Authlogin/')
+        self.assertContains(response, 'Invalid email or password.')
+        self.assertFalse(self.client.get('/Authlogin/').context['messages'])
+
+
+class SignedCookieSessionTests(SimpleTestCase):
+    def import_engine(self):
+        sys.modules.pop('trendbazar.sessions.signed_cookies', None)
+        self.addCleanup(sys.modules.pop, 'trendbazar.sessions.signed_cookies', None)
+        return importlib.import_module('trendbazar.sessions.signed_cookies')
+
+    def test_refused_with_the_committed_secret_key(self):
+        with override_settings(SECRET_KEY='django-insecure-committed'):
+            with self.assertRaises(ImproperlyConfigured):
+                self.import_engine()
+
+    def test_unchanged_data_keeps_the_cookie(self):
+        with override_settings(SECRET_KEY='a-private-key-' * 4):
+            store_class = self.import_engine().SessionStore
+            session = store_class()
+            session['cart'] = [1, 2]
+            session.save()
+            cookie = session.session_key
+            session = store_class(cookie)
+            session['cart'] = [1, 2]
+            session.save()
+            self.assertEqual(session.session_key, cookie)
+            self.assertEqual(store_class(cookie)['cart'], [1, 2])
+
+
+@override_settings(PROFILING={'SAMPLE_RATE': 1.0})
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.create(title='Phone', description='A phone', price='1.00')
+
+    def setUp(self):
+        profiling.stats.reset()
+        self.addCleanup(profiling.stats.reset)
+
+    def timings(self, response):
+        return dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+
+    def test_server_timing_and_stats(self):
+        self.client.get('/')
+        response = self.client.get('/')
+        self.assertRegex(self.timings(response)['db'], r'dur=[\d.]+;desc="[1-9]\d* queries"')
+        view = profiling.stats.snapshot(10)['index']
+        self.assertEqual(view['requests'], 2)
+        self.assertGreater(view['mean_queries'], 0)
+        self.assertGreater(view['mean_template_ms'], 0)
+        self.assertEqual(sum(view['histogram_ms'].values()), 2)
+
+    def test_templates_are_timed_without_patching_django(self):
+        self.assertEqual(DjangoTemplate.render.__module__, 'django.template.backends.django')
+        self.assertIsInstance(engines['django'].get_template('about_us.html'), profiling.TimedTemplate)
+        self.assertEqual(engines['django'].from_string('{{ x }}').render({'x': 1}), '1')
+
+    def test_async_requests_count_database_time(self):
+        response = async_to_sync(self.async_client.get)('/')
+        self.assertNotIn('desc="0 queries"', response['Server-Timing'])
+
+    def test_duplicate_queries_are_reported(self):
+        profile = profiling.RequestProfile()
+        with profiling.ProfilingMiddleware(lambda request: None).wrap_connections(profile):
+            for pk in (1, 2, 2):
+                Product.objects.filter(pk=pk).exists()
+        self.assertEqual(profile.queries, 3)
+        self.assertEqual(list(profile.duplicates().values()), [3])
+
+    @override_settings(PROFILING={'SAMPLE_RATE': 0.0})
+    def test_unsampled_requests_are_left_alone(self):
+        self.assertNotIn('Server-Timing', self.client.get('/'))
+        self.assertEqual(profiling.stats.snapshot(10), {})
+
+    def test_stats_view_is_for_staff(self):
+        self.assertEqual(self.client.get('/internal/profiling/').status_code, 302)
+        staff = User.objects.create_superuser(email='admin@example.com', full_name='Admin', password='pw')
+        self.client.force_login(staff)
+        data = self.client.get('/internal/profiling/').json()
+        self.assertEqual(data['sample_rate'], 1.0)
+        self.assertIn('profiling_stats', data['views'])
+
+
+class StaticServerTests(SimpleTestCase):
+    CSS = b'body { color: red; }' * 100
+
+    def setUp(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root)
+        (root / 'static').mkdir()
+        (root / 'static' / 'site.0123456789ab.css').write_bytes(self.CSS)
+        (root / 'static' / 'site.0123456789ab.css.gz').write_bytes(gzip.compress(self.CSS))
+        (root / 'secret.txt').write_text('secret')
+        settings = override_settings(STATIC_ROOT=root / 'static', MEDIA_ROOT=root / 'media')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.app = StaticFilesApplication(lambda environ, start_response: ['django'], STATIC_SERVER_DEFAULTS)
+
+    def get(self, path, method='GET', **headers):
+        environ = {'PATH_INFO': path, 'REQUEST_METHOD': method, **headers}
+        response = {}
+
+        def start_response(status, headers):
+            response['status'], response['headers'] = status, dict(headers)
+
+        body = self.app(environ, start_response)
+        response['body'] = b''.join(body) if response else body
+        return response
+
+    def test_precompressed_copy_is_chosen(self):
+        response = self.get('/static/site.0123456789ab.css', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['status'], '200 OK')
+        self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response['body']), self.CSS)
+        self.assertIn('immutable', response['headers']['Cache-Control'])
+        self.assertEqual(response['headers']['Vary'], 'Accept-Encoding')
+
+        response = self.get('/static/site.0123456789ab.css')
+        self.assertNotIn('Content-Encoding', response['headers'])
+        self.assertEqual(response['body'], self.CSS)
+
+    def test_refused_and_lookalike_codings_are_not_served(self):
+        for header in ('gzip;q=0, deflate', 'xgzip', 'x-gzip-custom', '*;q=0'):
+            response = self.get('/static/site.0123456789ab.css', HTTP_ACCEPT_ENCODING=header)
+            self.assertNotIn('Content-Encoding', response['headers'], header)
+        response = self.get('/static/site.0123456789ab.css', HTTP_ACCEPT_ENCODING='*')
+        self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+
+    def test_encoding_negotiation(self):
+        self.assertEqual(negotiate_encoding('gzip, br', ['br', 'gzip']), 'br')
+        self.assertEqual(negotiate_encoding('br;q=0.5, GZIP', ['br', 'gzip']), 'gzip')
+        self.assertEqual(negotiate_encoding('br;q=0, *;q=0.1', ['br', 'gzip']), 'gzip')
+        self.assertIsNone(negotiate_encoding('xbr, gzip;q=bad', ['br', 'gzip']))
+        self.assertIsNone(negotiate_encoding('', ['br', 'gzip']))
+
+    def test_byte_ranges(self):
+        response = self.get('/static/site.0123456789ab.css', HTTP_RANGE='bytes=5-9', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['status'], '206 Partial Content')
+        self.assertEqual(response['body'], self.CSS[5:10])
+        self.assertEqual(response['headers']['Content-Range'], f'bytes 5-9/{len(self.CSS)}')
+        response = self.get('/static/site.0123456789ab.css', HTTP_RANGE=f'bytes={len(self.CSS)}-')
+        self.assertEqual(response['status'], '416 Range Not Satisfiable')
+
+    def test_revalidation(self):
+        etag = self.get('/static/site.0123456789ab.css')['headers']['ETag']
+        response = self.get('/static/site.0123456789ab.css', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response['status'], response['body']), ('304 Not Modified', b''))
+
+    def test_only_files_under_the_root_are_served(self):
+        self.assertEqual(self.get('/static/../secret.txt')['status'], '404 Not Found')
+        self.assertEqual(self.get('/static/missing.css')['status'], '404 Not Found')
+        self.assertEqual(self.get('/static/site.0123456789ab.css', method='POST')['status'], '405 Method Not Allowed')
+        self.assertEqual(self.get('/about/')['body'], ['django'])
+
+
+class CompressedManifestStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.static_root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.static_root)
+        settings = override_settings(STATIC_ROOT=self.static_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_unhashed_names_until_collectstatic(self):
+        with self.assertLogs('trendbazar.staticfiles', 'WARNING'):
+            self.assertEqual(static('style.css'), '/static/style.css')
+
+        call_command('collectstatic', interactive=False, verbosity=0)
+        # A fresh storage, as a worker started after the deploy would have
+        staticfiles_storage._setup()
+        hashed = static('style.css')
+        self.assertRegex(hashed, r'^/static/style\.[0-9a-f]{12}\.css$')
+        path = self.static_root / hashed[len('/static/'):]
+        self.assertEqual(gzip.decompress(Path(f'{path}.gz').read_bytes()), path.read_bytes())
+
+
+class SQLiteTuningTests(TestCase):
+    def test_init_command(self):
+        self.assertEqual(
+            sqlite_init_command({'journal_mode': 'WAL', 'cache_size': -2048}),
+            'PRAGMA journal_mode=WAL;PRAGMA cache_size=-2048',
+        )
+
+    def test_pragmas_are_applied_on_connect(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['cache_size'])
+
+
+class ReadReplicaRouterTests(SimpleTestCase):
+    router = ReadReplicaRouter()
+
+    def db_for_read(self, model):
+        return read_only(lambda request: self.router.db_for_read(model))(None)
+
+    def test_read_only_views_read_catalog_models_from_the_replica(self):
+        # Only the router sees the extra alias; nothing connects to it
+        with mock.patch.dict(settings.DATABASES, {REPLICA: {}}):
+            self.assertEqual(self.db_for_read(Product), REPLICA)
+            self.assertIsNone(self.db_for_read(User))
+            self.assertIsNone(self.router.db_for_read(Product))
+            self.assertEqual(async_to_sync(read_only(self.adb_for_read))(None), REPLICA)
+        self.assertEqual(self.router.db_for_write(Product), 'default')
+        self.assertFalse(self.router.allow_migrate(REPLICA, 'home'))
+
+    async def adb_for_read(self, request):
+        return self.router.db_for_read(Product)
+
+    def test_without_a_replica_everything_uses_the_primary(self):
+        self.assertIsNone(self.db_for_read(Product))
+
+
+class TemplateWarmupTests(SimpleTestCase):
+    def setUp(self):
+        self.engine = engines['django'].engine
+        self.cached_loader = self.engine.template_loaders[0]
+        self.cached_loader.reset()
+        self.addCleanup(self.cached_loader.reset)
+
+    def test_project_templates_come_first(self):
+        names = template_names(self.engine)
+        project = sorted(path.name for path in (settings.BASE_DIR / 'templates').glob('*.html'))
+        self.assertEqual(sorted(names[:len(project)]), project)
+        self.assertIn('admin/base.html', names)
+
+    def test_every_project_template_compiles_into_the_cache(self):
+        with self.assertNoLogs('trendbazar.template_warmup', 'WARNING'):
+            compiled, _ = warm_templates(['index', 'header', 'products_partial'])
+        self.assertEqual(compiled, 3)
+        self.assertEqual(len(self.cached_loader.get_template_cache), 3)
+        filesystem_loader = self.cached_loader.loaders[0]
+        with mock.patch.object(filesystem_loader, 'get_contents', side_effect=AssertionError('read from disk')):
+            engines['django'].get_template('index.html')
+
+    def test_warm_up_setting(self):
+        with override_settings(TEMPLATE_WARMUP=False):
+            warm_up()
+        self.assertEqual(len(self.cached_loader.get_template_cache), 0)
+        with override_settings(TEMPLATE_WARMUP=['about']):
+            warm_up()
+        self.assertEqual(list(self.cached_loader.get_template_cache), ['about_us.html'])
+
+
+class LargeTableAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email='admin@example.com', full_name='Admin', password='pw')
+        for name in ('Ann Bee', 'Anna Cole', 'Bob Dee'):
+            Report.objects.create(name=name, email=f"{name.split()[0].lower()}@example.com", subject='general',
+                                  phone='1', address='1 Street', message='Hello')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_unfiltered_count_is_estimated(self):
+        last = Report.objects.order_by('-id').first().pk
+        Report.objects.filter(name='Anna Cole').delete()
+        paginator = EstimatedCountPaginator(Report.objects.order_by('-id'), 100)
+        with self.assertNumQueries(1):
+            # The largest key, not a COUNT(*): it overestimates after deletes
+            self.assertEqual(paginator.count, last)
+
+    @override_settings(ADMIN_COUNT_LIMIT=2)
+    def test_filtered_count_stops_at_the_limit(self):
+        paginator = EstimatedCountPaginator(Report.objects.filter(subject='general'), 100)
+        self.assertEqual(paginator.count, 2)
+
+    def test_search_matches_the_start_of_email_or_name(self):
+        response = self.client.get('/admin/home/report/', {'q': 'ANN'})
+        self.assertEqual(sorted(str(report) for report in response.context['cl'].result_list),
+                         ['Report by Ann Bee', 'Report by Anna Cole'])
+        response = self.client.get('/admin/home/report/', {'q': 'bee'})
+        self.assertFalse(response.context['cl'].result_list)
+
+    def test_search_lists_newest_first(self):
+        response = self.client.get('/admin/home/report/', {'q': 'an'})
+        self.assertEqual([report.name for report in response.context['cl'].result_list], ['Anna Cole', 'Ann Bee'])
+
+    def test_non_ascii_prefix(self):
+        Report.objects.create(name='Émile Zola', email='emile@example.com', subject='general',
+                              phone='1', address='1 Street', message='Hello')
+        response = self.client.get('/admin/home/report/', {'q': 'Émi'})
+        self.assertEqual([report.name for report in response.context['cl'].result_list], ['Émile Zola'])
+
+    def test_case_is_folded_like_the_database(self):
+        self.assertEqual(fold_case('ÉMILE', 'sqlite'), 'Émile')
+        self.assertEqual(fold_case('ÉMILE', 'postgresql'), 'émile')
+
+    def test_prefix_successor(self):
+        self.assertEqual(prefix_successor('ab'), 'ac')
+        # Astral characters sort after U+FFFF, so they are inside the range
+        self.assertLess('a\U0001F600', prefix_successor('a'))
+        self.assertEqual(prefix_successor('a\U0010FFFF'), 'b')
+        self.assertEqual(prefix_successor('\ud7ff'), '\ue000')
+        self.assertIsNone(prefix_successor('\U0010FFFF'))
+
+    @override_settings(ADMIN_COUNT_LIMIT=1)
+    def test_matches_are_capped_per_field(self):
+        # One row from the email index and one from the name index
+        response = self.client.get('/admin/home/report/', {'q': 'ann'})
+        self.assertEqual(len(response.context['cl'].result_list), 1)
@@ -18,12 +18,18 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from trendbazar.profiling import profiling_stats
+from account.token_cache import token_link_stats
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('internal/profiling/', profiling_stats, name='profiling_stats'),
+    path('internal/token-links/', token_link_stats, name='token_link_stats'),
     path('', include('home.urls')),
     path('Auth', include('account.urls')),
-    path('auth/', include('social_django.urls', namespace='social')),
+    path('cart/', include('cart.urls')),
+    # social_django.urls with lazily imported views
+    path('auth/', include('account.social_urls', namespace='social')),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,123 @@
+"""
+Declarative validation shared by the contact form, registration, bulk user
+import and report ingestion.
+
+A Validator is a table of field name -> checks. Each check is a test and the
+message reported when it fails; a field stops at its first failing check,
+and optional fields are skipped while empty. Patterns are compiled once at
+import instead of on every call.
+"""
+import re
+from collections import namedtuple
+
+Check = namedtuple('Check', 'test message')
+
+
+def required(message):
+    return Check(bool, message)
+
+
+def min_length(length, message):
+    return Check(lambda value: len(value) >= length, message)
+
+
+def max_length(length, message):
+    return Check(lambda value: len(value) <= length, message)
+
+
+def matches(pattern, message):
+    """Value matches `pattern` from its first character"""
+    return Check(re.compile(pattern).match, message)
+
+
+def contains(pattern, message):
+    """`pattern` occurs anywhere in the value"""
+    return Check(re.compile(pattern).search, message)
+
+
+class Validator:
+    def __init__(self, rules, optional=()):
+        # Field order is kept so messages come out in the order of the table
+        self.rules = [(field, tuple(checks), field in optional) for field, checks in rules.items()]
+
+    def errors(self, data):
+        """Messages for every failing field of one record, in rule order"""
+        errors = []
+        for field, checks, optional in self.rules:
+            value = data.get(field, '')
+            if optional and not value:
+                continue
+            for test, message in checks:
+                if not test(value):
+                    errors.append(message)
+                    break
+        return errors
+
+    def is_valid(self, data):
+        return not self.errors(data)
+
+    def validate_many(self, records):
+        """Errors for each record, in the same order as `records`"""
+        errors = self.errors
+        return [errors(record) for record in records]
+
+    def split(self, records):
+        """(valid records, [(index, record, errors)] for the invalid ones)"""
+        valid, rejected = [], []
+        errors = self.errors
+        for index, record in enumerate(records):
+            found = errors(record)
+            if found:
+                rejected.append((index, record, found))
+            else:
+                valid.append(record)
+        return valid, rejected
+
+
+EMAIL_PATTERN = r'^[^\s@]+@[^\s@]+\.[^\s@]+$'
+PHONE_PATTERN = r'^[\d\s\-\+\(\)]{10,}$'
+
+CONTACT_FORM = Validator({
+    'firstName': [min_length(2, 'First name is required and must be at least 2 characters.')],
+    'lastName': [min_length(2, 'Last name is required and must be at least 2 characters.')],
+    'email': [
+        required('Email address is required.'),
+        matches(EMAIL_PATTERN, 'Please enter a valid email address.'),
+    ],
+    'phone': [matches(PHONE_PATTERN, 'Please enter a valid phone number.')],
+    'subject': [required('Please select a subject.')],
+    'message': [
+        min_length(10, 'Message is required and must be at least 10 characters.'),
+        max_length(1000, 'Message cannot exceed 1000 characters.'),
+    ],
+    'privacy': [required('You must agree to the Privacy Policy and Terms of Use.')],
+}, optional={'phone'})
+
+# A stored Report, as spooled by home.ingest; limits follow the model fields.
+# The contact form checks its record with these too, after CONTACT_FORM.
+REPORT_RECORD = Validator({
+    'name': [required('Name is required.'), max_length(100, 'First and last name cannot exceed 100 characters.')],
+    'email': [matches(EMAIL_PATTERN, 'Invalid email address.')],
+    'phone': [max_length(15, 'Phone number cannot exceed 15 characters.')],
+    'address': [max_length(255, 'Address cannot exceed 255 characters.')],
+    'subject': [required('Subject is required.'), max_length(200, 'Subject is too long.')],
+    'message': [required('Message is required.')],
+}, optional={'phone', 'address'})
+
+PASSWORD = Validator({
+    'password': [
+        min_length(8, 'Password must be at least 8 characters long'),
+        contains(r'[A-Za-z]', 'Password must contain both letters and numbers'),
+        contains(r'\d', 'Password must contain both letters and numbers'),
+        contains(r'[!@#$%^&*(),.?":{}|<>]', 'Password must include at least one special character'),
+    ],
+})
+
+IMPORTED_USER = Validator({
+    'email': [
+        required('Email address is required.'),
+        max_length(255, 'Email address is too long.'),
+        matches(EMAIL_PATTERN, 'Invalid email address.'),
+    ],
+    'full_name': [max_length(255, 'Full name is too long.')],
+}, optional={'full_name'})
@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'trendbazar.settings')
 
 application = get_wsgi_application()
+
+# Parse every template now rather than on the first requests (see TEMPLATE_WARMUP)
+from trendbazar.template_warmup import warm_up  # noqa: E402
+
+warm_up()
+
+# Serve /static/ and /media/ ahead of Django when DEBUG is off (see STATIC_SERVER)
+from trendbazar.static_server import wrap_application  # noqa: E402
+
+application = wrap_application(application)